@@ -1,14 +1,16 @@
+import threading
 from flask import Flask
 from .routes import main
 from .config import configure_app
 from flask_pymongo import PyMongo  # Import PyMongo
-from urllib.parse import urlparse
-import pika
-import json
 
 
 mongo = PyMongo()  # Create a PyMongo instance
 
+_app = None
+_app_lock = threading.Lock()
+
+
 def create_app():
     app = Flask(__name__)
     configure_app(app)
@@ -30,4 +32,23 @@ def create_app():
 
     return app
 
-app = create_app()
+
+def get_app():
+    """
+    The process-wide app, created with `create_app` on first use. Services
+    call this instead of holding an app from import time, so importing them
+    creates no Mongo client.
+    """
+    global _app
+    if _app is None:
+        with _app_lock:
+            if _app is None:
+                _app = create_app()
+    return _app
+
+
+def __getattr__(name):
+    # `from app import app` still works, but now creates the app on first use
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from app.rabbitmq_consumer import (
+    RABBITMQ_HOST, JOB_APPLICATION_QUEUE, INTERVIEW_COMPLETED_QUEUE, CONSUMER_DRAIN_TIMEOUT, RECONNECT_DELAY_SECONDS,
+    CONSUMER_MAX_ATTEMPTS, RETRY_COUNT_HEADER, partial_evaluation_update, failure_destination, retry_queue,
+    dead_letter_queue,
+)
+from app.service.applicationPipeline import (
+    load_application_entry_async, is_application_processed, run_job_application_pipeline_async,
+)
+from app.service.interviewData import fetch_interview_data_async
+from app.service.applicationData import fetch_application_details_async
+from app.service.jobCache import start_job_cache_invalidation
+from app.service.evaluationEngine import EVALUATION_MODE, EvaluationError, evaluate_interview_questions_async
+from app.utils.async_mongo import get_async_db
+from app.utils.log import get_logger, log_sampled, preview
+from app.utils.metrics import span, trace, QUEUE_LAG, MESSAGES_IN_FLIGHT, MESSAGES_PROCESSED
+
+logger = get_logger(__name__)
+
+# Unacknowledged messages RabbitMQ may push per queue. Each one is a task on the
+# event loop rather than a thread, so this can be far higher than CONSUMER_WORKERS.
+ASYNC_CONSUMER_PREFETCH = int(os.getenv("ASYNC_CONSUMER_PREFETCH", "100"))
+# How often the loop checks whether it was asked to stop
+STOP_POLL_SECONDS = 1
+
+
+async def handle_job_application_async(message):
+    """Async `handle_job_application`. Raises on failure."""
+    logger.info("Received message from %s: %s", JOB_APPLICATION_QUEUE, message)
+
+    entry = await load_application_entry_async(message)
+    if is_application_processed(entry):
+        logger.info("Application %s was already processed, skipping", message)
+        return
+
+    with span("fetch_application"):
+        document = await fetch_application_details_async(message)
+    log_sampled(logger, logging.DEBUG, "Fetched application document: %s", preview(document))
+
+    resume_url = document['resumeURL']
+    if resume_url:
+        logger.info("Extracted resumeURL: %s", resume_url)
+
+        results, timings = await run_job_application_pipeline_async(document, entry)
+
+        logger.info("ATS score for application %s: %s", message, results['ats']['score'])
+        log_sampled(logger, logging.DEBUG, "ATS report: %s", preview(results['ats']['report']))
+        log_sampled(logger, logging.DEBUG, "Questions: %s", preview(results['questions']))
+        logger.info("Question document ID: %s", results['persist']['interviewId'])
+        logger.info("Stage timings: %s", ", ".join(f"{name}={elapsed:.2f}s" for name, elapsed in timings.items()))
+    else:
+        logger.warning("resumeURL not found in the message")
+
+
+async def handle_interview_completed_async(message, evaluation_mode=EVALUATION_MODE):
+    """Async `handle_interview_completed`. Raises on failure."""
+    logger.info("Received message from %s: %s", INTERVIEW_COMPLETED_QUEUE, message)
+
+    interview_id = message
+    if not interview_id:
+        logger.warning("Invalid message format: '_id' not found.")
+        return
+
+    logger.info("Processing completed interview with ID: %s", interview_id)
+    with span("fetch_interview"):
+        interview_document = await fetch_interview_data_async(interview_id)
+    log_sampled(logger, logging.DEBUG, "Fetched interview document: %s", preview(interview_document))
+
+    questions = interview_document['questions']
+    try:
+        results = await evaluate_interview_questions_async(questions, mode=evaluation_mode)
+    except EvaluationError as e:
+        try:
+            await get_async_db().interviews.update_one(
+                {'_id': interview_document['_id']}, partial_evaluation_update(interview_document, e.results))
+        except Exception as save_error:
+            logger.warning("Could not save the partial evaluation of interview %s: %s", interview_id, save_error)
+        raise
+
+    total_score = 0
+    for question, result in zip(questions, results):
+        log_sampled(logger, logging.DEBUG, "Question: %s Answer: %s Evaluation: %s",
+                    preview(question['question']), preview(result['answer']), result['evaluation'])
+        total_score += result['evaluation']
+        question.update(result)
+
+    average_score = total_score / len(questions) if questions else 0
+    logger.info("Average score for interview %s: %s", interview_id, average_score)
+
+    with span("mongo_write"):
+        result = await get_async_db().interviews.update_one(
+            {'_id': interview_document['_id']},
+            {'$set': {'questions': questions, 'averageScore': average_score}},
+        )
+    if result.modified_count > 0:
+        logger.info("Interview document updated successfully.")
+    else:
+        logger.warning("Failed to update the interview document.")
+
+
+ASYNC_QUEUE_HANDLERS = {
+    JOB_APPLICATION_QUEUE: handle_job_application_async,
+    INTERVIEW_COMPLETED_QUEUE: handle_interview_completed_async,
+}
+
+
+async def process_message_async(message, handler, exchange):
+    """
+    Run `handler` on an aio_pika message and ack it. As in the threaded
+    consumer, a failed message is published to its retry or dead letter queue
+    through `exchange` (the default exchange) first, see `failure_destination`.
+    """
+    queue = message.routing_key
+    MESSAGES_IN_FLIGHT.inc(queue=queue)
+    # aio_pika decodes the AMQP timestamp into a datetime
+    if message.timestamp:
+        QUEUE_LAG.observe(max(0.0, time.time() - message.timestamp.timestamp()), queue=queue)
+
+    try:
+        with trace():
+            await handler(json.loads(message.body))
+    except Exception as e:
+        import aio_pika
+
+        destination, headers, delay = failure_destination(queue, message.headers)
+        if delay is None:
+            outcome = "dead_letter"
+            logger.error("Giving up on message from %s after %s attempts, moved it to %s: %s",
+                         queue, headers[RETRY_COUNT_HEADER], destination, e)
+        else:
+            outcome = "retry"
+            logger.error("Error processing message from %s (attempt %s of %s), retrying in %ss: %s",
+                         queue, headers[RETRY_COUNT_HEADER], CONSUMER_MAX_ATTEMPTS, delay, e)
+        await exchange.publish(
+            aio_pika.Message(message.body, headers=headers, expiration=delay, timestamp=message.timestamp,
+                             content_type=message.content_type, delivery_mode=aio_pika.DeliveryMode.PERSISTENT),
+            routing_key=destination,
+        )
+        await message.ack()
+    else:
+        outcome = "ack"
+        await message.ack()
+    finally:
+        MESSAGES_IN_FLIGHT.dec(queue=queue)
+
+    MESSAGES_PROCESSED.inc(queue=queue, outcome=outcome)
+
+
+async def declare_retry_queues_async(channel, queue):
+    """Async `declare_retry_queues` on an aio_pika channel."""
+    await channel.declare_queue(retry_queue(queue), durable=True,
+                                arguments={"x-dead-letter-exchange": "", "x-dead-letter-routing-key": queue})
+    await channel.declare_queue(dead_letter_queue(queue), durable=True)
+
+
+async def wait_for_stop(stop_event):
+    while not stop_event.is_set():
+        await asyncio.sleep(STOP_POLL_SECONDS)
+
+
+async def consume(queues, stop_event, prefetch=ASYNC_CONSUMER_PREFETCH, drain_timeout=CONSUMER_DRAIN_TIMEOUT):
+    """
+    Consume `queues` on one robust connection until `stop_event` is set, then
+    cancel the consumers and wait up to `drain_timeout` seconds for the
+    messages in flight to be settled.
+    """
+    import aio_pika  # only needed in asyncio mode
+
+    in_flight = set()
+    connection = await aio_pika.connect_robust(host=RABBITMQ_HOST, heartbeat=10)
+    async with connection:
+        consumers = []
+        for queue_name in queues:
+            # One channel per queue keeps the prefetch limit per queue
+            channel = await connection.channel()
+            await channel.set_qos(prefetch_count=prefetch)
+            queue = await channel.declare_queue(queue_name, durable=False)
+            await declare_retry_queues_async(channel, queue_name)
+
+            async def on_message(message, handler=ASYNC_QUEUE_HANDLERS[queue_name], exchange=channel.default_exchange):
+                task = asyncio.current_task()
+                in_flight.add(task)
+                try:
+                    await process_message_async(message, handler, exchange)
+                finally:
+                    in_flight.discard(task)
+
+            consumers.append((queue, await queue.consume(on_message, no_ack=False)))
+
+        logger.info("Waiting for messages in queues (asyncio mode): %s", ", ".join(queues))
+        await wait_for_stop(stop_event)
+
+        logger.info("Draining %s", ", ".join(queues))
+        for queue, consumer_tag in consumers:
+            await queue.cancel(consumer_tag)
+        if in_flight:
+            _, pending = await asyncio.wait(set(in_flight), timeout=drain_timeout)
+            if pending:
+                logger.warning("Stopped with %s messages in flight; RabbitMQ will redeliver them", len(pending))
+
+
+async def start_async_consumer(queues=None, stop_event=None, prefetch=ASYNC_CONSUMER_PREFETCH,
+                               drain_timeout=CONSUMER_DRAIN_TIMEOUT):
+    """
+    Asyncio consumer mode: one event loop holds up to `prefetch` messages per
+    queue in flight, each as a task awaiting Groq, Mongo and GCS. Runs until
+    `stop_event` (a threading.Event) is set, see `consume`.
+    """
+    queues = list(queues or ASYNC_QUEUE_HANDLERS)
+    stop_event = stop_event or threading.Event()
+    start_job_cache_invalidation()
+
+    while not stop_event.is_set():  # Reconnection loop; connect_robust handles drops once connected
+        try:
+            await consume(queues, stop_event, prefetch, drain_timeout)
+        except Exception as e:
+            logger.exception("Unexpected error: %s. Reconnecting in %s seconds...", e, RECONNECT_DELAY_SECONDS)
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+    logger.info("Consumer stopped")
@@ -1,194 +1,453 @@
+import os
 import pika
 import json
-import re
 import time
+import logging
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import UpdateOne
 from flask import current_app
-from app.service.resume import process_resume, async_detect_text_in_pdf, summarize_resume, ats_scanner  
-from app.service.questionsGenerator import generate_interview_questions, split_questions, ensure_question_marks, process_questions
+from app.service.applicationPipeline import (
+    load_application_entry, is_application_processed, run_job_application_pipeline,
+)
 from app.service.interviewData import fetch_interview_data
-from app.service.applicationData import fetch_application_data
-from app.service.interviewProcess import download_audio_from_gcs, speech_to_text, evaluate_question_answer
-from app import app  
-
-SERVICE_ACCOUNT_JSON = r"./../env/nextgen-hr-8ce4fa070811.json"
-GCS_DESTINATION_URI = "gs://bucket_nextgen-hr/vision_output/"
-
-def start_consumer():
-    while True:  # Reconnection loop
+from app.service.applicationData import fetch_application_details
+from app.service.jobCache import start_job_cache_invalidation
+from app.utils.bulk_writer import BULK_WRITES_ENABLED, get_bulk_writer
+from app.service.evaluationEngine import EVALUATION_MODE, EvaluationError, evaluate_interview_questions
+from app.utils.log import get_logger, log_sampled, preview
+from app.utils.metrics import span, trace, QUEUE_LAG, MESSAGES_IN_FLIGHT, MESSAGES_PROCESSED
+from app import get_app
+
+logger = get_logger(__name__)
+
+RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "localhost")
+
+# Existing queue for job applications
+JOB_APPLICATION_QUEUE = 'new_job_application_queue'
+# New queue for completed interviews
+INTERVIEW_COMPLETED_QUEUE = 'interview_completed_queue'
+
+# "threaded": manual acks, work runs on per-queue worker threads
+# "inline": legacy mode, auto_ack and all work on the connection thread
+# "asyncio": one event loop with async AMQP, Mongo and Groq clients, see app.async_consumer
+CONSUMER_MODE = os.getenv("CONSUMER_MODE", "threaded")
+# With bulk writes a message is acked only once its batch is written, so a
+# channel needs room for messages waiting on a batch on top of the ones being
+# worked on; otherwise batches never grow past a message or two
+BULK_WRITE_PREFETCH_PER_WORKER = 4
+
+
+def default_prefetch(workers, bulk_writes=BULK_WRITES_ENABLED):
+    """Unacknowledged messages per queue for `workers` threads, when CONSUMER_PREFETCH is not set."""
+    return workers * BULK_WRITE_PREFETCH_PER_WORKER if bulk_writes else workers
+
+
+# Worker threads per queue and unacknowledged messages RabbitMQ may push per queue.
+# A channel adds at most CONSUMER_PREFETCH writes to a bulk batch, so raise
+# CONSUMER_PREFETCH along with BULK_WRITE_MAX_BATCH.
+CONSUMER_WORKERS = int(os.getenv("CONSUMER_WORKERS", "2"))
+CONSUMER_PREFETCH = int(os.getenv("CONSUMER_PREFETCH", str(default_prefetch(CONSUMER_WORKERS))))
+# Seconds a stopping consumer waits for in-flight messages before closing; unsettled ones are redelivered
+CONSUMER_DRAIN_TIMEOUT = float(os.getenv("CONSUMER_DRAIN_TIMEOUT", "60"))
+RECONNECT_DELAY_SECONDS = 5
+# A failed message waits CONSUMER_RETRY_DELAY_SECONDS in "<queue>.retry", from
+# which RabbitMQ dead-letters it back onto the work queue. After
+# CONSUMER_MAX_ATTEMPTS it is parked in "<queue>.dead" for inspection and replay.
+CONSUMER_MAX_ATTEMPTS = int(os.getenv("CONSUMER_MAX_ATTEMPTS", "5"))
+CONSUMER_RETRY_DELAY_SECONDS = float(os.getenv("CONSUMER_RETRY_DELAY_SECONDS", "30"))
+RETRY_COUNT_HEADER = "x-retry-count"
+
+
+def handle_job_application(message):
+    """
+    Process a message from the job application queue. Raises on failure.
+    Returns the Future of a queued bulk write, or None if nothing is pending.
+    """
+    logger.info("Received message from %s: %s", JOB_APPLICATION_QUEUE, message)
+
+    # Redelivered or duplicated messages for finished applications are acked without any work
+    entry = load_application_entry(message)
+    if is_application_processed(entry):
+        logger.info("Application %s was already processed, skipping", message)
+        return None
+
+    with span("fetch_application"):
+        document = fetch_application_details(message)
+    log_sampled(logger, logging.DEBUG, "Fetched application document: %s", preview(document))
+
+    # Extract the resumeURL from the message
+    resume_url = document['resumeURL']
+    if resume_url:
+        logger.info("Extracted resumeURL: %s", resume_url)
+
+        # OCR -> summary -> {ATS, questions} -> persist, independent stages run concurrently
+        results, timings = run_job_application_pipeline(document, entry)
+
+        logger.info("ATS score for application %s: %s", message, results['ats']['score'])
+        log_sampled(logger, logging.DEBUG, "ATS report: %s", preview(results['ats']['report']))
+        log_sampled(logger, logging.DEBUG, "Questions: %s", preview(results['questions']))
+        logger.info("Question document ID: %s", results['persist']['interviewId'])
+        logger.info("Stage timings: %s", ", ".join(f"{name}={elapsed:.2f}s" for name, elapsed in timings.items()))
+
+        return results['persist']['pending']
+    else:
+        logger.warning("resumeURL not found in the message")
+
+
+def partial_evaluation_update(interview_document, results):
+    """
+    The update storing what was computed for a partly evaluated interview
+    (see `EvaluationError`), so a redelivery reuses the answers' transcripts.
+    """
+    questions = interview_document['questions']
+    for question, result in zip(questions, results):
+        if result:
+            question.update(result)
+    return {'$set': {'questions': questions}}
+
+
+def handle_interview_completed(message, evaluation_mode=EVALUATION_MODE):
+    """
+    Process a message from the interview completed queue. Raises on failure.
+    `evaluation_mode` is "per_question" or "batch", see `evaluate_interview_questions`.
+    Returns the Future of a queued bulk write, or None if nothing is pending.
+    """
+    logger.info("Received message from %s: %s", INTERVIEW_COMPLETED_QUEUE, message)
+
+    # Process the completed interview document
+    interview_id = message
+    if interview_id:
+        logger.info("Processing completed interview with ID: %s", interview_id)
+
+        # Fetch the interview document using the ID
+        with span("fetch_interview"):
+            interview_document = fetch_interview_data(interview_id)
+        log_sampled(logger, logging.DEBUG, "Fetched interview document: %s", preview(interview_document))
+
+        questions = interview_document['questions']
+
+        total_score = 0
+
+        # Grade all questions concurrently; results come back in question order
         try:
-            connection = pika.BlockingConnection(
-                pika.ConnectionParameters('localhost', heartbeat=10)  # Enable heartbeats
-            )
-            channel = connection.channel()
-
-            # Existing queue for job applications
-            job_application_queue = 'new_job_application_queue'
-            channel.queue_declare(queue=job_application_queue, durable=False)
-
-            # New queue for completed interviews
-            interview_completed_queue = 'interview_completed_queue'
-            channel.queue_declare(queue=interview_completed_queue, durable=False)
-
-            def job_application_callback(ch, method, properties, body):
-                try:
-                    message = json.loads(body)
-                    print(f"Received message from {job_application_queue}: {message}")
-                    
-                    document = fetch_application_data(message)
-                    print("\nFetched application document:", document)
-
-                    print("\n the resume url from the document:", document['resumeURL'])
-                    
-                    # Extract the resumeURL from the message
-                    resume_url = document['resumeURL']
-                    if resume_url:
-                        # Call the function in resume.py with the resumeURL
-                        print(f"Extracted resumeURL: {resume_url}")
-                        process_resume(resume_url)
-                        
-                        #function to extract text from pdf file
-                        resume_text = async_detect_text_in_pdf(SERVICE_ACCOUNT_JSON, resume_url, GCS_DESTINATION_URI)
-                        print("\nResume text extracted successfully:\n" , resume_text )
-                        # print(resume_text)
-
-                        # function to convert pdf text into resume summmay text
-                        print("\n resume summary generating .....")
-                        resume_summary = summarize_resume(resume_text)
-                        print("\n resume summary generated successfully:\n" , resume_summary)
-
-                        print("\n ats report generating process started ...")
-                        job_description = document['jobDetails']['description']
-                        print("\n job description from the document:", job_description)
-                        ats_report = ats_scanner(resume_summary, job_description)
-                        print("\n ats report generated successfully:")
-                        print(ats_report)
-
-                        # print("\nATS Report:\n", ats_report)
-
-                        match = re.search(r"Score:\s*[\r\n]*\s*(\d+)%", ats_report)
-                        print(match)
-                        print("\n ATS report score will be generated soon...")
-                        # If a match is found, print the score
-                        if match:
-                            score = match.group(1)
-                            print("\nThe score is:", score)
-                        else:
-                            print("No score found.")
-                        print("\n genearting questions ....")
-                        questions = generate_interview_questions(resume_summary, job_description)
-                        print(questions)
-
-                        # print("\n splitting questions ....")
-                        # questions_array = split_questions(questions)
-                        # print(questions_array)
-
-                        # print("\n genearting questions with questions marks ....")
-                        # questions_with_marks = ensure_question_marks(questions_array)
-
-                        # print(questions_with_marks)
-
-                        print("processing questions ....")
-                        questions_array = process_questions(questions)
-                        print(questions_array)
-
-                        questionDocument = {
-                            "jobId": document['jobDetails']['_id'],
-                            "userId": document['userId'],
-                            "questions": questions_array,
-                        }
-
-                        # Fetch the MONGO instance from app.config
-                        mongo_instance = app.config['MONGO']
-                        print("MONGO instance in callback:", mongo_instance)
-
-                        # Example of using the MONGO instance
-                        result = mongo_instance.db.interviews.insert_one(questionDocument)
-                        print("Inserted question document with ID:", result.inserted_id)
-                        print("\n Question document inserted successfully:\n", questionDocument)
-
-
-                    else:
-                        print("resumeURL not found in the message")
-                except Exception as e:
-                    print(f"Error in job_application_callback: {e}")
-
-            def interview_completed_callback(ch, method, properties, body):
-                try:
-                    message = json.loads(body)
-                    print(f"Received message from {interview_completed_queue}: {message}")
-                    
-                    # Process the completed interview document
-                    interview_id = message
-                    if interview_id:
-                        print(f"Processing completed interview with ID: {interview_id}")
-
-                        # Fetch the interview document using the ID
-                        interview_document = fetch_interview_data(interview_id)
-                        print("\nFetched interview document:", interview_document)
-
-                        questions = interview_document['questions']
-                        print("\n Interview questions:", questions)
-
-                        total_score = 0
-
-                        for question in questions:
-                            question_text = question['question']
-                            print("\n Question:", question_text)
-
-                            audio_answer_url = question['answerAudioUrl']
-                        
-                            audio_path = download_audio_from_gcs(audio_answer_url)
-
-                            answer_text = speech_to_text(audio_path)
-                            print(f"Answer: {answer_text}\n")
-
-                            evaluation = evaluate_question_answer(question_text, answer_text)
-
-                            print("Evaluation Result:")
-                            print(evaluation)
-
-                            total_score += int(evaluation)
-
-                            # Add evaluation result and answer to the question document
-                            question['evaluation'] = evaluation
-                            question['answer'] = answer_text
-
-                        # Calculate the average score
-                        average_score = total_score / len(questions) if questions else 0
-                        print(f"Average Score: {average_score}")
-                        # Add average score to the interview document
-                        interview_document['averageScore'] = average_score
-                        print("\nInterview document with average score updated successfully:")
-                        # print(interview_document)
-
-                        print("\nEvaluated questions with answers and evaluations created successfully:")
-                        # print(questions)
-                        # Update the interview document with the evaluated questions
-                        mongo_instance = app.config['MONGO']
-                        result = mongo_instance.db.interviews.update_one(
-                            {'_id': interview_document['_id']},
-                            {'$set': {'questions': questions, 'averageScore': average_score}}
-                        )
-                        if result.modified_count > 0:
-                            print("Interview document updated successfully.")
-                        else:
-                            print("Failed to update the interview document.")
-                        
-                        # Add any additional processing logic here if needed
+            results = evaluate_interview_questions(questions, mode=evaluation_mode)
+        except EvaluationError as e:
+            try:
+                get_app().config['MONGO'].db.interviews.update_one(
+                    {'_id': interview_document['_id']}, partial_evaluation_update(interview_document, e.results))
+            except Exception as save_error:
+                logger.warning("Could not save the partial evaluation of interview %s: %s", interview_id, save_error)
+            raise
+
+        for question, result in zip(questions, results):
+            log_sampled(logger, logging.DEBUG, "Question: %s Answer: %s Evaluation: %s",
+                        preview(question['question']), preview(result['answer']), result['evaluation'])
+
+            total_score += result['evaluation']
+
+            # Add evaluation result, answer and its transcript source to the question document
+            question.update(result)
+
+        # Calculate the average score
+        average_score = total_score / len(questions) if questions else 0
+        logger.info("Average score for interview %s: %s", interview_id, average_score)
+        # Add average score to the interview document
+        interview_document['averageScore'] = average_score
+
+        # Update the interview document with the evaluated questions
+        mongo_instance = get_app().config['MONGO']
+        interview_filter = {'_id': interview_document['_id']}
+        interview_update = {'$set': {'questions': questions, 'averageScore': average_score}}
+        if BULK_WRITES_ENABLED:
+            return get_bulk_writer(mongo_instance.db.interviews).submit(UpdateOne(interview_filter, interview_update))
+
+        with span("mongo_write"):
+            result = mongo_instance.db.interviews.update_one(interview_filter, interview_update)
+        if result.modified_count > 0:
+            logger.info("Interview document updated successfully.")
+        else:
+            logger.warning("Failed to update the interview document.")
+    else:
+        logger.warning("Invalid message format: '_id' not found.")
+
+
+def job_application_callback(ch, method, properties, body):
+    observe_queue_lag(method.routing_key, properties)
+    try:
+        with trace():
+            pending = handle_job_application(json.loads(body))
+        if pending is not None:
+            pending.result()
+    except Exception as e:
+        logger.exception("Error in job_application_callback: %s", e)
+
+
+def interview_completed_callback(ch, method, properties, body):
+    observe_queue_lag(method.routing_key, properties)
+    try:
+        with trace():
+            pending = handle_interview_completed(json.loads(body))
+        if pending is not None:
+            pending.result()
+    except Exception as e:
+        logger.exception("Error in interview_completed_callback: %s", e)
+
+
+QUEUE_HANDLERS = {
+    JOB_APPLICATION_QUEUE: handle_job_application,
+    INTERVIEW_COMPLETED_QUEUE: handle_interview_completed,
+}
+
+INLINE_CALLBACKS = {
+    JOB_APPLICATION_QUEUE: job_application_callback,
+    INTERVIEW_COMPLETED_QUEUE: interview_completed_callback,
+}
+
+
+def _ack(channel, delivery_tag):
+    # The channel may have been closed by a reconnect while the work was running;
+    # the broker will then redeliver the message, so there is nothing to ack.
+    if channel.is_open:
+        channel.basic_ack(delivery_tag=delivery_tag)
+
+
+def retry_queue(queue):
+    return f"{queue}.retry"
+
+
+def dead_letter_queue(queue):
+    return f"{queue}.dead"
+
+
+def declare_retry_queues(channel, queue):
+    """
+    Declare the retry and dead letter queues of `queue`. The work queues are
+    shared with the backend, which declares them without arguments, so the
+    retry routing lives on these queues instead.
+    """
+    channel.queue_declare(queue=retry_queue(queue), durable=True,
+                          arguments={"x-dead-letter-exchange": "", "x-dead-letter-routing-key": queue})
+    channel.queue_declare(queue=dead_letter_queue(queue), durable=True)
+
+
+def failure_destination(queue, headers):
+    """
+    Where a message of `queue` goes after failing, as a tuple of
+    (queue, headers, delay in seconds or None); the headers count its retries.
+    """
+    retries = int((headers or {}).get(RETRY_COUNT_HEADER, 0)) + 1
+    headers = dict(headers or {}, **{RETRY_COUNT_HEADER: retries})
+    if retries < CONSUMER_MAX_ATTEMPTS:
+        return retry_queue(queue), headers, CONSUMER_RETRY_DELAY_SECONDS
+    return dead_letter_queue(queue), headers, None
+
+
+def _republish(channel, delivery_tag, body, properties, destination):
+    """Move a failed message to `destination` (see `failure_destination`) and ack the original."""
+    if not channel.is_open:
+        return
+    queue, headers, delay = destination
+    channel.basic_publish(
+        exchange="",
+        routing_key=queue,
+        body=body,
+        properties=pika.BasicProperties(
+            headers=headers,
+            expiration=None if delay is None else str(int(delay * 1000)),
+            delivery_mode=pika.spec.PERSISTENT_DELIVERY_MODE,
+            timestamp=getattr(properties, "timestamp", None),
+            content_type=getattr(properties, "content_type", None),
+        ),
+    )
+    channel.basic_ack(delivery_tag=delivery_tag)
+
+
+def _settle(connection, channel, method, error=None, properties=None, body=None):
+    """
+    Schedule the ack of a message on the connection thread; on `error`, its
+    move to the retry or dead letter queue.
+    """
+    if error is None:
+        outcome = "ack"
+        callback = functools.partial(_ack, channel, method.delivery_tag)
+    else:
+        destination = failure_destination(method.routing_key, getattr(properties, "headers", None))
+        attempts = destination[1][RETRY_COUNT_HEADER]
+        if destination[2] is None:
+            outcome = "dead_letter"
+            logger.error("Giving up on message from %s after %s attempts, moved it to %s: %s",
+                         method.routing_key, attempts, destination[0], error)
+        else:
+            outcome = "retry"
+            logger.error("Error processing message from %s (attempt %s of %s), retrying in %ss: %s",
+                         method.routing_key, attempts, CONSUMER_MAX_ATTEMPTS, destination[2], error)
+        callback = functools.partial(_republish, channel, method.delivery_tag, body, properties, destination)
+    MESSAGES_PROCESSED.inc(queue=method.routing_key, outcome=outcome)
+
+    try:
+        connection.add_callback_threadsafe(callback)
+    except Exception as e:
+        # The connection is gone; the broker will redeliver the unacked message
+        logger.warning("Could not acknowledge message from %s: %s", method.routing_key, e)
+    finally:
+        # Only once the ack is scheduled, so a draining consumer that sees no
+        # messages in flight still has every ack left to send
+        MESSAGES_IN_FLIGHT.dec(queue=method.routing_key)
+
+
+def observe_queue_lag(queue, properties):
+    """Record how long a message waited, if the publisher set its AMQP timestamp (epoch seconds)."""
+    timestamp = getattr(properties, "timestamp", None)
+    if timestamp:
+        QUEUE_LAG.observe(max(0.0, time.time() - timestamp), queue=queue)
+
+
+def process_message(connection, channel, method, body, handler, properties=None):
+    """
+    Run `handler` on a worker thread and settle the message afterwards.
+
+    pika channels are not thread-safe, so the ack is scheduled back onto the
+    connection thread with `add_callback_threadsafe`. When the handler queued
+    a bulk write, the ack waits until that batch has been written. A failed
+    message is retried after a delay and dead-lettered once it has failed
+    CONSUMER_MAX_ATTEMPTS times, see `failure_destination`.
+    """
+    observe_queue_lag(method.routing_key, properties)
+
+    try:
+        with trace():
+            pending = handler(json.loads(body))
+    except Exception as e:
+        _settle(connection, channel, method, e, properties, body)
+        return
+
+    if pending is None:
+        _settle(connection, channel, method)
+    else:
+        pending.add_done_callback(
+            lambda future: _settle(connection, channel, method, future.exception(), properties, body))
+
+
+def register_threaded_consumer(connection, queue, executor, prefetch=CONSUMER_PREFETCH):
+    """
+    Consume `queue` on its own channel with manual acks, handing each message
+    to `executor`. Using one channel per queue keeps the prefetch limit per queue.
+    """
+    channel = connection.channel()
+    channel.queue_declare(queue=queue, durable=False)
+    declare_retry_queues(channel, queue)
+    channel.basic_qos(prefetch_count=prefetch)
+
+    handler = QUEUE_HANDLERS[queue]
+
+    def on_message(ch, method, properties, body):
+        MESSAGES_IN_FLIGHT.inc(queue=method.routing_key)
+        executor.submit(process_message, connection, ch, method, body, handler, properties)
+
+    channel.basic_consume(queue=queue, on_message_callback=on_message, auto_ack=False)
+    return channel
+
+
+def register_inline_consumer(connection, queue):
+    """Consume `queue` with auto_ack, running the work on the connection thread."""
+    channel = connection.channel()
+    channel.queue_declare(queue=queue, durable=False)
+    channel.basic_consume(queue=queue, on_message_callback=INLINE_CALLBACKS[queue], auto_ack=True)
+    return channel
+
+
+def drain(connection, channels, queues, timeout=CONSUMER_DRAIN_TIMEOUT):
+    """
+    Stop deliveries on `channels`, then keep servicing `connection` until
+    every message already handed to a worker is settled and acknowledged,
+    or `timeout` seconds pass. Returns the number of messages still in flight.
+    """
+    for channel in channels:
+        for consumer_tag in list(channel.consumer_tags):
+            # Undispatched messages of manual-ack consumers are returned to the queue;
+            # auto_ack ones were already acked, so they are processed here
+            for method, properties, body in channel.basic_cancel(consumer_tag) or ():
+                INLINE_CALLBACKS[method.routing_key](channel, method, properties, body)
+
+    deadline = time.monotonic() + timeout
+    while in_flight(queues) and time.monotonic() < deadline:
+        connection.process_data_events(time_limit=0.2)
+    # Send the acks scheduled by the last workers
+    connection.process_data_events(time_limit=0)
+
+    remaining = in_flight(queues)
+    if remaining:
+        logger.warning("Stopped with %s messages in flight; RabbitMQ will redeliver them", remaining)
+    return remaining
+
+
+def in_flight(queues):
+    """Messages of `queues` received by this process but not yet settled."""
+    return sum(MESSAGES_IN_FLIGHT.value(queue=queue) for queue in queues)
+
+
+def start_consumer(mode=CONSUMER_MODE, workers=CONSUMER_WORKERS, prefetch=CONSUMER_PREFETCH, queues=None,
+                   stop_event=None, drain_timeout=CONSUMER_DRAIN_TIMEOUT):
+    """
+    Consume `queues` (every queue by default) until `stop_event` is set, then
+    drain them (see `drain`) and return. Reconnects after connection errors.
+    """
+    queues = list(queues or QUEUE_HANDLERS)
+    unknown = set(queues) - set(QUEUE_HANDLERS)
+    if unknown:
+        raise ValueError(f"Unknown queues: {', '.join(sorted(unknown))}")
+    stop_event = stop_event or threading.Event()
+
+    if mode == "asyncio":
+        import asyncio
+        from app.async_consumer import start_async_consumer
+        # CONSUMER_PREFETCH is sized for threads; the async consumer has its own default
+        asyncio.run(start_async_consumer(queues=queues, stop_event=stop_event, drain_timeout=drain_timeout))
+        return
+
+    # Keep cached job descriptions in sync with edits made through the backend
+    start_job_cache_invalidation()
+
+    # Worker pools outlive reconnects so in-flight work is not interrupted
+    executors = {}
+    if mode == "threaded":
+        executors = {
+            queue: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=queue)
+            for queue in queues
+        }
+
+    try:
+        while not stop_event.is_set():  # Reconnection loop
+            try:
+                connection = pika.BlockingConnection(
+                    pika.ConnectionParameters(RABBITMQ_HOST, heartbeat=10)  # Enable heartbeats
+                )
+
+                channels = []
+                for queue in queues:
+                    if mode == "threaded":
+                        channels.append(register_threaded_consumer(connection, queue, executors[queue], prefetch))
                     else:
-                        print("Invalid message format: '_id' not found.")
-                except Exception as e:
-                    print(f"Error in interview_completed_callback: {e}")
-
-            # Bind callbacks to respective queues
-            channel.basic_consume(queue=job_application_queue, on_message_callback=job_application_callback, auto_ack=True)
-            channel.basic_consume(queue=interview_completed_queue, on_message_callback=interview_completed_callback, auto_ack=True)
-
-            print(f"Waiting for messages in queues: {job_application_queue}, {interview_completed_queue}")
-            channel.start_consuming()
-        except pika.exceptions.AMQPConnectionError as e:
-            print(f"RabbitMQ connection error: {e}. Reconnecting in 5 seconds...")
-            time.sleep(5)  # Wait before reconnecting
-        except Exception as e:
-            print(f"Unexpected error: {e}. Reconnecting in 5 seconds...")
-            time.sleep(5)
\ No newline at end of file
+                        channels.append(register_inline_consumer(connection, queue))
+
+                logger.info("Waiting for messages in queues (%s mode): %s", mode, ", ".join(queues))
+                # Dispatches deliveries for every channel and services heartbeats
+                while not stop_event.is_set():
+                    connection.process_data_events(time_limit=1)
+
+                logger.info("Draining %s", ", ".join(queues))
+                drain(connection, channels, queues, drain_timeout)
+                connection.close()
+            except pika.exceptions.AMQPConnectionError as e:
+                logger.warning("RabbitMQ connection error: %s. Reconnecting in %s seconds...",
+                               e, RECONNECT_DELAY_SECONDS)
+                stop_event.wait(RECONNECT_DELAY_SECONDS)  # Wait before reconnecting
+            except Exception as e:
+                logger.exception("Unexpected error: %s. Reconnecting in %s seconds...", e, RECONNECT_DELAY_SECONDS)
+                stop_event.wait(RECONNECT_DELAY_SECONDS)
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+    logger.info("Consumer stopped")
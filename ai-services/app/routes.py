@@ -1,8 +1,15 @@
-from flask import Blueprint, current_app, jsonify
+from flask import Blueprint, Response, current_app, jsonify
 from bson.objectid import ObjectId  # Import ObjectId for MongoDB queries
+from app.utils.metrics import METRICS_CONTENT_TYPE, render_metrics
 
 main = Blueprint('main', __name__)
 
 @main.route('/')
 def index():
-    return jsonify({"message": "Welcome to the AI Services API!"})
\ No newline at end of file
+    return jsonify({"message": "Welcome to the AI Services API!"})
+
+
+@main.route('/metrics')
+def metrics():
+    # Metrics of this web process only; consumer workers serve their own, see app.supervisor
+    return Response(render_metrics(), mimetype=METRICS_CONTENT_TYPE)
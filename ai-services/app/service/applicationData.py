@@ -1,8 +1,10 @@
-from app import app
+from app import get_app
 from bson.objectid import ObjectId
+from app.service.jobCache import JOB_CACHE_ENABLED, get_job_document
+from app.utils.async_mongo import get_async_db
 
 def fetch_application_data(id):
-    mongo_instance = app.config['MONGO']
+    mongo_instance = get_app().config['MONGO']
 
     try:
         # Convert the string ID to ObjectId
@@ -17,10 +19,114 @@ def fetch_application_data(id):
         # Fetch the job document using the jobId reference
         job_id = application_document.get("jobId")
         if job_id:
-            job_document = mongo_instance.db.jobs.find_one({"_id": ObjectId(job_id)})
+            if JOB_CACHE_ENABLED:
+                job_document = get_job_document(job_id)
+            else:
+                job_document = mongo_instance.db.jobs.find_one({"_id": ObjectId(job_id)})
             application_document["jobDetails"] = job_document
         
         return application_document
     except Exception as e:
         return f"An error occurred: {e}"
-    
\ No newline at end of file
+
+
+# Only the fields the job application pipeline needs
+APPLICATION_DETAILS_PROJECTION = {
+    "resumeURL": 1,
+    "userId": 1,
+    "jobId": 1,
+    "jobDetails._id": 1,
+    "jobDetails.description": 1,
+}
+
+
+def _application_details_pipeline(match):
+    """
+    Aggregation that fetches the projected application together with its job
+    in a single round trip instead of two sequential find_one calls.
+    """
+    return [
+        {"$match": match},
+        {"$lookup": {"from": "jobs", "localField": "jobId", "foreignField": "_id", "as": "jobDetails"}},
+        {"$unwind": {"path": "$jobDetails", "preserveNullAndEmptyArrays": True}},
+        {"$project": APPLICATION_DETAILS_PROJECTION},
+    ]
+
+
+def fetch_application_details(id):
+    """
+    Fetch an application with only `resumeURL`, `userId`, `jobId` and
+    `jobDetails` (`_id` and `description`).
+
+    With the job cache enabled (the default) only the application is read
+    from Mongo and the job comes from the cache; otherwise both are read in one
+    aggregation, as `fetch_application_details_async` always does.
+    """
+    mongo_instance = get_app().config['MONGO']
+
+    try:
+        object_id = ObjectId(id)
+
+        if JOB_CACHE_ENABLED:
+            application_document = mongo_instance.db.applications.find_one(
+                {"_id": object_id}, {"resumeURL": 1, "userId": 1, "jobId": 1}
+            )
+            if not application_document:
+                return "No data found for the given ID"
+
+            job_document = get_job_document(application_document["jobId"])
+            if job_document is not None:
+                application_document["jobDetails"] = {
+                    "_id": job_document["_id"],
+                    "description": job_document.get("description"),
+                }
+            return application_document
+
+        documents = list(mongo_instance.db.applications.aggregate(
+            _application_details_pipeline({"_id": object_id})
+        ))
+
+        if not documents:
+            return "No data found for the given ID"
+
+        return documents[0]
+    except Exception as e:
+        return f"An error occurred: {e}"
+
+
+async def fetch_application_details_async(id):
+    """
+    Async `fetch_application_details`, always a single aggregation: the job
+    cache is shared with the worker threads and is not used from the event loop.
+    """
+    try:
+        object_id = ObjectId(id)
+
+        cursor = await get_async_db().applications.aggregate(_application_details_pipeline({"_id": object_id}))
+        documents = await cursor.to_list(length=1)
+
+        if not documents:
+            return "No data found for the given ID"
+
+        return documents[0]
+    except Exception as e:
+        return f"An error occurred: {e}"
+
+
+def fetch_application_details_batch(ids):
+    """
+    Fetch many applications in one aggregation, e.g. to reprocess a backlog.
+    Returns a dict mapping each found application ID (as a string) to the same
+    projected document that `fetch_application_details` returns; IDs with no
+    application are left out.
+
+    :raises bson.errors.InvalidId: If an ID is not a valid ObjectId.
+    """
+    mongo_instance = get_app().config['MONGO']
+    object_ids = [ObjectId(id) for id in ids]
+
+    documents = mongo_instance.db.applications.aggregate(
+        _application_details_pipeline({"_id": {"$in": object_ids}})
+    )
+
+    return {str(document["_id"]): document for document in documents}
@@ -0,0 +1,315 @@
+import asyncio
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from app import get_app
+from app.utils.pipeline import Stage, run_pipeline, run_pipeline_async
+from app.utils.async_mongo import get_async_db
+from app.service.resume import summarize_resume, ats_scanner, summarize_resume_async, ats_scanner_async
+from app.service.ocrBackends import extract_pdf_text
+from app.service.resumeText import compact_resume_text
+from app.service.questionsGenerator import (
+    generate_interview_questions, process_questions,
+    generate_interview_questions_async,
+)
+from app.service.jobDigest import JOB_DIGEST_ENABLED, get_job_digest
+from app.utils.client_pool import SERVICE_ACCOUNT_JSON
+from app.utils.bulk_writer import BULK_WRITES_ENABLED, get_bulk_writer
+from app.service.processingLedger import LEDGER_ENABLED, load_entry, record_stage, mark_completed, submit_completed
+from app.utils.metrics import RESUME_TOKENS
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+GCS_DESTINATION_URI = "gs://bucket_nextgen-hr/vision_output/"
+
+_interview_index_created = False
+_async_interview_index_created = False
+
+
+def extract_resume_text(results):
+    """
+    Extract the resume text from the PDF stored in GCS, from its text layer
+    when it has one, see `extract_pdf_text`. Returns {"text": ..., "backend": ...}.
+    """
+    result = extract_pdf_text(SERVICE_ACCOUNT_JSON, results['resume_url'], GCS_DESTINATION_URI)
+    return {"text": result.text, "backend": result.backend}
+
+
+def resume_text(results):
+    # Ledger entries written before OCR backends existed hold the bare text
+    ocr = results['ocr']
+    return ocr if isinstance(ocr, str) else ocr['text']
+
+
+def compact_resume(results):
+    """
+    Normalize and deduplicate the extracted text and fit it to the resume
+    token budget, see `compact_resume_text`. Returns {"text": ..., "tokens": ...,
+    "tokens_saved": ..., "truncated": ...}.
+    """
+    compacted = compact_resume_text(resume_text(results))
+    tokens_saved = compacted.original_tokens - compacted.tokens
+    RESUME_TOKENS.inc(compacted.original_tokens, kind="original")
+    RESUME_TOKENS.inc(compacted.tokens, kind="compacted")
+    logger.info("Compacted resume text from %s to %s tokens (%s saved%s)", compacted.original_tokens,
+                compacted.tokens, tokens_saved, ", truncated" if compacted.truncated else "")
+    return {"text": compacted.text, "tokens": compacted.tokens, "tokens_saved": tokens_saved,
+            "truncated": compacted.truncated}
+
+
+def summarize_resume_text(results):
+    """Convert the compacted resume text into the standardized summary."""
+    return summarize_resume(results['compact']['text'])
+
+
+def digest_job_description(results):
+    """
+    Condensed requirement set for the job, computed once per job description.
+    Falls back to the raw description when digests are disabled.
+    """
+    if not JOB_DIGEST_ENABLED:
+        return results['job_description']
+    return get_job_digest(results['job_id'], results['job_description'])
+
+
+def scan_resume(results):
+    """Score the summary against the job description, see `ats_scanner`."""
+    return ats_scanner(results['summary'], results['job_digest'])
+
+
+def generate_questions(results):
+    """Generate and format the interview questions, re-requesting a malformed list."""
+    questions = generate_interview_questions(results['summary'], results['job_digest'])
+    return process_questions(questions)
+
+
+# One interview per application, even if two deliveries race
+INTERVIEW_INDEX_OPTIONS = {"unique": True, "partialFilterExpression": {"applicationId": {"$exists": True}}}
+
+
+def _ensure_interview_index(collection):
+    global _interview_index_created
+    if not _interview_index_created:
+        collection.create_index("applicationId", **INTERVIEW_INDEX_OPTIONS)
+        _interview_index_created = True
+
+
+def interview_document(results):
+    """
+    The interview document written for an application, see `persist_interview`.
+    It shares the application's ObjectId, so every delivery of the application
+    names the same interview whichever of them inserted it.
+    """
+    document = results['document']
+    return {
+        "_id": ObjectId(document['_id']),
+        "applicationId": document['_id'],
+        "jobId": document['jobDetails']['_id'],
+        "userId": document['userId'],
+        "questions": results['questions'],
+        "atsScore": results['ats']['score'],
+        "atsReport": results['ats']['report'],
+    }
+
+
+def persist_interview(results):
+    """
+    Write the interview document, once per application.
+
+    The insert is an upsert keyed by `applicationId`, so a redelivered message
+    never creates a second interview, and the interview ID is derived from
+    the application, so it is the stored one. Returns {"interviewId": ..., "pending": ...};
+    with bulk writes enabled the write is queued on the interviews BulkWriter
+    and "pending" is the Future that resolves once it is written, otherwise it
+    is written here and "pending" is None.
+    """
+    question_document = interview_document(results)
+
+    collection = get_app().config['MONGO'].db.interviews
+    _ensure_interview_index(collection)
+
+    interview_filter = {"applicationId": question_document['applicationId']}
+    interview_update = {"$setOnInsert": question_document}
+    if BULK_WRITES_ENABLED:
+        pending = get_bulk_writer(collection).submit(UpdateOne(interview_filter, interview_update, upsert=True))
+    else:
+        collection.update_one(interview_filter, interview_update, upsert=True)
+        pending = None
+
+    return {"interviewId": question_document["_id"], "pending": pending}
+
+
+# OCR -> compact -> summary -> {ATS, questions} -> persist, with the job digest computed alongside OCR
+JOB_APPLICATION_STAGES = [
+    Stage("ocr", extract_resume_text, ()),
+    Stage("job_digest", digest_job_description, ()),
+    Stage("compact", compact_resume, ("ocr",)),
+    Stage("summary", summarize_resume_text, ("compact",)),
+    Stage("ats", scan_resume, ("summary", "job_digest")),
+    Stage("questions", generate_questions, ("summary", "job_digest")),
+    Stage("persist", persist_interview, ("ats", "questions")),
+]
+
+# Stages whose outputs are kept in the ledger so a retry does not pay for them again
+# (the job digest has its own cache, compaction is cheap to redo and persist is idempotent)
+LEDGER_STAGES = ("ocr", "summary", "ats", "questions")
+LEDGER_KIND = "job_application"
+
+
+def load_application_entry(application_id):
+    """
+    Return the ledger entry for an application, or None if it has none or the
+    ledger is disabled. The consumer loads it once per message and passes it
+    to `is_application_processed` and `run_job_application_pipeline`.
+    """
+    if not LEDGER_ENABLED:
+        return None
+    return load_entry(LEDGER_KIND, application_id)
+
+
+def is_application_processed(entry):
+    """True if the ledger entry shows the application was already fully processed."""
+    return bool(entry) and entry.get("status") == "completed"
+
+
+def run_job_application_pipeline(document, entry=None):
+    """
+    Run the job application stages for a fetched application document.
+
+    Stages already recorded in the ledger `entry` (see
+    `load_application_entry`) by an earlier delivery are not run again; the
+    application is marked completed in the ledger once its interview document
+    is written. Returns a tuple of (results, timings), see `run_pipeline`.
+    """
+    application_id = str(document['_id'])
+    context = {
+        "document": document,
+        "resume_url": document['resumeURL'],
+        "job_id": document['jobDetails']['_id'],
+        "job_description": document['jobDetails']['description'],
+    }
+
+    completed = None
+    on_stage_complete = None
+    if LEDGER_ENABLED:
+        completed = (entry or {}).get("stages")
+        if completed:
+            logger.info("Resuming application %s after stages: %s", application_id, ", ".join(completed))
+
+        def on_stage_complete(name, output):
+            if name in LEDGER_STAGES:
+                record_stage(LEDGER_KIND, application_id, name, output)
+
+    results, timings = run_pipeline(JOB_APPLICATION_STAGES, context,
+                                    completed=completed, on_stage_complete=on_stage_complete)
+
+    if LEDGER_ENABLED:
+        ledger_result = {"interviewId": results['persist']['interviewId']}
+        pending = results['persist']['pending']
+        if pending is None:
+            mark_completed(LEDGER_KIND, application_id, ledger_result)
+        else:
+            # Runs on the interviews writer's flush thread, so the ledger write is queued rather than made here
+            def on_written(future):
+                if future.exception() is None:
+                    submit_completed(LEDGER_KIND, application_id, ledger_result)
+
+            pending.add_done_callback(on_written)
+
+    return results, timings
+
+
+async def extract_resume_text_async(results):
+    """Async `extract_resume_text`; the GCS and Vision clients are blocking, so it runs in a thread."""
+    return await asyncio.to_thread(extract_resume_text, results)
+
+
+async def digest_job_description_async(results):
+    """Async `digest_job_description`; the digest cache is shared with the threaded consumer."""
+    return await asyncio.to_thread(digest_job_description, results)
+
+
+async def compact_resume_async(results):
+    return compact_resume(results)
+
+
+async def summarize_resume_text_async(results):
+    return await summarize_resume_async(results['compact']['text'])
+
+
+async def scan_resume_async(results):
+    return await ats_scanner_async(results['summary'], results['job_digest'])
+
+
+async def generate_questions_async(results):
+    """Async `generate_questions`, using the validating, retrying call directly."""
+    questions = await generate_interview_questions_async(results['summary'], results['job_digest'])
+    return process_questions(questions)
+
+
+async def persist_interview_async(results):
+    """
+    Async `persist_interview`. The upsert is awaited directly rather than
+    queued on a BulkWriter, so "pending" is always None.
+    """
+    global _async_interview_index_created
+    question_document = interview_document(results)
+
+    collection = get_async_db().interviews
+    if not _async_interview_index_created:
+        await collection.create_index("applicationId", **INTERVIEW_INDEX_OPTIONS)
+        _async_interview_index_created = True
+
+    await collection.update_one({"applicationId": question_document['applicationId']},
+                                {"$setOnInsert": question_document}, upsert=True)
+
+    return {"interviewId": question_document["_id"], "pending": None}
+
+
+JOB_APPLICATION_ASYNC_STAGES = [
+    Stage("ocr", extract_resume_text_async, ()),
+    Stage("job_digest", digest_job_description_async, ()),
+    Stage("compact", compact_resume_async, ("ocr",)),
+    Stage("summary", summarize_resume_text_async, ("compact",)),
+    Stage("ats", scan_resume_async, ("summary", "job_digest")),
+    Stage("questions", generate_questions_async, ("summary", "job_digest")),
+    Stage("persist", persist_interview_async, ("ats", "questions")),
+]
+
+
+async def load_application_entry_async(application_id):
+    return await asyncio.to_thread(load_application_entry, application_id)
+
+
+async def run_job_application_pipeline_async(document, entry=None):
+    """
+    Async `run_job_application_pipeline`. Ledger writes go through the same
+    (blocking) ledger functions in a worker thread.
+    """
+    application_id = str(document['_id'])
+    context = {
+        "document": document,
+        "resume_url": document['resumeURL'],
+        "job_id": document['jobDetails']['_id'],
+        "job_description": document['jobDetails']['description'],
+    }
+
+    completed = None
+    on_stage_complete = None
+    if LEDGER_ENABLED:
+        completed = (entry or {}).get("stages")
+        if completed:
+            logger.info("Resuming application %s after stages: %s", application_id, ", ".join(completed))
+
+        async def on_stage_complete(name, output):
+            if name in LEDGER_STAGES:
+                await asyncio.to_thread(record_stage, LEDGER_KIND, application_id, name, output)
+
+    results, timings = await run_pipeline_async(JOB_APPLICATION_ASYNC_STAGES, context,
+                                                completed=completed, on_stage_complete=on_stage_complete)
+
+    if LEDGER_ENABLED:
+        await asyncio.to_thread(mark_completed, LEDGER_KIND, application_id,
+                                {"interviewId": results['persist']['interviewId']})
+
+    return results, timings
@@ -0,0 +1,246 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.log import get_logger
+from app.utils.metrics import span, propagate_trace
+from app.service.interviewProcess import (
+    TRANSCRIPTION_MODEL, get_audio_blob, download_audio_to_buffer, speech_to_text, evaluate_question_answer,
+    evaluate_interview_batch, speech_to_text_async, evaluate_question_answer_async, evaluate_interview_batch_async,
+)
+
+logger = get_logger(__name__)
+
+# Maximum number of questions graded at the same time for a single interview
+EVALUATION_CONCURRENCY = int(os.getenv("EVALUATION_CONCURRENCY", "4"))
+
+# "per_question": one evaluation call per answer
+# "batch": one call grading every answer, falling back to per_question on malformed output
+EVALUATION_MODES = ("per_question", "batch")
+EVALUATION_MODE = os.getenv("EVALUATION_MODE", "per_question")
+
+
+class EvaluationError(Exception):
+    """
+    Raised when some questions of an interview could not be evaluated, once
+    every other question is done. `results` holds, in question order, the
+    result of each question that succeeded and, for the ones that failed,
+    whatever was computed before the failure (the answer fields when only the
+    grading failed, else None). `errors` holds the exceptions.
+    """
+
+    def __init__(self, results, errors):
+        super().__init__(f"{len(errors)} of {len(results)} questions failed: {errors[0]!r}")
+        self.results = results
+        self.errors = errors
+
+
+def _collect(outcomes, partial=None):
+    """
+    Return the per-question `outcomes`, or raise EvaluationError (chained to
+    the first failure) if any of them is an exception. `partial` gives the
+    fields kept for the failed question at an index.
+    """
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+            raise outcome  # cancellation, not a failed question
+    errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+    if errors:
+        results = [
+            (partial(index) if partial else None) if isinstance(outcome, Exception) else outcome
+            for index, outcome in enumerate(outcomes)
+        ]
+        raise EvaluationError(results, errors) from errors[0]
+    return list(outcomes)
+
+
+def _map_all(executor, func, items):
+    """Like `executor.map`, but waits for every item and returns exceptions in place of failed results."""
+    futures = [executor.submit(propagate_trace(func), item) for item in items]
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result())
+        except Exception as e:
+            outcomes.append(e)
+    return outcomes
+
+
+def _answers(transcript_outcomes):
+    """The answer fields of every question from `transcribe_answer` outcomes, see `_collect`."""
+    return _collect([
+        outcome if isinstance(outcome, BaseException) else {"answer": outcome[0], "answerTranscript": outcome[1]}
+        for outcome in transcript_outcomes
+    ])
+
+
+def _graded(answers, evaluation_outcomes):
+    """Combine the answer fields with per-question evaluation outcomes, see `_collect`."""
+    return _collect([
+        outcome if isinstance(outcome, BaseException) else dict(answer, evaluation=outcome)
+        for answer, outcome in zip(answers, evaluation_outcomes)
+    ], partial=lambda index: answers[index])
+
+
+def transcript_source(audio_answer_url, blob):
+    """Identify the exact audio object and model a transcript was produced from."""
+    return {
+        "audioUrl": audio_answer_url,
+        "generation": str(blob.generation),
+        "model": TRANSCRIPTION_MODEL,
+    }
+
+
+def transcribe_answer(question):
+    """
+    Return (answer_text, source) for a question's recorded answer.
+
+    A transcript stored on the question is reused when it was produced from
+    the same audio object generation with the same model, so re-grading an
+    interview skips the download and transcription.
+    """
+    audio_answer_url = question['answerAudioUrl']
+    blob = get_audio_blob(audio_answer_url)
+    source = transcript_source(audio_answer_url, blob)
+
+    if question.get('answer') is not None and question.get('answerTranscript') == source:
+        return question['answer'], source
+
+    # Stream the answer through memory instead of leaving a copy in /tmp
+    with span("download"):
+        audio = download_audio_to_buffer(audio_answer_url, blob=blob)
+    with audio, span("transcription"):
+        answer_text = speech_to_text(audio, file_name=audio_answer_url)
+
+    return answer_text, source
+
+
+def evaluate_question(question):
+    """
+    Run the download -> transcription -> evaluation pipeline for one question.
+    Returns the fields to store on the question document.
+    """
+    answer_text, source = transcribe_answer(question)
+    with span("evaluation"):
+        evaluation = evaluate_question_answer(question['question'], answer_text)
+
+    return {
+        "answer": answer_text,
+        "answerTranscript": source,
+        "evaluation": evaluation,
+    }
+
+
+def evaluate_pair(qa_pair):
+    """Grade one (question_text, answer_text) pair."""
+    with span("evaluation"):
+        return evaluate_question_answer(*qa_pair)
+
+
+def evaluate_interview_questions(questions, max_workers=EVALUATION_CONCURRENCY, mode=EVALUATION_MODE):
+    """
+    Evaluate every question of an interview concurrently.
+
+    Each question's pipeline is independent, so they are fanned out over a
+    bounded thread pool. In "batch" mode the answers are transcribed
+    concurrently and then graded together in one call. The results are
+    returned in the same order as `questions`, so callers can zip them back
+    onto the question documents.
+
+    :raises EvaluationError: If any question failed; the others still run
+        to completion and their results are kept on the exception.
+    """
+    if mode not in EVALUATION_MODES:
+        raise ValueError(f"Unknown evaluation mode: {mode}")
+    if not questions:
+        return []
+
+    workers = max(1, min(max_workers, len(questions)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="evaluation") as executor:
+        if mode == "per_question":
+            return _collect(_map_all(executor, evaluate_question, questions))
+
+        answers = _answers(_map_all(executor, transcribe_answer, questions))
+        qa_pairs = [(question['question'], answer['answer']) for question, answer in zip(questions, answers)]
+
+        try:
+            with span("evaluation_batch"):
+                evaluations = evaluate_interview_batch(qa_pairs)
+        except ValueError as e:
+            logger.warning("Batch evaluation output was malformed (%s), evaluating questions one by one", e)
+            evaluations = _map_all(executor, evaluate_pair, qa_pairs)
+
+    return _graded(answers, evaluations)
+
+
+async def transcribe_answer_async(question):
+    """
+    Async `transcribe_answer`. The GCS client is blocking, so the metadata
+    lookup and download run in worker threads; the transcription is awaited.
+    """
+    audio_answer_url = question['answerAudioUrl']
+    blob = await asyncio.to_thread(get_audio_blob, audio_answer_url)
+    source = transcript_source(audio_answer_url, blob)
+
+    if question.get('answer') is not None and question.get('answerTranscript') == source:
+        return question['answer'], source
+
+    with span("download"):
+        audio = await asyncio.to_thread(download_audio_to_buffer, audio_answer_url, blob=blob)
+    with audio, span("transcription"):
+        answer_text = await speech_to_text_async(audio, file_name=audio_answer_url)
+
+    return answer_text, source
+
+
+async def evaluate_question_async(question):
+    """Async `evaluate_question`."""
+    answer_text, source = await transcribe_answer_async(question)
+    with span("evaluation"):
+        evaluation = await evaluate_question_answer_async(question['question'], answer_text)
+
+    return {
+        "answer": answer_text,
+        "answerTranscript": source,
+        "evaluation": evaluation,
+    }
+
+
+async def evaluate_pair_async(qa_pair):
+    with span("evaluation"):
+        return await evaluate_question_answer_async(*qa_pair)
+
+
+async def evaluate_interview_questions_async(questions, max_concurrency=EVALUATION_CONCURRENCY,
+                                             mode=EVALUATION_MODE):
+    """
+    Async `evaluate_interview_questions`: the questions run as concurrent
+    tasks, at most `max_concurrency` at a time.
+    """
+    if mode not in EVALUATION_MODES:
+        raise ValueError(f"Unknown evaluation mode: {mode}")
+    if not questions:
+        return []
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def bounded(func, item):
+        async with semaphore:
+            return await func(item)
+
+    if mode == "per_question":
+        return _collect(await asyncio.gather(
+            *(bounded(evaluate_question_async, question) for question in questions), return_exceptions=True))
+
+    answers = _answers(await asyncio.gather(
+        *(bounded(transcribe_answer_async, question) for question in questions), return_exceptions=True))
+    qa_pairs = [(question['question'], answer['answer']) for question, answer in zip(questions, answers)]
+
+    try:
+        with span("evaluation_batch"):
+            evaluations = await evaluate_interview_batch_async(qa_pairs)
+    except ValueError as e:
+        logger.warning("Batch evaluation output was malformed (%s), evaluating questions one by one", e)
+        evaluations = await asyncio.gather(
+            *(bounded(evaluate_pair_async, qa_pair) for qa_pair in qa_pairs), return_exceptions=True)
+
+    return _graded(answers, evaluations)
@@ -1,8 +1,9 @@
-from app import app
+from app import get_app
 from bson.objectid import ObjectId
+from app.utils.async_mongo import get_async_db
 
 def fetch_interview_data(id):
-    mongo_instance = app.config['MONGO']
+    mongo_instance = get_app().config['MONGO']
 
     try:
         # Convert the string ID to ObjectId
@@ -18,4 +19,17 @@ def fetch_interview_data(id):
     
     except Exception as e:
         return f"An error occurred: {e}"
-    
\ No newline at end of file
+
+
+async def fetch_interview_data_async(id):
+    """Async `fetch_interview_data`."""
+    try:
+        interview_document = await get_async_db().interviews.find_one({"_id": ObjectId(id)})
+
+        if not interview_document:
+            return "No data found for the given ID"
+
+        return interview_document
+
+    except Exception as e:
+        return f"An error occurred: {e}"
@@ -1,69 +1,126 @@
 import os
-import google.auth
-from google.cloud import storage
-from groq import Groq
-
-from dotenv import load_dotenv
-# API Key
-API_KEY = os.getenv('GROQ_API_KEY')
-# Load environment variables
-load_dotenv()
-client = Groq(api_key=API_KEY)
-
-SERVICE_ACCOUNT_PATH = ".././env/nextgen-hr-8ce4fa070811.json"
-
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = SERVICE_ACCOUNT_PATH# ✅ Verify authentication
-
-try:
-    credentials, project = google.auth.default()
-    print(f"✅ Google Cloud authenticated for project: {project}")
-except google.auth.exceptions.DefaultCredentialsError:
-    print("❌ Error: Google Cloud authentication failed.")
-    print("👉 Make sure the service account key path is correct:")
-    print(f"   {SERVICE_ACCOUNT_PATH}")
-    exit(1)
+import asyncio
+import tempfile
+from app.utils.gcs import parse_gcs_path
+from app.utils.client_pool import SERVICE_ACCOUNT_JSON, get_groq_client, get_async_groq_client, get_storage_client
+from app.utils.rate_limiter import get_rate_limiter
+from app.utils.structured_output import (
+    StructuredOutputError, structured_chat_completion, structured_chat_completion_async, json_fields,
+    json_object_closed, require_score,
+)
+
+# Audio answers are read with the same service account as the resumes
+SERVICE_ACCOUNT_PATH = SERVICE_ACCOUNT_JSON
 
 GCS_FILE_PATH = "gs://bucket_nextgen-hr/1743803229843_mern_answer.m4a"
 
-# Extract bucket name and file path from GCS path
-def parse_gcs_path(gcs_path):
-    if not gcs_path.startswith("gs://"):
-        raise ValueError("Invalid GCS path. It must start with 'gs://'")
+TRANSCRIPTION_MODEL = "whisper-large-v3-turbo"
 
-    parts = gcs_path[5:].split("/", 1)
-    if len(parts) < 2:
-        raise ValueError("Invalid GCS path. It must contain a bucket and file name.")
+# Answers up to this size are transcribed straight from memory
+AUDIO_SPOOL_MAX_BYTES = int(os.getenv("AUDIO_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
 
-    return parts[0], parts[1]  # (bucket_name, file_name)
+# Completion budgets for grading; a score object is only a handful of tokens
+SCORE_MAX_TOKENS = 48
+BATCH_SCORE_TOKENS_PER_ANSWER = 8
 
-# Initialize Google Cloud Storage Client
-client_gcs = storage.Client()
+def get_audio_blob(gcs_path):
+    """
+    Fetch the metadata (generation, size, ...) of an answer's audio object.
 
-def download_audio_from_gcs(gcs_path):
-    """Download the audio file from Google Cloud Storage."""
+    :raises FileNotFoundError: If the object does not exist.
+    """
     bucket_name, file_name = parse_gcs_path(gcs_path)
-    bucket = client_gcs.bucket(bucket_name)
-    blob = bucket.blob(file_name)
-    print("🔄 Downloading audio file from GCS...")
-    temp_audio_path = f"/tmp/{file_name}"  # Temporary local file pathj
-    blob.download_to_filename(temp_audio_path)
-    print(f"✅ Downloaded to: {temp_audio_path}")
-
-    return temp_audio_path
-
-
-def speech_to_text(audio_path):
-    """Send audio file to Groq API for transcription."""
-    with open(audio_path, "rb") as file:
-        transcription = client.audio.transcriptions.create(
-            file=(audio_path, file.read()),
-            model="whisper-large-v3-turbo",
+    blob = get_storage_client(SERVICE_ACCOUNT_PATH).bucket(bucket_name).get_blob(file_name)
+    if blob is None:
+        raise FileNotFoundError(f"Audio file not found: {gcs_path}")
+    return blob
+
+
+def download_audio_to_buffer(gcs_path, max_size=AUDIO_SPOOL_MAX_BYTES, blob=None):
+    """
+    Download the audio file from Google Cloud Storage into a spooled buffer.
+
+    The buffer stays in memory up to `max_size` bytes and spills to an
+    anonymous temporary file above that, which is removed when the buffer is
+    closed. The caller owns the buffer and must close it. Pass `blob` to
+    download an object whose metadata was already fetched.
+    """
+    if blob is None:
+        bucket_name, file_name = parse_gcs_path(gcs_path)
+        blob = get_storage_client(SERVICE_ACCOUNT_PATH).bucket(bucket_name).blob(file_name)
+
+    buffer = tempfile.SpooledTemporaryFile(max_size=max_size)
+    try:
+        blob.download_to_file(buffer)
+    except Exception:
+        buffer.close()
+        raise
+    buffer.seek(0)
+
+    return buffer
+
+
+def speech_to_text(audio, file_name=None):
+    """
+    Send audio to Groq API for transcription.
+
+    :param audio: Path to a local audio file, or a readable binary file object
+        such as the buffer returned by `download_audio_to_buffer`.
+    :param file_name: Name sent with a file object; its extension tells the
+        API which audio format it is. Defaults to the path for local files.
+    """
+    if hasattr(audio, "read"):
+        return _transcribe((os.path.basename(file_name or "answer.m4a"), audio))
+
+    with open(audio, "rb") as file:
+        return _transcribe((audio, file.read()))
+
+
+def _transcribe(file):
+    def request():
+        # Rewind file objects so a retried upload sends the whole recording again
+        if hasattr(file[1], "seek"):
+            file[1].seek(0)
+        return get_groq_client().audio.transcriptions.with_raw_response.create(
+            file=file,
+            model=TRANSCRIPTION_MODEL,
             response_format="json",
             temperature=0.0
         )
+
+    transcription = get_rate_limiter(TRANSCRIPTION_MODEL).call(request)
     return transcription.text
 
-system_prompt = """
+
+async def speech_to_text_async(audio, file_name=None):
+    """Async `speech_to_text`; a local file is read in a worker thread."""
+    if hasattr(audio, "read"):
+        return await _transcribe_async((os.path.basename(file_name or "answer.m4a"), audio))
+
+    data = await asyncio.to_thread(_read_file, audio)
+    return await _transcribe_async((audio, data))
+
+
+def _read_file(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+async def _transcribe_async(file):
+    async def request():
+        if hasattr(file[1], "seek"):
+            file[1].seek(0)
+        return await get_async_groq_client().audio.transcriptions.with_raw_response.create(
+            file=file,
+            model=TRANSCRIPTION_MODEL,
+            response_format="json",
+            temperature=0.0
+        )
+
+    transcription = await get_rate_limiter(TRANSCRIPTION_MODEL).call_async(request)
+    return transcription.text
+
+evaluation_rubric = """
     You are an expert evaluator tasked with assessing candidate answers to a wide range of questions. Your evaluation should consider the following criteria and provide detailed feedback along with a final score out of 100.
     Evaluate in a manner that is consistent and consider the candidate to be intermediate.. so evaluate accordingly.
     Evaluation Criteria:
@@ -85,11 +142,19 @@ system_prompt = """
     - For troubleshooting or problem-solving questions, does the candidate present a clear, structured, and logical approach?
 
     If any of these criteria are not applicable to the question (for example, Practical Application or Problem-Solving Ability for non-technical or non-problem scenarios), omit that criterion and proportionally redistribute its weight among the applicable criteria so that the total possible score remains 100.
+    """
 
-    IMPORTANT: Your output must be only cumulative final score out of 100 with no headings, commentary, or additional text.
+system_prompt = evaluation_rubric + """
+    IMPORTANT: Your output must be only a JSON object with the cumulative final score out of 100 as an integer (for example: {"score": 72}), with no headings, commentary, or additional text.
     """
 
-def evaluate_question_answer(question_text, answer_text, system_prompt=system_prompt):
+batch_system_prompt = evaluation_rubric + """
+    You will receive several numbered question and answer pairs from the same interview. Evaluate each pair independently using the criteria above.
+
+    IMPORTANT: Your output must be only a JSON object whose "scores" key holds an array with the cumulative final score out of 100 of every pair as integers, in the same order as the pairs (for example: {"scores": [72, 45, 90]}), with no headings, commentary, or additional text.
+    """
+
+def evaluation_messages(question_text, answer_text, system_prompt=system_prompt):
     # System message with provided system prompt
     system_message = {
         "role": "system",
@@ -110,37 +175,121 @@ def evaluate_question_answer(question_text, answer_text, system_prompt=system_pr
         "content": user_prompt
     }
 
-    # Send the request to the API
-    stream = client.chat.completions.create(
-        messages=[system_message, user_message],
-        model="llama-3.3-70b-versatile",
-        temperature=0.5,
-        max_completion_tokens=1024,
-        top_p=1,
-        stop=None,
-        stream=True,
+    return [system_message, user_message]
+
+
+# Stream score responses and stop reading as soon as the score object is complete
+SCORE_REQUEST = {"json_mode": False, "stop_when": json_object_closed}
+
+parse_score = json_fields(lambda fields: require_score(fields.get("score")))
+
+
+def evaluate_question_answer(question_text, answer_text, system_prompt=system_prompt):
+    """Grade one answer and return its integer score out of 100."""
+    # Send the request to the API, re-requesting malformed scores
+    return structured_chat_completion(
+        evaluation_messages(question_text, answer_text, system_prompt),
+        parse_score,
+        max_completion_tokens=SCORE_MAX_TOKENS,
+        **SCORE_REQUEST,
+    )
+
+
+async def evaluate_question_answer_async(question_text, answer_text, system_prompt=system_prompt):
+    """Async `evaluate_question_answer`."""
+    return await structured_chat_completion_async(
+        evaluation_messages(question_text, answer_text, system_prompt),
+        parse_score,
+        max_completion_tokens=SCORE_MAX_TOKENS,
+        **SCORE_REQUEST,
+    )
+
+
+def parse_batch_scores(fields, expected_count):
+    """
+    Validate the JSON object returned by `evaluate_interview_batch`.
+
+    :raises StructuredOutputError: If "scores" is not an array of
+        `expected_count` integer scores between 0 and 100.
+    """
+    scores = fields.get("scores")
+    if not isinstance(scores, list) or len(scores) != expected_count:
+        raise StructuredOutputError(f"Expected {expected_count} scores, got: {scores!r}")
+    return [require_score(score) for score in scores]
+
+
+def batch_evaluation_messages(qa_pairs, system_prompt=batch_system_prompt):
+    system_message = {
+        "role": "system",
+        "content": system_prompt
+    }
+
+    pairs_text = "\n\n".join(
+        f"Pair {index}:\nQuestion:\n{question_text}\n\nCandidate's Answer:\n{answer_text}"
+        for index, (question_text, answer_text) in enumerate(qa_pairs, start=1)
     )
+    user_message = {
+        "role": "user",
+        "content": f"Please evaluate the following {len(qa_pairs)} candidate answers based on the criteria provided.\n\n{pairs_text}"
+    }
 
-    # Collecting the evaluation result from the stream
-    evaluation = ""
-    for chunk in stream:
-        content = chunk.choices[0].delta.content
-        if content is not None:
-            evaluation += content
+    return [system_message, user_message]
 
-    return evaluation
 
-def main():
+def evaluate_interview_batch(qa_pairs, system_prompt=batch_system_prompt):
+    """
+    Grade all (question, answer) pairs of an interview in a single call, so the
+    rubric is sent once instead of once per question.
+
+    :param qa_pairs: List of (question_text, answer_text) tuples.
+    :return: List of integer scores in the same order as `qa_pairs`.
+    :raises StructuredOutputError: If the model output stays malformed after retries.
+    """
+    return structured_chat_completion(
+        batch_evaluation_messages(qa_pairs, system_prompt),
+        json_fields(lambda fields: parse_batch_scores(fields, len(qa_pairs))),
+        max_completion_tokens=SCORE_MAX_TOKENS + BATCH_SCORE_TOKENS_PER_ANSWER * len(qa_pairs),
+        **SCORE_REQUEST,
+    )
 
 
+async def evaluate_interview_batch_async(qa_pairs, system_prompt=batch_system_prompt):
+    """Async `evaluate_interview_batch`."""
+    return await structured_chat_completion_async(
+        batch_evaluation_messages(qa_pairs, system_prompt),
+        json_fields(lambda fields: parse_batch_scores(fields, len(qa_pairs))),
+        max_completion_tokens=SCORE_MAX_TOKENS + BATCH_SCORE_TOKENS_PER_ANSWER * len(qa_pairs),
+        **SCORE_REQUEST,
+    )
+
+def check_google_credentials(service_account_json_path=SERVICE_ACCOUNT_PATH):
+    """
+    Verify the service account key can be loaded. Returns its project ID.
+
+    :raises OSError: If the key file cannot be read.
+    :raises ValueError: If it is not a valid service account key.
+    """
+    from google.oauth2 import service_account
 
+    credentials = service_account.Credentials.from_service_account_file(service_account_json_path)
+    return credentials.project_id
+
+
+def main():
+    try:
+        project = check_google_credentials()
+        print(f"✅ Google Cloud authenticated for project: {project}")
+    except (OSError, ValueError):
+        print("❌ Error: Google Cloud authentication failed.")
+        print("👉 Make sure the service account key path is correct:")
+        print(f"   {SERVICE_ACCOUNT_PATH}")
+        exit(1)
 
     # question_text = "How do you handle user authentication in a MERN stack application using JWT (JSON Web Tokens)?"
     question_text = "What is the difference between supervised and unsupervised learning in machine learning, and when would you use each?"
 
-    audio_path = download_audio_from_gcs(GCS_FILE_PATH)
-
-    answer_text = speech_to_text(audio_path)
+    with download_audio_to_buffer(GCS_FILE_PATH) as audio:
+        answer_text = speech_to_text(audio, file_name=GCS_FILE_PATH)
     print(f"Answer: {answer_text}\n")
 
     evaluation = evaluate_question_answer(question_text, answer_text)
@@ -0,0 +1,87 @@
+import copy
+import os
+import time
+import threading
+from bson.objectid import ObjectId
+from pymongo.errors import OperationFailure
+from app import get_app
+from app.utils.log import get_logger
+from app.utils.ttl_cache import TTLCache
+
+logger = get_logger(__name__)
+
+JOB_CACHE_ENABLED = os.getenv("JOB_CACHE_ENABLED", "true").lower() == "true"
+JOB_CACHE_MAX_ENTRIES = int(os.getenv("JOB_CACHE_MAX_ENTRIES", "1000"))
+# Entry lifetime when edits can only be picked up by expiry (no change stream)
+JOB_CACHE_TTL_SECONDS = float(os.getenv("JOB_CACHE_TTL_SECONDS", "300"))
+# Entry lifetime while a change stream invalidates edited jobs immediately
+JOB_CACHE_WATCHED_TTL_SECONDS = float(os.getenv("JOB_CACHE_WATCHED_TTL_SECONDS", "3600"))
+
+job_cache = TTLCache(JOB_CACHE_MAX_ENTRIES, JOB_CACHE_TTL_SECONDS)
+
+_watcher_started = False
+_watcher_lock = threading.Lock()
+
+
+def get_job_document(job_id):
+    """
+    Return the job document for `job_id`, reading Mongo only on a cache miss.
+    The document is a copy, so callers may modify it without changing what
+    other applications for the job get from the cache.
+    """
+    key = str(job_id)
+    job_document = job_cache.get(key)
+    if job_document is None:
+        mongo_instance = get_app().config['MONGO']
+        job_document = mongo_instance.db.jobs.find_one({"_id": ObjectId(job_id)})
+        if job_document is None:
+            return None
+        job_cache.set(key, job_document)
+
+    return copy.deepcopy(job_document)
+
+
+def _watch_jobs():
+    """Invalidate cached jobs as they change, resuming after transient errors."""
+    resume_token = None
+    pipeline = [{"$match": {"operationType": {"$in": ["update", "replace", "delete", "invalidate"]}}}]
+
+    while True:
+        try:
+            collection = get_app().config['MONGO'].db.jobs
+            with collection.watch(pipeline, resume_after=resume_token) as stream:
+                job_cache.ttl = JOB_CACHE_WATCHED_TTL_SECONDS
+                logger.info("Job cache invalidation: watching the jobs collection")
+                for change in stream:
+                    if change["operationType"] == "invalidate":
+                        # The collection was dropped or renamed: the stream is closed for good
+                        # and its token cannot resume it, so start a new stream from now
+                        job_cache.clear()
+                        resume_token = None
+                        logger.info("Job cache change stream invalidated, reopening it")
+                        break
+                    resume_token = stream.resume_token
+                    job_cache.invalidate(str(change["documentKey"]["_id"]))
+        except OperationFailure as e:
+            # Change streams need a replica set; rely on expiry instead
+            job_cache.ttl = JOB_CACHE_TTL_SECONDS
+            job_cache.clear()
+            logger.warning("Job cache invalidation unavailable (%s), using a %ss TTL", e, JOB_CACHE_TTL_SECONDS)
+            return
+        except Exception as e:
+            job_cache.ttl = JOB_CACHE_TTL_SECONDS
+            job_cache.clear()
+            logger.warning("Job cache change stream error: %s. Reconnecting in 5 seconds...", e)
+            time.sleep(5)
+
+
+def start_job_cache_invalidation():
+    """Start the change stream watcher once per process (no-op if the cache is disabled)."""
+    global _watcher_started
+    if not JOB_CACHE_ENABLED:
+        return
+    with _watcher_lock:
+        if _watcher_started:
+            return
+        _watcher_started = True
+    threading.Thread(target=_watch_jobs, name="job-cache-watcher", daemon=True).start()
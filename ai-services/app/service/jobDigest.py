@@ -0,0 +1,146 @@
+import os
+import hashlib
+import threading
+from datetime import datetime, timezone
+from groq import APIError
+from app import get_app
+from app.utils.ttl_cache import TTLCache
+from app.utils.structured_output import StructuredOutputError, structured_chat_completion, json_fields, require_text
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Condensed, structured requirement sets keyed by job and description hash
+JOB_DIGEST_COLLECTION = "job_digests"
+JOB_DIGEST_ENABLED = os.getenv("JOB_DIGEST_ENABLED", "true").lower() == "true"
+
+_digest_cache = TTLCache(
+    int(os.getenv("JOB_DIGEST_CACHE_MAX_ENTRIES", "1000")),
+    float(os.getenv("JOB_DIGEST_CACHE_TTL_SECONDS", "3600")),
+)
+
+# One lock per digest being built, so concurrent applications to a new job
+# wait for the first one instead of each asking the model
+_digest_locks = {}
+_digest_locks_guard = threading.Lock()
+
+digest_prompt = """
+    You are a job description analyst. Condense the provided job description into a compact, structured requirement set that will be used to screen resumes and write interview questions.
+    Keep every concrete requirement (technologies, tools, years of experience, degrees, domain knowledge) and drop marketing text, company descriptions, benefits and application instructions.
+    Do not create or assume requirements that are not in the job description.
+
+    Output only a JSON object with exactly these keys:
+    - "title": the job title as a string.
+    - "seniority": the expected seniority level and years of experience as a short string.
+    - "skills": an array of the required technical skills, tools and frameworks as short strings.
+    - "responsibilities": an array of the key responsibilities as short phrases.
+    - "qualifications": an array of the required education, certifications and experience as short phrases.
+    - "preferred": an array of the preferred (nice to have) qualifications as short phrases.
+    """
+
+DIGEST_LIST_FIELDS = ("skills", "responsibilities", "qualifications", "preferred")
+DIGEST_MAX_TOKENS = 600
+
+
+def description_hash(description):
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+
+def parse_job_digest(fields):
+    """Validate the digest JSON object returned by the model."""
+    digest = {
+        "title": require_text(fields.get("title"), "title"),
+        "seniority": fields.get("seniority") or "",
+    }
+    for field in DIGEST_LIST_FIELDS:
+        values = fields.get(field) or []
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            raise StructuredOutputError(f"'{field}' must be an array of strings")
+        digest[field] = values
+    if not digest["skills"] and not digest["responsibilities"]:
+        raise StructuredOutputError("Digest has neither skills nor responsibilities")
+    return digest
+
+
+def condense_job_description(description, system_prompt=digest_prompt):
+    """Condense a raw job description into a structured requirement set."""
+    system_message = {"role": "system", "content": system_prompt}
+    user_message = {"role": "user", "content": f"Job Description:\n{description}"}
+
+    return structured_chat_completion([system_message, user_message], json_fields(parse_job_digest),
+                                      max_completion_tokens=DIGEST_MAX_TOKENS)
+
+
+def format_job_digest(digest):
+    """Render a digest as the compact text sent to the ATS and question prompts."""
+    lines = [f"Job Title: {digest['title']}"]
+    if digest["seniority"]:
+        lines.append(f"Seniority: {digest['seniority']}")
+    if digest["skills"]:
+        lines.append("Required Skills: " + ", ".join(digest["skills"]))
+    for field, heading in (("responsibilities", "Key Responsibilities"),
+                           ("qualifications", "Qualifications"),
+                           ("preferred", "Preferred Qualifications")):
+        if digest[field]:
+            lines.append(f"{heading}:")
+            lines.extend(f"- {value}" for value in digest[field])
+    return "\n".join(lines)
+
+
+def get_job_digest(job_id, description):
+    """
+    Return the formatted digest for a job, condensing the description only
+    the first time it is seen. Digests are stored per job and description
+    hash, so editing the description produces a fresh digest. A job without
+    a description has nothing to condense and is returned as is, and so is
+    one the model could not condense.
+    """
+    if not description:
+        return description
+
+    key = f"{job_id}:{description_hash(description)}"
+
+    digest_text = _digest_cache.get(key)
+    if digest_text is not None:
+        return digest_text
+
+    with _digest_locks_guard:
+        lock = _digest_locks.setdefault(key, threading.Lock())
+    try:
+        with lock:
+            # Another thread may have built it while this one waited
+            digest_text = _digest_cache.get(key)
+            if digest_text is None:
+                try:
+                    digest_text = _load_or_build_digest(key, job_id, description)
+                except (StructuredOutputError, APIError) as e:
+                    # The digest only saves tokens; the next application tries again
+                    logger.warning("Could not digest the description of job %s, using it as is: %s", job_id, e)
+                    return description
+                _digest_cache.set(key, digest_text)
+    finally:
+        with _digest_locks_guard:
+            if _digest_locks.get(key) is lock:
+                del _digest_locks[key]
+    return digest_text
+
+
+def _load_or_build_digest(key, job_id, description):
+    collection = get_app().config['MONGO'].db[JOB_DIGEST_COLLECTION]
+    stored = collection.find_one({"_id": key}, {"text": 1})
+    if stored:
+        return stored["text"]
+
+    digest = condense_job_description(description)
+    digest_text = format_job_digest(digest)
+    collection.update_one(
+        {"_id": key},
+        {"$setOnInsert": {
+            "jobId": job_id,
+            "digest": digest,
+            "text": digest_text,
+            "createdAt": datetime.now(timezone.utc),
+        }},
+        upsert=True,
+    )
+    return digest_text
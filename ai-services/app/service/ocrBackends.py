@@ -0,0 +1,130 @@
+import io
+import os
+from collections import namedtuple
+from app.utils.gcs import parse_gcs_path
+from app.utils.client_pool import get_storage_client
+from app.service.resume import PAGE_SEPARATOR, async_detect_text_in_pdf
+from app.utils.log import get_logger
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # local extraction is optional, Vision handles everything without it
+    PdfReader = None
+
+logger = get_logger(__name__)
+
+# Backends tried in order until one returns text
+OCR_BACKEND_ORDER = [name.strip() for name in os.getenv("OCR_BACKENDS", "text_layer,vision").split(",") if name.strip()]
+
+# Text-density heuristic for trusting an embedded text layer: scanned PDFs have
+# no text (or a few stray characters) on most pages, and PDFs with broken font
+# encodings extract as mostly symbols
+TEXT_LAYER_MIN_CHARS_PER_PAGE = int(os.getenv("TEXT_LAYER_MIN_CHARS_PER_PAGE", "200"))
+TEXT_LAYER_MIN_PAGE_COVERAGE = float(os.getenv("TEXT_LAYER_MIN_PAGE_COVERAGE", "0.8"))
+TEXT_LAYER_MIN_ALNUM_RATIO = float(os.getenv("TEXT_LAYER_MIN_ALNUM_RATIO", "0.6"))
+
+# Text extracted from a resume, and the name of the backend that produced it
+OcrResult = namedtuple("OcrResult", ["text", "backend"])
+
+
+class PdfSource:
+    """A PDF stored in GCS, downloaded at most once however many backends look at it."""
+
+    def __init__(self, gcs_uri, service_account_json_path, gcs_destination_uri):
+        self.gcs_uri = gcs_uri
+        self.service_account_json_path = service_account_json_path
+        self.gcs_destination_uri = gcs_destination_uri
+        self._data = None
+
+    def read_bytes(self):
+        if self._data is None:
+            bucket_name, file_name = parse_gcs_path(self.gcs_uri)
+            bucket = get_storage_client(self.service_account_json_path).bucket(bucket_name)
+            self._data = bucket.blob(file_name).download_as_bytes()
+        return self._data
+
+
+def extract_text_layer(pdf_bytes):
+    """
+    Return the embedded text of every page of a PDF, or None if the PDF cannot
+    be read locally (pypdf missing, encrypted or malformed file).
+    """
+    if PdfReader is None:
+        return None
+    try:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        if reader.is_encrypted:
+            return None
+        return [page.extract_text() or "" for page in reader.pages]
+    except Exception as e:
+        logger.warning("Local text extraction failed: %s", e)
+        return None
+
+
+def text_layer_is_usable(pages, min_chars_per_page=TEXT_LAYER_MIN_CHARS_PER_PAGE,
+                         min_page_coverage=TEXT_LAYER_MIN_PAGE_COVERAGE, min_alnum_ratio=TEXT_LAYER_MIN_ALNUM_RATIO):
+    """
+    Decide whether an extracted text layer is dense enough to skip OCR.
+
+    :param pages: Text of each page, as returned by `extract_text_layer`.
+    :return: True if enough pages carry at least `min_chars_per_page`
+        non-whitespace characters, and those characters are mostly letters
+        and digits rather than symbols from a broken font mapping.
+    """
+    if not pages:
+        return False
+
+    characters = ["".join(page.split()) for page in pages]
+    dense_pages = sum(1 for text in characters if len(text) >= min_chars_per_page)
+    if dense_pages / len(pages) < min_page_coverage:
+        return False
+
+    all_text = "".join(characters)
+    alnum = sum(1 for char in all_text if char.isalnum())
+    return alnum / len(all_text) >= min_alnum_ratio
+
+
+def text_layer_backend(source):
+    """Local extraction of the PDF's embedded text; None for scanned or image-only PDFs."""
+    pages = extract_text_layer(source.read_bytes())
+    if pages is None or not text_layer_is_usable(pages):
+        return None
+    return PAGE_SEPARATOR.join(page.strip() for page in pages)
+
+
+def vision_backend(source):
+    """Google Vision async OCR, which works for any PDF (see `async_detect_text_in_pdf`)."""
+    return async_detect_text_in_pdf(source.service_account_json_path, source.gcs_uri, source.gcs_destination_uri)
+
+
+OCR_BACKENDS = {
+    "text_layer": text_layer_backend,
+    "vision": vision_backend,
+}
+
+
+def extract_pdf_text(service_account_json_path, gcs_source_uri, gcs_destination_uri, backends=None):
+    """
+    Extract the text of a PDF in GCS with the first backend that can handle it.
+
+    :param backends: Backend names to try in order, defaults to OCR_BACKEND_ORDER.
+    :return: OcrResult(text, backend). If every backend came back empty, the
+        text is empty and the backend is the last one tried.
+    """
+    source = PdfSource(gcs_source_uri, service_account_json_path, gcs_destination_uri)
+    order = backends or OCR_BACKEND_ORDER
+
+    for name in order:
+        try:
+            text = OCR_BACKENDS[name](source)
+        except Exception as e:
+            # Only the last resort's errors are fatal; a failing fast path just falls through
+            if name == order[-1]:
+                raise
+            logger.warning("OCR backend '%s' failed for %s: %s", name, gcs_source_uri, e)
+            continue
+        if text:
+            logger.info("Extracted text from %s with the '%s' backend", gcs_source_uri, name)
+            return OcrResult(text, name)
+
+    return OcrResult("", order[-1])
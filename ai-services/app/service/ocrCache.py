@@ -0,0 +1,33 @@
+import os
+from app.utils.mongo_cache import MongoLRUCache
+
+# Extracted resume text keyed by the content hash of the source PDF
+OCR_CACHE_COLLECTION = "ocr_cache"
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true"
+# Least recently used entries are evicted once the collection grows past this size
+OCR_CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", "5000"))
+
+_cache = MongoLRUCache(OCR_CACHE_COLLECTION)
+
+
+def ocr_cache_key(blob):
+    """
+    Build a content-addressed cache key for a GCS blob.
+
+    The MD5 hash identifies the file contents, so the same PDF uploaded under
+    different names shares one entry. Composite objects have no MD5, so fall
+    back to the object path plus its generation.
+    """
+    if blob.md5_hash:
+        return f"md5:{blob.md5_hash}"
+    return f"generation:{blob.bucket.name}/{blob.name}#{blob.generation}"
+
+
+def get_cached_text(key):
+    """Return the cached text for `key` and refresh its LRU position, or None."""
+    return _cache.get(key)
+
+
+def store_text(key, text, source_uri, max_entries=OCR_CACHE_MAX_ENTRIES):
+    """Store extracted text for `key` and evict the least recently used overflow."""
+    _cache.put(key, {"text": text, "sourceUri": source_uri}, max_entries)
@@ -0,0 +1,73 @@
+import os
+from datetime import datetime, timezone
+from pymongo import ASCENDING, UpdateOne
+from app import get_app
+from app.utils.bulk_writer import get_bulk_writer
+
+# Completed stages and their outputs, per message kind and ID
+LEDGER_COLLECTION = "processing_ledger"
+LEDGER_ENABLED = os.getenv("LEDGER_ENABLED", "true").lower() == "true"
+# Ledger entries are removed this long after their last update
+LEDGER_TTL_DAYS = int(os.getenv("LEDGER_TTL_DAYS", "30"))
+
+_indexes_created = False
+
+
+def _collection():
+    global _indexes_created
+    collection = get_app().config['MONGO'].db[LEDGER_COLLECTION]
+    if not _indexes_created:
+        collection.create_index([("updatedAt", ASCENDING)], expireAfterSeconds=LEDGER_TTL_DAYS * 24 * 3600)
+        _indexes_created = True
+    return collection
+
+
+def ledger_key(kind, id):
+    return f"{kind}:{id}"
+
+
+def load_entry(kind, id):
+    """
+    Return the ledger entry for a message, or None if it was never processed.
+    The entry has a "status" ("in_progress" or "completed") and a "stages"
+    dict mapping each completed stage to its output.
+    """
+    return _collection().find_one({"_id": ledger_key(kind, id)})
+
+
+def record_stage(kind, id, stage, output):
+    """Record that `stage` finished with `output`."""
+    now = datetime.now(timezone.utc)
+    _collection().update_one(
+        {"_id": ledger_key(kind, id)},
+        {
+            "$set": {f"stages.{stage}": output, "updatedAt": now},
+            "$setOnInsert": {"status": "in_progress", "createdAt": now},
+        },
+        upsert=True,
+    )
+
+
+def _completed_update(kind, id, result):
+    now = datetime.now(timezone.utc)
+    return (
+        {"_id": ledger_key(kind, id)},
+        {
+            "$set": {"status": "completed", "result": result, "updatedAt": now},
+            "$setOnInsert": {"createdAt": now},
+        },
+    )
+
+
+def mark_completed(kind, id, result=None):
+    """Mark the whole message as processed so redeliveries are skipped."""
+    _collection().update_one(*_completed_update(kind, id, result), upsert=True)
+
+
+def submit_completed(kind, id, result=None):
+    """
+    `mark_completed` queued on the ledger's BulkWriter instead of written here,
+    so it can be called from another writer's flush thread. Returns the Future
+    of the queued write.
+    """
+    return get_bulk_writer(_collection()).submit(UpdateOne(*_completed_update(kind, id, result), upsert=True))
@@ -1,15 +1,10 @@
-import os
-import time
-from google.cloud import vision, storage
-from dotenv import load_dotenv
-from groq import Groq
+from app.utils.structured_output import StructuredOutputError, structured_chat_completion, structured_chat_completion_async
 
-# Load environment variables
-load_dotenv()
-
-# Initialize Groq Client
-API_KEY = os.getenv('GROQ_API_KEY')
-client = Groq(api_key=API_KEY)
+# The prompt asks for 10 questions; fewer than MIN_QUESTION_COUNT means the separators were not followed
+QUESTION_COUNT = 10
+MIN_QUESTION_COUNT = 5
+# Ten short questions and their separators
+QUESTIONS_MAX_TOKENS = 700
 
 job_description = """
 Job Title: Machine Learning Engineer - Computer Vision
@@ -150,7 +145,20 @@ resume_summary = """
 - Interests: Basketball (College-level Basketball Player), Painting, Skydiving (Jumped from an altitude exceeding 13,000 feet), Yoga, and Meditation"""
 
 
-def generate_interview_questions(resume_summary, job_description, system_prompt = system_prompt):
+def validate_questions(questions):
+    """
+    Check that the generated text splits into a plausible question list.
+
+    :raises StructuredOutputError: If the output has too few questions, or more
+        than requested (usually a heading or closing line was added).
+    """
+    count = len(split_questions(questions))
+    if not MIN_QUESTION_COUNT <= count <= QUESTION_COUNT:
+        raise StructuredOutputError(f"Expected {QUESTION_COUNT} '//'-separated questions, got {count}")
+    return questions
+
+
+def question_messages(resume_summary, job_description, system_prompt=system_prompt):
     # Define the system message using the provided prompt
     system_message = {
         "role": "system",
@@ -163,26 +171,32 @@ def generate_interview_questions(resume_summary, job_description, system_prompt
         "role": "user",
         "content": user_prompt
     }
-    
-    # Call the Groq API using the Llama Versatile 70B model
-    stream = client.chat.completions.create(
-        messages=[system_message, user_message],
-        model="llama-3.3-70b-versatile",
-        temperature=0.5,
-        max_completion_tokens=1024,
-        top_p=1,
-        stop=None,
-        stream=True,
+
+    return [system_message, user_message]
+
+
+def generate_interview_questions(resume_summary, job_description, system_prompt = system_prompt, cache=True):
+    # Call the Groq API using the Llama Versatile 70B model, re-requesting malformed lists;
+    # cache=False asks for a fresh set instead of reusing the one cached for these inputs
+    return structured_chat_completion(
+        question_messages(resume_summary, job_description, system_prompt),
+        validate_questions,
+        json_mode=False,
+        cache=cache,
+        max_completion_tokens=QUESTIONS_MAX_TOKENS,
     )
 
-    # Collect the streamed response
-    questions = ""
-    for chunk in stream:
-        content = chunk.choices[0].delta.content
-        if content is not None:
-            questions += content
-            
-    return questions
+
+async def generate_interview_questions_async(resume_summary, job_description, system_prompt=system_prompt,
+                                             cache=True):
+    """Async `generate_interview_questions`."""
+    return await structured_chat_completion_async(
+        question_messages(resume_summary, job_description, system_prompt),
+        validate_questions,
+        json_mode=False,
+        cache=cache,
+        max_completion_tokens=QUESTIONS_MAX_TOKENS,
+    )
 
 
 def split_questions(input_string):
@@ -197,6 +211,7 @@ def split_questions(input_string):
     
     return questions_array
 
+
 def ensure_question_marks(questions_array):
     """
     Iterate through each question in the array and add a question mark
@@ -214,19 +229,7 @@ def ensure_question_marks(questions_array):
 
 
 def process_questions(input_string):
-      """
-      Combines splitting, ensuring question marks, and formatting questions into objects.
-      """
-      # Split the string by the "//" separator
-      questions_array = input_string.split("//")
-      
-      # Strip whitespace from each question and filter out empty strings
-      questions_array = [question.strip() for question in questions_array if question.strip()]
-      
-      # Ensure each question ends with a question mark
-      for i in range(len(questions_array)):
-        if not questions_array[i].endswith('?'):
-          questions_array[i] += '?'
-      
-      # Convert the array of questions into an array of objects
-      return [{"question": question} for question in questions_array]
\ No newline at end of file
+    """
+    Combines splitting, ensuring question marks, and formatting questions into objects.
+    """
+    return [{"question": question} for question in ensure_question_marks(split_questions(input_string))]
@@ -1,26 +1,20 @@
 from flask import current_app
 import os
-from google.cloud import vision, storage
-from groq import Groq
 import re
+import uuid
 from dotenv import load_dotenv
+from app.utils.gcs import parse_gcs_path
+from app.utils.client_pool import get_vision_client, get_storage_client
+from app.utils.llm import chat_completion_text, chat_completion_text_async
+from app.utils.structured_output import (
+    structured_chat_completion, structured_chat_completion_async, json_fields, require_score, require_text
+)
+from app.service.ocrCache import OCR_CACHE_ENABLED, ocr_cache_key, get_cached_text, store_text
+from app.utils.log import get_logger
 
 load_dotenv()
 
-def process_resume(resume_url):
-    """
-    Process the resume using the provided resumeURL.
-    """
-    try:
-        # Example logic: Print the resume URL or perform further processing
-        print(f"Processing resume from URL: {resume_url}")
-        # Add your logic here (e.g., download the resume, analyze it, etc.)
-    except Exception as e:
-        print(f"Error processing resume: {str(e)}")
-
-API_KEY = os.getenv('GROQ_API_KEY')
-
-client = Groq(api_key=API_KEY)
+logger = get_logger(__name__)
 
 summarization_prompt = """
     You are a resume summarization tool specifically designed to create standardized summaries optimized for Applicant Tracking Systems (ATS). 
@@ -162,21 +156,67 @@ ats_prompt = """
         - Assess if the resume summary highlights the necessary skills and experiences sought by the employer.  
         - Propose additions or modifications to better showcase the applicant's suitability.
 
-    **Make sure the output always strictly follows this structure:**  
-    1. "Score:" heading followed by the percentage score and nothing else in text (for example- Score: 70%, or Score: 55%).  
-    2. "Summary" heading followed by the detailed evaluation report.
+    **Make sure the output is always a JSON object with exactly these keys:**  
+    1. "score": the percentage score as an integer between 0 and 100 and nothing else (for example- 70, or 55).  
+    2. "summary": a string containing the detailed evaluation report with the sub-sections above.
     """ 
 
 
+# Completion budgets; both outputs are structured reports of bounded length
+SUMMARY_MAX_TOKENS = 1024
+ATS_MAX_TOKENS = 1024
+
+# Pages of multi-page resumes are joined with a form feed, like pdftotext does
+PAGE_SEPARATOR = "\f"
+# Delete the Vision output shards once their text has been read
+OCR_CLEANUP_OUTPUT = os.getenv("OCR_CLEANUP_OUTPUT", "true").lower() == "true"
+
+
+def ocr_output_uri(gcs_destination_uri):
+    """Return a unique output prefix for one OCR job under `gcs_destination_uri`."""
+    return f"{gcs_destination_uri.rstrip('/')}/{uuid.uuid4().hex}/"
+
+
+def ocr_shard_start_page(blob):
+    """
+    Sort key for Vision output shards, which are named like `output-3-to-3.json`.
+    Comparing the names as strings would put page 10 before page 2.
+    """
+    match = re.search(r"output-(\d+)-to-\d+\.json$", blob.name)
+    return int(match.group(1)) if match else 0
+
+
 # Function 1 - Extract text from PDF using Google Vision API
-def async_detect_text_in_pdf(service_account_json_path, gcs_source_uri, gcs_destination_uri):
-    client = vision.ImageAnnotatorClient.from_service_account_json(service_account_json_path)
+def async_detect_text_in_pdf(service_account_json_path, gcs_source_uri, gcs_destination_uri, cleanup=OCR_CLEANUP_OUTPUT):
+    from google.cloud import vision  # heavy; only needed when a PDF has no usable text layer
+
+    storage_client = get_storage_client(service_account_json_path)
+
+    # ✅ Reuse the text of a PDF that was already OCR'd (e.g. same resume, another job)
+    cache_key = None
+    if OCR_CACHE_ENABLED:
+        try:
+            source_bucket_name, source_file_name = parse_gcs_path(gcs_source_uri)
+            source_blob = storage_client.bucket(source_bucket_name).get_blob(source_file_name)
+            if source_blob is not None:
+                cache_key = ocr_cache_key(source_blob)
+                cached_text = get_cached_text(cache_key)
+                if cached_text is not None:
+                    logger.info("OCR cache hit for %s", gcs_source_uri)
+                    return cached_text
+        except Exception as e:
+            logger.warning("OCR cache lookup failed for %s: %s", gcs_source_uri, e)
+
+    client = get_vision_client(service_account_json_path)
+
+    # ✅ Each job writes under its own prefix, so concurrent jobs never read each other's output
+    output_uri = ocr_output_uri(gcs_destination_uri)
 
     feature = vision.Feature(type=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)
     gcs_source = vision.GcsSource(uri=gcs_source_uri)
     input_config = vision.InputConfig(gcs_source=gcs_source, mime_type="application/pdf")
 
-    gcs_destination = vision.GcsDestination(uri=gcs_destination_uri)
+    gcs_destination = vision.GcsDestination(uri=output_uri)
     output_config = vision.OutputConfig(gcs_destination=gcs_destination, batch_size=1)
 
     async_request = vision.AsyncAnnotateFileRequest(
@@ -186,45 +226,56 @@ def async_detect_text_in_pdf(service_account_json_path, gcs_source_uri, gcs_dest
     )
 
     operation = client.async_batch_annotate_files(requests=[async_request])
-    print("Waiting for operation to complete...")
+    logger.debug("Waiting for the OCR operation on %s to complete", gcs_source_uri)
     operation.result(timeout=300)   
 
-    storage_client = storage.Client.from_service_account_json(service_account_json_path)
-
-    bucket_name = gcs_destination_uri.replace("gs://", "").split("/", 1)[0]
-    prefix = gcs_destination_uri.replace(f"gs://{bucket_name}/", "")
+    bucket_name, prefix = parse_gcs_path(output_uri)
 
     bucket = storage_client.bucket(bucket_name)
-    blob_list = list(bucket.list_blobs(prefix=prefix))
-
-    # ✅ Sort blobs by updated timestamp (get only the latest ones)
-    blob_list.sort(key=lambda blob: blob.updated, reverse=True)
-
-    # ✅ Process only the most recent JSON blob
-    latest_json_blob = None
-    for blob in blob_list:
-        if blob.name.endswith(".json"):
-            latest_json_blob = blob
-            break  # Stop at the most recent one
-
-    full_text_markdown = ""  # ✅ Use a string instead of a list
+    # ✅ Only this job's shards are listed, in page order
+    json_blobs = sorted(
+        (blob for blob in bucket.list_blobs(prefix=prefix) if blob.name.endswith(".json")),
+        key=ocr_shard_start_page,
+    )
 
-    if latest_json_blob:
-        json_data = latest_json_blob.download_as_bytes()
-        if json_data:
+    pages = []
+    # Text missing a shard is still returned, but never cached for the next application with this PDF
+    complete = True
+    for blob in json_blobs:
+        json_data = blob.download_as_bytes()
+        if not json_data:
+            complete = False
+            logger.warning("OCR output %s is empty", blob.name)
+            continue
+        try:
+            response = vision.AnnotateFileResponse.from_json(json_data.decode("utf-8"))
+            for annotation_response in response.responses:
+                if annotation_response.full_text_annotation.text:
+                    pages.append(annotation_response.full_text_annotation.text)
+        except Exception:
+            complete = False
+            logger.exception("Error processing OCR output %s", blob.name)
+
+    if cleanup:
+        for blob in json_blobs:
             try:
-                response = vision.AnnotateFileResponse.from_json(json_data.decode("utf-8"))
-                for annotation_response in response.responses:
-                    if annotation_response.full_text_annotation.text:
-                        full_text_markdown = annotation_response.full_text_annotation.text  # ✅ Overwrite instead of append
+                blob.delete()
             except Exception as e:
-                print(f"Error processing blob {latest_json_blob.name}: {e}")
+                logger.warning("Error deleting OCR output %s: %s", blob.name, e)
+
+    full_text_markdown = PAGE_SEPARATOR.join(pages)
+
+    if cache_key and full_text_markdown and complete:
+        try:
+            store_text(cache_key, full_text_markdown, gcs_source_uri)
+        except Exception as e:
+            logger.warning("OCR cache store failed for %s: %s", gcs_source_uri, e)
 
     return full_text_markdown  # ✅ Directly return the extracted text as a string
 
 
 # Function 2 - Summarize Resume
-def summarize_resume(resume_text, system_prompt=summarization_prompt):
+def summary_messages(resume_text, system_prompt=summarization_prompt):
     system_message = {
         "role": "system", 
         "content": system_prompt
@@ -235,45 +286,48 @@ def summarize_resume(resume_text, system_prompt=summarization_prompt):
         "content": resume_text
     }
 
-    stream = client.chat.completions.create(
-        messages=[system_message, user_message],
-        model="llama-3.3-70b-versatile",
-        temperature=0.5,
-        max_completion_tokens=1024,
-        top_p=1,
-        stop=None,
-        stream=True,
-    )
+    return [system_message, user_message]
+
 
-    summary = ""
-    for chunk in stream:
-        content = chunk.choices[0].delta.content
-        if content is not None:
-            summary += content
+def summarize_resume(resume_text, system_prompt=summarization_prompt, cache=True):
+    """Summarize the resume text; `cache=False` requests a fresh summary instead of a cached one."""
+    return chat_completion_text(summary_messages(resume_text, system_prompt), cache=cache,
+                                max_completion_tokens=SUMMARY_MAX_TOKENS)
 
-    return summary
 
+async def summarize_resume_async(resume_text, system_prompt=summarization_prompt, cache=True):
+    """Async `summarize_resume`."""
+    return await chat_completion_text_async(summary_messages(resume_text, system_prompt), cache=cache,
+                                            max_completion_tokens=SUMMARY_MAX_TOKENS)
 
-def ats_scanner(resume_summary, job_description, system_prompt =ats_prompt):
+
+def parse_ats_result(fields):
+    """Validate the ATS JSON object into {"score": int, "report": str}."""
+    return {
+        "score": require_score(fields.get("score")),
+        "report": require_text(fields.get("summary"), "summary"),
+    }
+
+
+def ats_messages(resume_summary, job_description, system_prompt=ats_prompt):
     system_message = {"role": "system", "content": system_prompt}
     user_prompt = f"Resume Summary:\n{resume_summary}\n\nJob Description:\n{job_description}"
     user_message = {"role": "user", "content": user_prompt}
+    return [system_message, user_message]
 
-    stream = client.chat.completions.create(
-        messages=[system_message, user_message],
-        model="llama-3.3-70b-versatile",
-        temperature=0.5,
-        max_completion_tokens=1024,
-        top_p=1,
-        stop=None,
-        stream=True,
-    )
 
-    report = ""
-    for chunk in stream:
-        content = chunk.choices[0].delta.content
-        if content is not None:
-            report += content
+def ats_scanner(resume_summary, job_description, system_prompt =ats_prompt, cache=True):
+    """
+    Evaluate the resume summary against the job description.
+    Returns a dict with the integer "score" (0-100) and the "report" text.
+    Pass `cache=False` to re-score instead of reusing a cached result.
+    """
+    return structured_chat_completion(ats_messages(resume_summary, job_description, system_prompt),
+                                      json_fields(parse_ats_result), cache=cache, max_completion_tokens=ATS_MAX_TOKENS)
 
-    return report
 
+async def ats_scanner_async(resume_summary, job_description, system_prompt=ats_prompt, cache=True):
+    """Async `ats_scanner`."""
+    return await structured_chat_completion_async(ats_messages(resume_summary, job_description, system_prompt),
+                                                  json_fields(parse_ats_result), cache=cache,
+                                                  max_completion_tokens=ATS_MAX_TOKENS)
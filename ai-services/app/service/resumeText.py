@@ -0,0 +1,214 @@
+import os
+import re
+import unicodedata
+from collections import Counter, namedtuple
+from app.service.resume import PAGE_SEPARATOR
+
+# Resume text sent to the summarizer is cut down to about this many tokens
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "3000"))
+# Lines at least this long are dropped when they repeat anywhere in the resume;
+# shorter ones (skills, dates, job titles) only when they repeat back to back
+DEDUPE_MIN_LINE_CHARS = 30
+# Lines among the first / last few of a page are checked for running headers and footers
+PAGE_EDGE_LINES = 2
+
+# Text after compaction, with the estimated token counts before and after
+CompactedText = namedtuple("CompactedText", ["text", "original_tokens", "tokens", "truncated"])
+
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b\x0e-\x1f\x7f\u200b-\u200d\u2060\ufeff]")
+_BULLET = re.compile(r"^[•●○◦▪▫■□◆◇►▸‣⁃∙·➢➤✓✔*\-]+\s*")
+_PAGE_NUMBER = re.compile(r"^(?P<label>page\s*)?(?P<number>\d{1,3})(\s*(of|/)\s*\d{1,3})?$", re.IGNORECASE)
+# Llama 3 style pre-tokenization: letter runs, numbers in groups of up to three digits,
+# punctuation runs and line breaks
+_TOKEN_PIECES = re.compile(r"[^\W\d_]+|\d{1,3}|\n+|[^\w\s]+|_+")
+# Letter runs longer than this are split into several tokens
+WORD_CHARS_PER_TOKEN = 6
+
+# Section headings, in the order sections are kept when a resume is over budget.
+# Text before the first heading (name and contact details) is always kept first.
+SECTION_PRIORITIES = [
+    ("summary", ("summary", "profile", "objective", "about me", "professional summary", "career objective")),
+    ("experience", ("experience", "work experience", "professional experience", "employment",
+                    "employment history", "work history", "internships", "internship")),
+    ("skills", ("skills", "technical skills", "key skills", "core competencies", "technologies", "tools")),
+    ("projects", ("projects", "personal projects", "academic projects", "key projects")),
+    ("education", ("education", "academic background", "qualifications", "academics")),
+    ("certifications", ("certifications", "certificates", "licenses", "courses", "training")),
+    ("achievements", ("achievements", "awards", "honors", "publications", "accomplishments")),
+    ("other", ("languages", "volunteering", "volunteer experience", "activities", "leadership")),
+    ("personal", ("interests", "hobbies", "references", "declaration", "personal details", "personal information")),
+]
+_HEADINGS = {heading: rank for rank, (_, headings) in enumerate(SECTION_PRIORITIES) for heading in headings}
+
+
+def count_tokens(text):
+    """
+    Estimate the number of tokens in `text` without calling a tokenizer.
+    Tends to overcount slightly, so a budget in these units is a safe upper bound.
+    """
+    count = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        if piece[0].isalpha():
+            count += -(-len(piece) // WORD_CHARS_PER_TOKEN)
+        else:
+            count += 1
+    return count
+
+
+def normalize_text(text):
+    """
+    Clean up OCR output: unicode compatibility forms (ligatures, full-width
+    characters), stray control characters, bullet glyphs, words hyphenated
+    across lines and runs of whitespace. Page separators are kept.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\t", " ")
+    text = _CONTROL_CHARS.sub("", text)
+    text = re.sub(r"([a-z])-\n[ ]*([a-z])", r"\1\2", text)
+
+    pages = []
+    for page in text.split(PAGE_SEPARATOR):
+        lines = []
+        for line in page.split("\n"):
+            line = re.sub(r" +", " ", line).strip()
+            bullet = _BULLET.match(line)
+            if bullet:
+                line = "- " + line[bullet.end():]
+            if lines and lines[-1] == "- ":
+                # OCR often puts the bullet glyph on a line of its own
+                lines[-1] += line
+            else:
+                lines.append(line)
+        pages.append("\n".join(lines).strip())
+    return PAGE_SEPARATOR.join(re.sub(r"\n{3,}", "\n\n", page) for page in pages)
+
+
+def _furniture_key(line):
+    return re.sub(r"\d+", "#", line.lower())
+
+
+def _is_page_number(line, page_number):
+    """
+    True for a page number line of page `page_number`: "Page 2", "Page 2 of 3",
+    or a bare "2" / "2/3" naming this page. A bare number for anything else is
+    a value (years, a grade, a team size) that OCR put on a line of its own.
+    """
+    match = _PAGE_NUMBER.match(line)
+    return bool(match) and (bool(match.group("label")) or int(match.group("number")) == page_number)
+
+
+def drop_page_furniture(text):
+    """
+    Join the pages of `text`, dropping page numbers at the top or bottom of a
+    page and running headers or footers: lines at the top or bottom of at
+    least half of the pages.
+    """
+    pages = [page.split("\n") for page in text.split(PAGE_SEPARATOR)]
+
+    repeated = set()
+    if len(pages) > 1:
+        edge_counts = Counter()
+        for lines in pages:
+            content = [line for line in lines if line]
+            edges = content[:PAGE_EDGE_LINES] + content[-PAGE_EDGE_LINES:]
+            # Numbers on their own line are left to `_is_page_number`, since any value can look like one
+            edge_counts.update({_furniture_key(line) for line in edges if not _PAGE_NUMBER.match(line)})
+        min_pages = max(2, -(-len(pages) // 2))
+        repeated = {key for key, count in edge_counts.items() if count >= min_pages}
+
+    kept = []
+    for page_number, lines in enumerate(pages, start=1):
+        content = [index for index, line in enumerate(lines) if line]
+        edges = set(content[:PAGE_EDGE_LINES] + content[-PAGE_EDGE_LINES:])
+        boundaries = {content[0], content[-1]} if content else set()
+        for index, line in enumerate(lines):
+            if index in boundaries and _is_page_number(line, page_number):
+                continue
+            if index in edges and _furniture_key(line) in repeated:
+                continue
+            kept.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+def dedupe_lines(text):
+    """Drop lines repeating the line before them, and long lines seen earlier in the text."""
+    seen = set()
+    previous = None
+    kept = []
+    for line in text.split("\n"):
+        key = line.lower()
+        if line and (key == previous or key in seen):
+            continue
+        if len(line) >= DEDUPE_MIN_LINE_CHARS:
+            seen.add(key)
+        if line:
+            previous = key
+        kept.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+def _heading_rank(line):
+    """Priority rank of a section heading line, or None if the line is not a heading."""
+    if not line or len(line) > 40:
+        return None
+    # Only known headings start a section: an all-caps company name inside
+    # the experience section must not split it
+    return _HEADINGS.get(line.strip("#*:-= ").lower())
+
+
+def split_sections(text):
+    """Split resume text into a list of (rank, lines) sections; the preamble has rank -1."""
+    sections = [(-1, [])]
+    for line in text.split("\n"):
+        rank = _heading_rank(line)
+        if rank is not None:
+            sections.append((rank, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(rank, lines) for rank, lines in sections if any(lines)]
+
+
+def fit_token_budget(text, budget):
+    """
+    Cut `text` down to about `budget` tokens. Whole sections are kept in
+    priority order (contact details, summary, experience, skills, ...); the
+    first section that does not fit is cut at a line boundary and lower
+    priority sections get whatever budget is left. Kept text stays in its
+    original order. Returns a tuple of (text, truncated).
+    """
+    if count_tokens(text) <= budget:
+        return text, False
+
+    sections = split_sections(text)
+    kept = [[] for _ in sections]
+    remaining = budget
+    for index in sorted(range(len(sections)), key=lambda index: sections[index][0]):
+        for line in sections[index][1]:
+            # Each kept line also costs a line break
+            cost = count_tokens(line) + 1
+            if cost > remaining:
+                break
+            kept[index].append(line)
+            remaining -= cost
+        rank, lines = sections[index]
+        if rank >= 0 and len(kept[index]) == 1 < len(lines):
+            # A heading without any of its content is not worth its tokens
+            remaining += count_tokens(kept[index].pop()) + 1
+    return "\n".join(line for lines in kept for line in lines).strip(), True
+
+
+def compact_resume_text(text, budget=RESUME_TOKEN_BUDGET):
+    """
+    Prepare OCR output for summarization: normalize it, drop page furniture
+    and duplicated lines, then fit it to `budget` tokens, see `fit_token_budget`.
+
+    :param text: Resume text, pages separated by PAGE_SEPARATOR.
+    :param budget: Token budget for the compacted text; None or 0 disables truncation.
+    :return: CompactedText with the estimated token counts before and after.
+    """
+    original_tokens = count_tokens(text)
+    compacted = dedupe_lines(drop_page_furniture(normalize_text(text)))
+    truncated = False
+    if budget:
+        compacted, truncated = fit_token_budget(compacted, budget)
+    return CompactedText(compacted, original_tokens, count_tokens(compacted), truncated)
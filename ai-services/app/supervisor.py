@@ -0,0 +1,198 @@
+import os
+import time
+import signal
+import argparse
+import threading
+import multiprocessing
+from collections import namedtuple
+from app.rabbitmq_consumer import (
+    QUEUE_HANDLERS, CONSUMER_MODE, CONSUMER_WORKERS, CONSUMER_PREFETCH, CONSUMER_DRAIN_TIMEOUT,
+)
+from app.utils.log import get_logger
+from app.utils.metrics import start_metrics_server
+
+logger = get_logger(__name__)
+
+# Worker process pools, as "queue[,queue]=processes" separated by ";", e.g.
+# "new_job_application_queue=2;interview_completed_queue=4". When unset, one
+# pool of CONSUMER_PROCESSES workers consumes every queue.
+CONSUMER_POOLS = os.getenv("CONSUMER_POOLS", "")
+CONSUMER_PROCESSES = int(os.getenv("CONSUMER_PROCESSES", "2"))
+# Each worker process serves its own /metrics on METRICS_PORT + its slot number
+# (0, 1, ... across all pools); 0 turns the endpoints off
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# A worker that exits sooner than this after starting is restarted with exponential backoff
+RESTART_MIN_UPTIME_SECONDS = 30
+RESTART_BACKOFF_MAX_SECONDS = 60
+# Extra time given to workers past their drain timeout before they are killed
+STOP_GRACE_SECONDS = 10
+POLL_SECONDS = 0.5
+
+Pool = namedtuple("Pool", ["queues", "processes"])
+
+
+def parse_pools(spec, default_processes=CONSUMER_PROCESSES):
+    """
+    Parse a CONSUMER_POOLS style spec into a list of Pools.
+
+    :raises ValueError: On malformed entries or unknown queue names.
+    """
+    if not spec.strip():
+        return [Pool(tuple(QUEUE_HANDLERS), default_processes)]
+
+    pools = []
+    for entry in spec.replace("\n", ";").split(";"):
+        if not entry.strip():
+            continue
+        queues, _, processes = entry.partition("=")
+        queues = tuple(queue.strip() for queue in queues.split(",") if queue.strip())
+        unknown = set(queues) - set(QUEUE_HANDLERS)
+        if not queues or unknown:
+            raise ValueError(f"Invalid pool {entry.strip()!r}: unknown or missing queues")
+        try:
+            processes = int(processes) if processes.strip() else default_processes
+        except ValueError:
+            raise ValueError(f"Invalid pool {entry.strip()!r}: process count must be an integer")
+        if processes < 1:
+            raise ValueError(f"Invalid pool {entry.strip()!r}: process count must be at least 1")
+        pools.append(Pool(queues, processes))
+    return pools
+
+
+def run_worker(queues, mode, workers, prefetch, drain_timeout, metrics_port=None):
+    """
+    Worker process: consume `queues` until SIGTERM, then drain them and exit.
+    With a `metrics_port`, the worker's metrics are served on it meanwhile.
+    """
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    # Ctrl-C reaches the whole process group; the supervisor turns it into one SIGTERM per worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from app import get_app
+    from app.rabbitmq_consumer import start_consumer
+
+    if metrics_port:
+        start_metrics_server(metrics_port)
+        logger.info("Serving metrics on port %s", metrics_port)
+
+    get_app().app_context().push()
+    start_consumer(mode, workers, prefetch, queues=queues, stop_event=stop_event, drain_timeout=drain_timeout)
+
+
+class _Slot:
+    """One worker position in a pool, and the process currently filling it."""
+
+    def __init__(self, pool, index, metrics_port=None):
+        self.pool = pool
+        self.name = f"consumer-{'+'.join(pool.queues)}-{index}"
+        self.metrics_port = metrics_port
+        self.process = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at = 0.0
+
+
+class Supervisor:
+    """
+    Keeps each pool's worker processes running: restarts a worker that exits,
+    backing off when one keeps crashing on startup, and on `stop` sends every
+    worker SIGTERM so it drains its in-flight messages before exiting.
+    """
+
+    def __init__(self, pools, mode=CONSUMER_MODE, workers=CONSUMER_WORKERS, prefetch=CONSUMER_PREFETCH,
+                 drain_timeout=CONSUMER_DRAIN_TIMEOUT, metrics_port=METRICS_PORT, target=run_worker, mp_context=None,
+                 clock=time.monotonic):
+        self.worker_args = (mode, workers, prefetch, drain_timeout)
+        self.drain_timeout = drain_timeout
+        self.target = target
+        # Workers import the app themselves instead of inheriting the supervisor's threads and sockets
+        self._context = mp_context or multiprocessing.get_context("spawn")
+        self._clock = clock
+        self._stopping = threading.Event()
+        positions = [(pool, index) for pool in pools for index in range(pool.processes)]
+        # A restarted worker takes over its slot's port, so scrape targets stay fixed
+        self.slots = [_Slot(pool, index, metrics_port + number if metrics_port else None)
+                      for number, (pool, index) in enumerate(positions)]
+
+    def _start(self, slot):
+        slot.process = self._context.Process(target=self.target,
+                                             args=(slot.pool.queues,) + self.worker_args + (slot.metrics_port,),
+                                             name=slot.name)
+        slot.process.start()
+        slot.started_at = self._clock()
+        logger.info("Started %s (pid %s)", slot.name, slot.process.pid)
+
+    def check(self):
+        """Restart workers that exited, once their backoff has passed."""
+        now = self._clock()
+        for slot in self.slots:
+            if slot.process is not None and not slot.process.is_alive():
+                uptime = now - slot.started_at
+                slot.failures = slot.failures + 1 if uptime < RESTART_MIN_UPTIME_SECONDS else 0
+                delay = min(RESTART_BACKOFF_MAX_SECONDS, 2 ** (slot.failures - 1)) if slot.failures else 0
+                logger.warning("%s exited with code %s after %.0fs, restarting in %ss",
+                               slot.name, slot.process.exitcode, uptime, delay)
+                slot.process.close()
+                slot.process = None
+                slot.restart_at = now + delay
+            if slot.process is None and now >= slot.restart_at and not self._stopping.is_set():
+                self._start(slot)
+
+    def request_stop(self, *_):
+        self._stopping.set()
+
+    def stop(self):
+        """SIGTERM every worker and wait for them to drain; kill those that do not exit in time."""
+        self._stopping.set()
+        running = [slot.process for slot in self.slots if slot.process is not None and slot.process.is_alive()]
+        for process in running:
+            process.terminate()
+
+        deadline = time.monotonic() + self.drain_timeout + STOP_GRACE_SECONDS
+        for process in running:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("%s did not drain in time, killing it", process.name)
+                process.kill()
+                process.join()
+
+    def run(self):
+        """Start the pools and supervise them until SIGTERM or SIGINT, then drain and return."""
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+
+        logger.info("Supervising %s worker processes", len(self.slots))
+        try:
+            while not self._stopping.is_set():
+                self.check()
+                self._stopping.wait(POLL_SECONDS)
+        finally:
+            logger.info("Stopping workers")
+            self.stop()
+        logger.info("All workers stopped")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the RabbitMQ consumers in supervised worker processes.")
+    parser.add_argument("--pool", action="append", default=[], metavar="QUEUE[,QUEUE]=PROCESSES",
+                        help="A pool of worker processes pinned to the given queues; repeatable "
+                             "(default: CONSUMER_POOLS, or every queue)")
+    parser.add_argument("--processes", type=int, default=CONSUMER_PROCESSES,
+                        help="Processes for pools that do not give a count")
+    parser.add_argument("--mode", choices=("threaded", "inline", "asyncio"), default=CONSUMER_MODE)
+    parser.add_argument("--workers", type=int, default=CONSUMER_WORKERS, help="Worker threads per queue per process")
+    parser.add_argument("--prefetch", type=int, default=CONSUMER_PREFETCH)
+    parser.add_argument("--drain-timeout", type=float, default=CONSUMER_DRAIN_TIMEOUT,
+                        help="Seconds a stopping worker waits for in-flight messages")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="First port of the per-worker /metrics endpoints; worker N serves port + N (0: off)")
+    args = parser.parse_args(argv)
+
+    try:
+        pools = parse_pools(";".join(args.pool) or CONSUMER_POOLS, args.processes)
+    except ValueError as e:
+        parser.error(str(e))
+
+    Supervisor(pools, args.mode, args.workers, args.prefetch, args.drain_timeout, args.metrics_port).run()
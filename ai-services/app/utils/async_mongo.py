@@ -0,0 +1,22 @@
+import os
+import threading
+from pymongo import AsyncMongoClient
+
+# Connections per process; coroutines share them, so this bounds concurrent queries, not jobs
+ASYNC_MONGO_MAX_POOL_SIZE = int(os.getenv("ASYNC_MONGO_MAX_POOL_SIZE", "100"))
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_async_db():
+    """
+    Database of MONGO_URI on a shared AsyncMongoClient, for the asyncio
+    consumer. The client belongs to the event loop it is first used on.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = AsyncMongoClient(os.getenv("MONGO_URI"), maxPoolSize=ASYNC_MONGO_MAX_POOL_SIZE)
+    return _client.get_default_database()
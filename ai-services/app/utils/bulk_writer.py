@@ -0,0 +1,118 @@
+import os
+import time
+import threading
+from concurrent.futures import Future
+from pymongo import WriteConcern
+from pymongo.errors import BulkWriteError
+from app.utils.metrics import span
+
+BULK_WRITES_ENABLED = os.getenv("BULK_WRITES_ENABLED", "true").lower() == "true"
+# A batch is flushed once it holds this many operations...
+BULK_WRITE_MAX_BATCH = int(os.getenv("BULK_WRITE_MAX_BATCH", "100"))
+# ...or once its oldest operation has waited this long
+BULK_WRITE_MAX_DELAY = float(os.getenv("BULK_WRITE_MAX_DELAY_MS", "200")) / 1000
+# Write concern for batches; journaled so an acked message survives a mongod crash
+BULK_WRITE_W = os.getenv("BULK_WRITE_W", "1")
+
+
+class BulkWriter:
+    """
+    Write-behind batcher that groups single-document writes into unordered
+    `bulk_write` calls, flushing on a size or time threshold.
+
+    `submit` returns a Future that resolves once the batch containing the
+    operation is acknowledged with the configured write concern, or fails
+    with that operation's write error.
+    """
+
+    def __init__(self, collection, max_batch_size=BULK_WRITE_MAX_BATCH, max_delay=BULK_WRITE_MAX_DELAY,
+                 write_concern=None):
+        w = int(BULK_WRITE_W) if BULK_WRITE_W.isdigit() else BULK_WRITE_W
+        self._collection = collection.with_options(write_concern=write_concern or WriteConcern(w=w, j=True))
+        self._max_batch_size = max_batch_size
+        self._max_delay = max_delay
+        self._pending = []  # (operation, future, submitted_at)
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"bulk-writer-{collection.name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, operation):
+        """Queue a pymongo write model (InsertOne, UpdateOne, ...) and return its Future."""
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("BulkWriter is closed")
+            self._pending.append((operation, future, time.monotonic()))
+            self._condition.notify()
+        return future
+
+    def close(self, timeout=None):
+        """Flush everything still queued and stop the writer thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            if not self._pending:
+                return None
+
+            deadline = self._pending[0][2] + self._max_delay
+            while len(self._pending) < self._max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch = self._pending[:self._max_batch_size]
+            del self._pending[:self._max_batch_size]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            with span("mongo_write"):
+                self._collection.bulk_write([operation for operation, _, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            # Unordered batches apply every other operation; fail only the ones that errored
+            if e.details.get("writeConcernErrors"):
+                failed = {index: e for index in range(len(batch))}
+            else:
+                failed = {error["index"]: BulkWriteError(error) for error in e.details.get("writeErrors", [])}
+            for index, (_, future, _) in enumerate(batch):
+                if index in failed:
+                    future.set_exception(failed[index])
+                else:
+                    future.set_result(None)
+            return
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for _, future, _ in batch:
+            future.set_result(None)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_bulk_writer(collection):
+    """Return the process-wide BulkWriter for `collection`, creating it on first use."""
+    with _writers_lock:
+        writer = _writers.get(collection.full_name)
+        if writer is None:
+            writer = BulkWriter(collection)
+            _writers[collection.full_name] = writer
+        return writer
@@ -0,0 +1,108 @@
+import os
+import threading
+import httpx
+from dotenv import load_dotenv
+from groq import Groq, AsyncGroq, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+load_dotenv()
+
+SERVICE_ACCOUNT_JSON = r"./../env/nextgen-hr-8ce4fa070811.json"
+
+# HTTP connection pool sizes; keep them at least as large as the number of
+# worker threads that call the service at the same time
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", str(GROQ_MAX_CONNECTIONS)))
+GCS_HTTP_POOL_SIZE = int(os.getenv("GCS_HTTP_POOL_SIZE", "20"))
+# Retries are handled by app.utils.rate_limiter, which backs off across all threads
+GROQ_SDK_MAX_RETRIES = int(os.getenv("GROQ_SDK_MAX_RETRIES", "0"))
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _get_or_create(key, factory):
+    """Return the client registered under `key`, creating it on first use."""
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+    return client
+
+
+def get_groq_client():
+    """Shared Groq client with a bounded HTTP connection pool."""
+    def factory():
+        http_client = DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS,
+            )
+        )
+        return Groq(api_key=os.getenv('GROQ_API_KEY'), http_client=http_client, max_retries=GROQ_SDK_MAX_RETRIES)
+
+    return _get_or_create("groq", factory)
+
+
+def get_async_groq_client():
+    """
+    Shared AsyncGroq client for the asyncio consumer. Like any httpx async
+    client it belongs to the event loop it is first used on.
+    """
+    def factory():
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS,
+            )
+        )
+        return AsyncGroq(api_key=os.getenv('GROQ_API_KEY'), http_client=http_client, max_retries=GROQ_SDK_MAX_RETRIES)
+
+    return _get_or_create("async_groq", factory)
+
+
+def get_vision_client(service_account_json_path=SERVICE_ACCOUNT_JSON):
+    """
+    Shared Vision client for the given service account.
+    The client talks gRPC over a single multiplexed channel, so it is safe to
+    share between threads without a connection pool.
+    """
+    def factory():
+        # The Google SDKs take most of the import time and only OCR and audio need them
+        from google.cloud import vision
+
+        return vision.ImageAnnotatorClient.from_service_account_json(service_account_json_path)
+
+    return _get_or_create(("vision", service_account_json_path), factory)
+
+
+def get_storage_client(service_account_json_path=None):
+    """
+    Shared Storage client for the given service account, or for the default
+    application credentials when no path is given.
+    """
+    def factory():
+        import google.auth
+        from google.auth.transport.requests import AuthorizedSession
+        from google.cloud import storage
+        from google.oauth2 import service_account
+        from requests.adapters import HTTPAdapter
+
+        if service_account_json_path:
+            credentials = service_account.Credentials.from_service_account_file(
+                service_account_json_path, scopes=storage.Client.SCOPE
+            )
+            project = credentials.project_id
+        else:
+            credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+
+        # requests' default pool keeps only 10 connections per host
+        session = AuthorizedSession(credentials)
+        adapter = HTTPAdapter(pool_connections=GCS_HTTP_POOL_SIZE, pool_maxsize=GCS_HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+
+        return storage.Client(project=project, credentials=credentials, _http=session)
+
+    return _get_or_create(("storage", service_account_json_path), factory)
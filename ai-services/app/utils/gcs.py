@@ -0,0 +1,16 @@
+def parse_gcs_path(gcs_path):
+    """
+    Split a gs:// URI into its bucket and object name.
+
+    :param gcs_path: URI of the form gs://bucket/path/to/object.
+    :return: Tuple of (bucket_name, file_name).
+    :raises ValueError: If the URI is not a valid GCS object path.
+    """
+    if not gcs_path.startswith("gs://"):
+        raise ValueError("Invalid GCS path. It must start with 'gs://'")
+
+    parts = gcs_path[5:].split("/", 1)
+    if len(parts) < 2:
+        raise ValueError("Invalid GCS path. It must contain a bucket and file name.")
+
+    return parts[0], parts[1]  # (bucket_name, file_name)
@@ -0,0 +1,194 @@
+import asyncio
+import inspect
+from app.utils.client_pool import get_groq_client, get_async_groq_client
+from app.utils.rate_limiter import get_rate_limiter, estimate_tokens
+from app.utils.metrics import record_token_usage, LLM_CACHE_LOOKUPS
+from app.utils.response_cache import RESPONSE_CACHE_ENABLED, response_cache_key, get_cached_response, store_response
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+
+def create_chat_completion(messages, model=DEFAULT_MODEL, temperature=0.5, max_completion_tokens=1024,
+                           top_p=1, stop=None, **params):
+    """
+    Send a chat completion request with the defaults used across the service,
+    within the model's shared rate limits (see `app.utils.rate_limiter`).
+    """
+    def request():
+        return get_groq_client().chat.completions.with_raw_response.create(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_completion_tokens=max_completion_tokens,
+            top_p=top_p,
+            stop=stop,
+            **params,
+        )
+
+    response = get_rate_limiter(model).call(request, estimate_tokens(messages, max_completion_tokens))
+    if not params.get("stream"):
+        record_token_usage(model, getattr(response, "usage", None))
+    return response
+
+
+# Parameters `create_chat_completion` fills in when a caller leaves them out
+_REQUEST_DEFAULTS = {
+    name: parameter.default
+    for name, parameter in inspect.signature(create_chat_completion).parameters.items()
+    if parameter.default is not inspect.Parameter.empty
+}
+
+
+def stream_chat_completion(messages, **params):
+    """
+    Stream a chat completion and yield its text as it arrives, one delta at a
+    time. Closing the generator early closes the response stream, so the
+    remaining tokens are never read.
+    """
+    stream = create_chat_completion(messages, stream=True, **params)
+    try:
+        for chunk in stream:
+            # The last chunk carries the usage of the whole response
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq is not None:
+                record_token_usage(params.get("model", DEFAULT_MODEL), getattr(x_groq, "usage", None))
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
+    finally:
+        stream.close()
+
+
+def completion_cache_key(messages, stop_when=None, **params):
+    """
+    Response cache key of a request. Unset parameters take the defaults of
+    `create_chat_completion`, so changing a default (e.g. the model) never
+    returns responses produced under the old one.
+    """
+    request = {"messages": messages, **_REQUEST_DEFAULTS, **params}
+    request.pop("stream", None)
+    if stop_when is not None:
+        # The text is cut where `stop_when` stopped reading
+        request["stop_when"] = f"{stop_when.__module__}.{stop_when.__qualname__}"
+    return response_cache_key(request)
+
+
+def load_cached_completion(messages, stop_when=None, **params):
+    """
+    Text of an identical earlier request, or None. A cache that is disabled
+    or unreachable counts as a miss.
+    """
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    try:
+        text = get_cached_response(completion_cache_key(messages, stop_when, **params))
+    except Exception as e:
+        logger.warning("LLM response cache lookup failed: %s", e)
+        return None
+    LLM_CACHE_LOOKUPS.inc(outcome="miss" if text is None else "hit")
+    return text
+
+
+def store_completion(text, messages, stop_when=None, **params):
+    """Cache `text` as the response to this request, see `load_cached_completion`."""
+    if not RESPONSE_CACHE_ENABLED or not text:
+        return
+    try:
+        store_response(completion_cache_key(messages, stop_when, **params), text,
+                       params.get("model", DEFAULT_MODEL))
+    except Exception as e:
+        logger.warning("LLM response cache store failed: %s", e)
+
+
+def chat_completion_text(messages, stop_when=None, cache=False, **params):
+    """
+    Stream a chat completion and return the concatenated response text.
+
+    :param stop_when: Optional callable taking the text received so far; once
+        it returns True the stream is closed and that text is returned.
+    :param cache: Reuse the response of an identical earlier request, and
+        cache this one. Off by default; callers whose output depends only on
+        the request, such as resume summaries, opt in.
+    """
+    if cache:
+        cached = load_cached_completion(messages, stop_when, **params)
+        if cached is not None:
+            return cached
+
+    deltas = stream_chat_completion(messages, **params)
+    text = ""
+    try:
+        for content in deltas:
+            text += content
+            if stop_when is not None and stop_when(text):
+                break
+    finally:
+        deltas.close()
+
+    if cache:
+        store_completion(text, messages, stop_when, **params)
+    return text
+
+
+async def create_chat_completion_async(messages, model=DEFAULT_MODEL, temperature=0.5, max_completion_tokens=1024,
+                                       top_p=1, stop=None, **params):
+    """`create_chat_completion` on the shared AsyncGroq client."""
+    async def request():
+        return await get_async_groq_client().chat.completions.with_raw_response.create(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_completion_tokens=max_completion_tokens,
+            top_p=top_p,
+            stop=stop,
+            **params,
+        )
+
+    response = await get_rate_limiter(model).call_async(request, estimate_tokens(messages, max_completion_tokens))
+    if not params.get("stream"):
+        record_token_usage(model, getattr(response, "usage", None))
+    return response
+
+
+async def stream_chat_completion_async(messages, **params):
+    """Async `stream_chat_completion`: yields the response text delta by delta."""
+    stream = await create_chat_completion_async(messages, stream=True, **params)
+    try:
+        async for chunk in stream:
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq is not None:
+                record_token_usage(params.get("model", DEFAULT_MODEL), getattr(x_groq, "usage", None))
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
+    finally:
+        await stream.close()
+
+
+async def chat_completion_text_async(messages, stop_when=None, cache=False, **params):
+    """Async `chat_completion_text`; the cache is read and written in a worker thread."""
+    if cache:
+        cached = await asyncio.to_thread(load_cached_completion, messages, stop_when, **params)
+        if cached is not None:
+            return cached
+
+    deltas = stream_chat_completion_async(messages, **params)
+    text = ""
+    try:
+        async for content in deltas:
+            text += content
+            if stop_when is not None and stop_when(text):
+                break
+    finally:
+        await deltas.aclose()
+
+    if cache:
+        await asyncio.to_thread(store_completion, text, messages, stop_when, **params)
+    return text
@@ -0,0 +1,50 @@
+import os
+import random
+import logging
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Fraction of verbose payload logs (documents, transcripts, reports) that are written
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.05"))
+# Payloads are cut to this many characters in the logs
+LOG_PREVIEW_CHARS = int(os.getenv("LOG_PREVIEW_CHARS", "300"))
+
+_configured = False
+
+
+def get_logger(name):
+    """Return a logger for `name`, configuring the root handler on first use."""
+    global _configured
+    if not _configured:
+        logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+        _configured = True
+    return logging.getLogger(name)
+
+
+class _Preview:
+    """Shortened payload; only formatted if the log record is actually written."""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        text = str(self.value)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... ({len(text) - self.limit} more characters)"
+
+
+def preview(value, limit=LOG_PREVIEW_CHARS):
+    """
+    Shorten a payload for logging, noting how much was left out. The payload
+    is formatted lazily, so a dropped `log_sampled` record costs nothing.
+    """
+    return _Preview(value, limit)
+
+
+def log_sampled(logger, level, message, *args, rate=LOG_SAMPLE_RATE):
+    """Log only a `rate` fraction of calls, for payloads too large to log every time."""
+    if logger.isEnabledFor(level) and random.random() < rate:
+        logger.log(level, message, *args)
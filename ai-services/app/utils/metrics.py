@@ -0,0 +1,230 @@
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) for latency histograms: from a cached Mongo read up to a slow Vision OCR job
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. errors or tokens."""
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. messages in flight."""
+    type = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets, e.g. stage latencies."""
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels):
+        return self._values.get(self._key(labels), (None, 0.0, 0))[2]
+
+    def _samples(self):
+        lines = []
+        for key, (counts, total, count) in self._values.items():
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts + [count]):
+                labels = _format_labels(self.labelnames + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def register(metric):
+    with _registry_lock:
+        _registry.append(metric)
+    return metric
+
+
+def render_metrics():
+    """All registered metrics in the Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = list(_registry)
+    return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+# Prometheus text exposition format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are frequent; keep them out of the worker logs
+        pass
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """
+    Serve this process's metrics at http://<host>:<port>/metrics from a daemon
+    thread. For processes without the Flask app, such as consumer workers,
+    whose metrics the API's /metrics cannot see. Returns the server.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"metrics-server-{port}", daemon=True).start()
+    return server
+
+
+STAGE_LATENCY = register(Histogram(
+    "ai_services_stage_duration_seconds", "Time spent in each processing stage.", ["stage"]))
+STAGE_ERRORS = register(Counter(
+    "ai_services_stage_errors_total", "Exceptions raised by each processing stage.", ["stage"]))
+QUEUE_LAG = register(Histogram(
+    "ai_services_queue_lag_seconds", "Time from publishing a message to a worker picking it up.", ["queue"]))
+MESSAGES_IN_FLIGHT = register(Gauge(
+    "ai_services_messages_in_flight", "Messages received but not yet acknowledged.", ["queue"]))
+MESSAGES_PROCESSED = register(Counter(
+    "ai_services_messages_total", "Messages settled, by outcome (ack, retry or dead_letter).", ["queue", "outcome"]))
+LLM_TOKENS = register(Counter(
+    "ai_services_llm_tokens_total", "Tokens reported by the LLM API, by model and kind.", ["model", "kind"]))
+LLM_CACHE_LOOKUPS = register(Counter(
+    "ai_services_llm_cache_lookups_total", "LLM response cache lookups, by outcome (hit or miss).", ["outcome"]))
+RESUME_TOKENS = register(Counter(
+    "ai_services_resume_tokens_total", "Estimated resume text tokens, before and after compaction.", ["kind"]))
+
+
+# Trace ID of the message being processed, carried into worker threads with `propagate_trace`
+_trace_id = contextvars.ContextVar("trace_id", default=None)
+
+
+@contextmanager
+def trace(trace_id=None):
+    """Run the enclosed block under a trace ID, so its spans can be correlated in the logs."""
+    token = _trace_id.set(trace_id or uuid.uuid4().hex[:16])
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
+
+
+def current_trace_id():
+    return _trace_id.get()
+
+
+def propagate_trace(func):
+    """Wrap `func` to run under the caller's trace ID, for handing work to a thread pool."""
+    trace_id = current_trace_id()
+
+    def run(*args, **kwargs):
+        token = _trace_id.set(trace_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _trace_id.reset(token)
+
+    return run
+
+
+@contextmanager
+def span(stage):
+    """
+    Time the enclosed block as `stage`: records its latency, counts it as an
+    error if it raises, and logs the span at debug level with the trace ID.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.observe(elapsed, stage=stage)
+        logger.debug("trace=%s stage=%s duration=%.3fs", current_trace_id(), stage, elapsed)
+
+
+def record_token_usage(model, usage):
+    """Count the tokens of a completion's `usage` object, if the API reported one."""
+    if usage is None:
+        return
+    for kind in ("prompt", "completion"):
+        tokens = getattr(usage, f"{kind}_tokens", None)
+        if tokens:
+            LLM_TOKENS.inc(tokens, model=model, kind=kind)
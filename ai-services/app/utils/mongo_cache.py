@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+from pymongo import ASCENDING
+from app import get_app
+
+
+class MongoLRUCache:
+    """
+    Mongo collection used as a shared cache: documents keyed by `_id`, read
+    and written through `get` and `put`, with least recently used entries
+    evicted once the collection grows past a size bound.
+
+    With `ttl_seconds`, entries are also removed that long after they were
+    written, however often they are read.
+    """
+
+    def __init__(self, collection_name, ttl_seconds=None):
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+        self._indexes_created = False
+
+    def collection(self):
+        collection = get_app().config['MONGO'].db[self.collection_name]
+        if not self._indexes_created:
+            if self.ttl_seconds:
+                collection.create_index([("createdAt", ASCENDING)], expireAfterSeconds=self.ttl_seconds)
+            collection.create_index([("lastAccessedAt", ASCENDING)])
+            self._indexes_created = True
+        return collection
+
+    def get(self, key, field="text"):
+        """Return `field` of the entry for `key` and refresh its LRU position, or None."""
+        document = self.collection().find_one_and_update(
+            {"_id": key},
+            {"$set": {"lastAccessedAt": datetime.now(timezone.utc)}, "$inc": {"hits": 1}},
+            projection={field: 1},
+        )
+        if document:
+            return document[field]
+        return None
+
+    def put(self, key, fields, max_entries):
+        """Store `fields` as the entry for `key` and evict the least recently used overflow."""
+        now = datetime.now(timezone.utc)
+        collection = self.collection()
+        collection.update_one(
+            {"_id": key},
+            {
+                "$set": {**fields, "lastAccessedAt": now},
+                "$setOnInsert": {"createdAt": now, "hits": 0},
+            },
+            upsert=True,
+        )
+        evict_lru(collection, max_entries)
+
+
+def evict_lru(collection, max_entries):
+    """Delete the least recently used entries above `max_entries`."""
+    overflow = collection.estimated_document_count() - max_entries
+    if overflow <= 0:
+        return
+
+    stale_ids = [
+        document["_id"]
+        for document in collection.find({}, {"_id": 1}).sort("lastAccessedAt", ASCENDING).limit(overflow)
+    ]
+    if stale_ids:
+        collection.delete_many({"_id": {"$in": stale_ids}})
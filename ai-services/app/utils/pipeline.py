@@ -0,0 +1,135 @@
+import time
+import asyncio
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from app.utils.metrics import span, propagate_trace
+
+# A pipeline stage: `func` receives the results gathered so far (a dict keyed by
+# stage name, plus the initial context) and returns this stage's output.
+Stage = namedtuple("Stage", ["name", "func", "depends_on"])
+
+
+def validate_stages(stages):
+    """
+    Check that stage names are unique and that every dependency refers to a
+    stage declared earlier in the list (which also rules out cycles).
+    """
+    seen = set()
+    for stage in stages:
+        if stage.name in seen:
+            raise ValueError(f"Duplicate pipeline stage: {stage.name}")
+        missing = [dep for dep in stage.depends_on if dep not in seen]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {', '.join(missing)}")
+        seen.add(stage.name)
+
+
+def _timed_call(stage, results):
+    started = time.perf_counter()
+    with span(stage.name):
+        output = stage.func(results)
+    return output, time.perf_counter() - started
+
+
+def run_pipeline(stages, context=None, max_workers=None, completed=None, on_stage_complete=None):
+    """
+    Run `stages` as a dependency graph, starting every stage as soon as all of
+    its dependencies have finished, so independent stages run concurrently.
+
+    :param stages: List of Stage tuples in a valid topological order.
+    :param context: Initial values made available to every stage.
+    :param max_workers: Thread pool size, defaults to the number of stages.
+    :param completed: Outputs of stages finished by an earlier run, keyed by
+        stage name. Those stages are not run again.
+    :param on_stage_complete: Called as on_stage_complete(name, output) from
+        the calling thread after each stage that ran.
+    :return: Tuple of (results, timings) where timings maps stage name to
+        seconds for the stages that ran.
+    :raises Exception: The first exception raised by any stage.
+    """
+    validate_stages(stages)
+
+    completed = {name: output for name, output in (completed or {}).items()
+                 if name in {stage.name for stage in stages}}
+    results = dict(context or {})
+    results.update(completed)
+    finished = set(completed)
+    timings = {}
+    pending = [stage for stage in stages if stage.name not in finished]
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1,
+                            thread_name_prefix="pipeline") as executor:
+        while pending or running:
+            for stage in [s for s in pending if all(dep in finished for dep in s.depends_on)]:
+                pending.remove(stage)
+                # Each stage gets a snapshot so it never sees a dict being mutated
+                running[executor.submit(propagate_trace(_timed_call), stage, dict(results))] = stage
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    output, elapsed = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+                results[stage.name] = output
+                timings[stage.name] = elapsed
+                finished.add(stage.name)
+                if on_stage_complete:
+                    on_stage_complete(stage.name, output)
+
+    return results, timings
+
+
+async def _timed_call_async(stage, results):
+    started = time.perf_counter()
+    with span(stage.name):
+        output = await stage.func(results)
+    return output, time.perf_counter() - started
+
+
+async def run_pipeline_async(stages, context=None, completed=None, on_stage_complete=None):
+    """
+    `run_pipeline` for stages whose `func` is a coroutine function. Ready
+    stages run as concurrent tasks on the current event loop.
+
+    :param on_stage_complete: Coroutine function awaited as
+        on_stage_complete(name, output) after each stage that ran.
+    :return: Tuple of (results, timings), as for `run_pipeline`.
+    :raises Exception: The first exception raised by any stage; the stages
+        still running are cancelled.
+    """
+    validate_stages(stages)
+
+    completed = {name: output for name, output in (completed or {}).items()
+                 if name in {stage.name for stage in stages}}
+    results = dict(context or {})
+    results.update(completed)
+    finished = set(completed)
+    timings = {}
+    pending = [stage for stage in stages if stage.name not in finished]
+    running = {}
+
+    try:
+        while pending or running:
+            for stage in [s for s in pending if all(dep in finished for dep in s.depends_on)]:
+                pending.remove(stage)
+                running[asyncio.create_task(_timed_call_async(stage, dict(results)))] = stage
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                stage = running.pop(task)
+                output, elapsed = task.result()
+                results[stage.name] = output
+                timings[stage.name] = elapsed
+                finished.add(stage.name)
+                if on_stage_complete:
+                    await on_stage_complete(stage.name, output)
+    finally:
+        for task in running:
+            task.cancel()
+
+    return results, timings
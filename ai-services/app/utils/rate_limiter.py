@@ -0,0 +1,351 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import threading
+from groq import Stream, AsyncStream, RateLimitError, InternalServerError, APIConnectionError
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# Starting per-model limits, used until the API's rate-limit headers say otherwise.
+# Override with GROQ_RATE_LIMITS='{"model": {"rpm": 30, "tpm": 12000}}'.
+DEFAULT_RATE_LIMITS = {
+    "llama-3.3-70b-versatile": {"rpm": 30, "tpm": 12000},
+    "whisper-large-v3-turbo": {"rpm": 20, "tpm": None},
+}
+FALLBACK_RATE_LIMIT = {"rpm": 30, "tpm": 6000}
+RATE_LIMITS = {**DEFAULT_RATE_LIMITS, **json.loads(os.getenv("GROQ_RATE_LIMITS", "{}"))}
+
+# AIMD bounds for requests in flight per model
+GROQ_MIN_CONCURRENCY = int(os.getenv("GROQ_MIN_CONCURRENCY", "1"))
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "16"))
+GROQ_INITIAL_CONCURRENCY = int(os.getenv("GROQ_INITIAL_CONCURRENCY", "4"))
+
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+# Errors worth retrying; everything else is raised to the caller immediately
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+
+def parse_duration(value):
+    """
+    Parse the reset durations Groq sends, e.g. "7.66s", "2m59.56s" or "120ms".
+    Returns seconds as a float, or None if `value` is missing or unparseable.
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    scale = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously to `capacity` per `period` seconds.
+
+    `reserve` always succeeds and returns how long the caller must wait before
+    using its reservation; the balance may go negative, which makes later
+    callers queue up behind earlier ones instead of racing them.
+    """
+
+    def __init__(self, capacity, period=60.0, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount):
+        self._refill()
+        self._tokens -= min(amount, self.capacity)
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def sync(self, remaining, reset_seconds=None):
+        """Lower the local balance to what the server reports as remaining."""
+        self._refill()
+        if remaining is not None:
+            self._tokens = min(self._tokens, remaining)
+        if reset_seconds is not None and remaining is not None and remaining <= 0:
+            self.pause(reset_seconds)
+
+    def pause(self, seconds):
+        """Make the bucket empty for the next `seconds`."""
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class ReleasingStream:
+    """Iterates a response stream and frees its limiter slot once it is consumed or closed."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            try:
+                self._stream.close()
+            finally:
+                self._release()
+
+
+class AsyncReleasingStream:
+    """Async `ReleasingStream`, for the streams of the AsyncGroq client."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        finally:
+            await self.close()
+
+    async def close(self):
+        if not self._released:
+            self._released = True
+            try:
+                await self._stream.close()
+            finally:
+                self._release()
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ModelRateLimiter:
+    """
+    Client-side limiter for one model: request and token buckets per minute,
+    kept in sync with the API's rate-limit headers, plus an AIMD concurrency
+    limit that grows by one per window of successful calls and halves whenever
+    the API pushes back.
+    """
+
+    def __init__(self, model, requests_per_minute, tokens_per_minute=None,
+                 initial_concurrency=GROQ_INITIAL_CONCURRENCY, min_concurrency=GROQ_MIN_CONCURRENCY,
+                 max_concurrency=GROQ_MAX_CONCURRENCY, clock=time.monotonic, sleep=time.sleep):
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute, clock=clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency_limit = float(min(max(initial_concurrency, min_concurrency), max_concurrency))
+        self.in_flight = 0
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._slots = threading.Condition(self._lock)
+        # (loop, future) of coroutines waiting for a slot, woken by `release`
+        self._async_waiters = []
+
+    def _take_slot(self, estimated_tokens):
+        # Called with the lock held; returns how long to wait for the rate budget
+        self.in_flight += 1
+        wait = self.requests.reserve(1)
+        if self.tokens and estimated_tokens:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        return wait
+
+    def acquire(self, estimated_tokens=0):
+        """Block until a concurrency slot and the rate budget for one call are available."""
+        with self._slots:
+            while self.in_flight >= int(self.concurrency_limit):
+                self._slots.wait()
+            wait = self._take_slot(estimated_tokens)
+        if wait > 0:
+            self._sleep(wait)
+
+    async def acquire_async(self, estimated_tokens=0):
+        """`acquire` for coroutines: waits without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._slots:
+                if self.in_flight < int(self.concurrency_limit):
+                    wait = self._take_slot(estimated_tokens)
+                    break
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                await waiter[1]
+            finally:
+                with self._slots:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def release(self, throttled=False):
+        """Free a slot; additive increase on success, multiplicative decrease when throttled."""
+        with self._slots:
+            self.in_flight -= 1
+            if throttled:
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+            else:
+                self.concurrency_limit = min(self.max_concurrency,
+                                             self.concurrency_limit + 1 / self.concurrency_limit)
+            self._slots.notify_all()
+            # Slots are released from worker threads as well as from the waiters' own loops
+            for loop, future in self._async_waiters:
+                loop.call_soon_threadsafe(_wake, future)
+            self._async_waiters.clear()
+
+    def update_from_headers(self, headers):
+        """
+        Sync the buckets with the x-ratelimit-* headers of a response.
+        Returns the retry-after delay in seconds if the response carried one.
+        """
+        if headers is None:
+            return None
+
+        def number(name):
+            try:
+                return float(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        retry_after = parse_duration(headers.get("retry-after"))
+        with self._lock:
+            self.requests.sync(number("x-ratelimit-remaining-requests"),
+                               parse_duration(headers.get("x-ratelimit-reset-requests")))
+            if self.tokens:
+                self.tokens.sync(number("x-ratelimit-remaining-tokens"),
+                                 parse_duration(headers.get("x-ratelimit-reset-tokens")))
+            if retry_after:
+                self.requests.pause(retry_after)
+        return retry_after
+
+    def backoff(self, attempt, retry_after=None):
+        """Exponential backoff with full jitter, never shorter than the server's retry-after."""
+        delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+        return max(delay, retry_after or 0)
+
+    def _retry_delay(self, error, attempt, max_retries):
+        """
+        Release the slot of an attempt that failed with a retryable error and
+        return how long to wait before the next one, or None once retries are
+        exhausted.
+        """
+        self.release(throttled=True)
+        response = getattr(error, "response", None)
+        retry_after = self.update_from_headers(response.headers if response is not None else None)
+        if attempt == max_retries:
+            return None
+        delay = self.backoff(attempt, retry_after)
+        logger.warning("%s request failed (%s), retrying in %.1fs (%s/%s)",
+                       self.model, error.__class__.__name__, delay, attempt + 1, max_retries)
+        return delay
+
+    def call(self, request, estimated_tokens=0, max_retries=RATE_LIMIT_MAX_RETRIES):
+        """
+        Run `request`, a callable returning a raw API response (the
+        `with_raw_response` variant of an SDK method), within the limits.
+
+        Rate-limit, server and connection errors are retried with jittered
+        backoff. Returns the parsed response; streams are wrapped so the
+        concurrency slot is held until the stream is consumed or closed.
+        """
+        for attempt in range(max_retries + 1):
+            self.acquire(estimated_tokens)
+            try:
+                raw_response = request()
+            except RETRYABLE_ERRORS as e:
+                delay = self._retry_delay(e, attempt, max_retries)
+                if delay is None:
+                    raise
+                self._sleep(delay)
+                continue
+            except Exception:
+                self.release()
+                raise
+
+            try:
+                self.update_from_headers(raw_response.headers)
+                result = raw_response.parse()
+            except Exception:
+                self.release()
+                raise
+
+            if isinstance(result, Stream):
+                return ReleasingStream(result, self.release)
+            self.release()
+            return result
+
+    async def call_async(self, request, estimated_tokens=0, max_retries=RATE_LIMIT_MAX_RETRIES):
+        """
+        `call` for the AsyncGroq client: `request` is a coroutine function
+        returning a raw API response, whose `parse` is awaited.
+        """
+        for attempt in range(max_retries + 1):
+            await self.acquire_async(estimated_tokens)
+            try:
+                raw_response = await request()
+            except RETRYABLE_ERRORS as e:
+                delay = self._retry_delay(e, attempt, max_retries)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.release()
+                raise
+
+            try:
+                self.update_from_headers(raw_response.headers)
+                result = await raw_response.parse()
+            except BaseException:
+                self.release()
+                raise
+
+            if isinstance(result, AsyncStream):
+                return AsyncReleasingStream(result, self.release)
+            self.release()
+            return result
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model):
+    """Return the process-wide limiter for `model`, creating it on first use."""
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            limits = RATE_LIMITS.get(model, FALLBACK_RATE_LIMIT)
+            limiter = ModelRateLimiter(model, limits["rpm"], limits.get("tpm"))
+            _limiters[model] = limiter
+        return limiter
+
+
+def estimate_tokens(messages, max_completion_tokens=0):
+    """Rough token estimate for budgeting (about four characters per token)."""
+    prompt_chars = sum(len(message.get("content") or "") for message in messages)
+    return prompt_chars // 4 + max_completion_tokens
@@ -0,0 +1,34 @@
+import os
+import json
+import hashlib
+from app.utils.mongo_cache import MongoLRUCache
+
+# Chat completion texts keyed by a hash of the whole request, see `response_cache_key`
+RESPONSE_CACHE_COLLECTION = "llm_response_cache"
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+# Entries are removed this long after they were written, however often they are read
+RESPONSE_CACHE_TTL_DAYS = int(os.getenv("RESPONSE_CACHE_TTL_DAYS", "7"))
+# Least recently used entries are evicted once the collection grows past this size
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "20000"))
+
+_cache = MongoLRUCache(RESPONSE_CACHE_COLLECTION, ttl_seconds=RESPONSE_CACHE_TTL_DAYS * 24 * 3600)
+
+
+def response_cache_key(request):
+    """
+    Hash a chat completion request: its messages, model and every sampling
+    parameter. Keys are computed from canonical JSON, so the order of the
+    parameters does not matter.
+    """
+    payload = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_response(key):
+    """Return the cached response text for `key` and refresh its LRU position, or None."""
+    return _cache.get(key)
+
+
+def store_response(key, text, model, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+    """Store the response text for `key` and evict the least recently used overflow."""
+    _cache.put(key, {"text": text, "model": model}, max_entries)
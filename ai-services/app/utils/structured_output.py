@@ -0,0 +1,184 @@
+import os
+import json
+import asyncio
+from app.utils.llm import (
+    create_chat_completion, chat_completion_text, create_chat_completion_async, chat_completion_text_async,
+    load_cached_completion, store_completion,
+)
+from app.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# How many times a single malformed response is re-requested before giving up
+STRUCTURED_OUTPUT_RETRIES = int(os.getenv("STRUCTURED_OUTPUT_RETRIES", "2"))
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a model response does not match the expected structure."""
+
+
+def parse_json_object(text):
+    """
+    Parse a JSON object from a model response, tolerating surrounding text
+    such as markdown code fences.
+
+    :raises StructuredOutputError: If no JSON object can be parsed.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise StructuredOutputError(f"No JSON object found in response: {text[:200]!r}")
+    try:
+        value = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Invalid JSON in response: {e}") from e
+    if not isinstance(value, dict):
+        raise StructuredOutputError("Response is not a JSON object")
+    return value
+
+
+def json_object_closed(text):
+    """
+    True once `text` contains a complete top-level JSON object. Used as the
+    `stop_when` of streamed calls, so anything the model adds after the object
+    is never read.
+    """
+    start = text.find("{")
+    if start == -1:
+        return False
+
+    depth = 0
+    in_string = escaped = False
+    for char in text[start:]:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return True
+    return False
+
+
+def require_score(value, field="score"):
+    """
+    Validate a 0-100 score and return it as an int.
+
+    :raises StructuredOutputError: If `value` is not a number in range.
+    """
+    if isinstance(value, str) and value.strip().rstrip("%").strip().isdigit():
+        value = int(value.strip().rstrip("%"))
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 100:
+        raise StructuredOutputError(f"Invalid {field}: {value!r}")
+    return int(round(value))
+
+
+def require_text(value, field):
+    """
+    Validate a non-empty string field and return it.
+
+    :raises StructuredOutputError: If `value` is not a non-empty string.
+    """
+    if not isinstance(value, str) or not value.strip():
+        raise StructuredOutputError(f"Missing or empty {field}")
+    return value
+
+
+def structured_chat_completion(messages, parse, json_mode=True, stop_when=None, retries=STRUCTURED_OUTPUT_RETRIES,
+                               cache=False, **params):
+    """
+    Request a completion and validate it with `parse`, re-sending only this
+    request when the response is malformed.
+
+    :param parse: Callable that takes the response text and returns the
+        validated value, raising StructuredOutputError when it is malformed.
+    :param json_mode: Ask the API for a JSON object. The prompt must mention
+        JSON, and JSON mode responses are not streamed.
+    :param stop_when: For streamed (non JSON mode) calls, stop reading once
+        it returns True for the text so far, e.g. `json_object_closed`.
+    :param retries: Extra attempts after the first malformed response.
+    :param cache: Reuse the response of an identical earlier request. Only
+        responses that `parse` accepted are cached. Off by default, see
+        `chat_completion_text`.
+    :raises StructuredOutputError: If every attempt is malformed.
+    """
+    if json_mode:
+        params = dict(params, response_format={"type": "json_object"})
+
+    if cache:
+        value = _parse_cached(load_cached_completion(messages, stop_when, **params), parse)
+        if value is not None:
+            return value
+
+    for attempt in range(retries + 1):
+        if json_mode:
+            response = create_chat_completion(messages, **params)
+            text = response.choices[0].message.content or ""
+        else:
+            text = chat_completion_text(messages, stop_when=stop_when, cache=False, **params)
+
+        try:
+            value = parse(text)
+        except StructuredOutputError as e:
+            if attempt == retries:
+                raise
+            logger.warning("Malformed model response (%s), retrying (%s/%s)", e, attempt + 1, retries)
+            continue
+
+        if cache:
+            store_completion(text, messages, stop_when, **params)
+        return value
+
+
+def _parse_cached(text, parse):
+    # A cached response the current `parse` rejects (e.g. after a validation change) is re-requested
+    if text is None:
+        return None
+    try:
+        return parse(text)
+    except StructuredOutputError:
+        return None
+
+
+async def structured_chat_completion_async(messages, parse, json_mode=True, stop_when=None,
+                                           retries=STRUCTURED_OUTPUT_RETRIES, cache=False, **params):
+    """Async `structured_chat_completion`; the cache is read and written in a worker thread."""
+    if json_mode:
+        params = dict(params, response_format={"type": "json_object"})
+
+    if cache:
+        cached = await asyncio.to_thread(load_cached_completion, messages, stop_when, **params)
+        value = _parse_cached(cached, parse)
+        if value is not None:
+            return value
+
+    for attempt in range(retries + 1):
+        if json_mode:
+            response = await create_chat_completion_async(messages, **params)
+            text = response.choices[0].message.content or ""
+        else:
+            text = await chat_completion_text_async(messages, stop_when=stop_when, cache=False, **params)
+
+        try:
+            value = parse(text)
+        except StructuredOutputError as e:
+            if attempt == retries:
+                raise
+            logger.warning("Malformed model response (%s), retrying (%s/%s)", e, attempt + 1, retries)
+            continue
+
+        if cache:
+            await asyncio.to_thread(store_completion, text, messages, stop_when, **params)
+        return value
+
+
+def json_fields(validate):
+    """Build a `parse` callable that parses a JSON object and passes it to `validate`."""
+    return lambda text: validate(parse_json_object(text))
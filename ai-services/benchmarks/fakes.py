@@ -0,0 +1,425 @@
+"""
+In-process stand-ins for Groq, Google Vision, Google Cloud Storage and
+RabbitMQ, with configurable latency and error injection, used by the
+benchmark harness.
+"""
+import re
+import time
+import json
+import base64
+import random
+import hashlib
+import threading
+from collections import deque
+from types import SimpleNamespace
+
+import httpx
+from groq import RateLimitError, InternalServerError
+from google.api_core.exceptions import ServiceUnavailable
+from google.cloud import vision
+
+
+class Latency:
+    """Sleeps for `mean_ms` milliseconds, +/- `jitter` of it, on each call."""
+
+    def __init__(self, mean_ms=0.0, jitter=0.2, rng=None):
+        self.mean = mean_ms / 1000
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+
+    def __call__(self):
+        if self.mean > 0:
+            time.sleep(self.rng.uniform(self.mean * (1 - self.jitter), self.mean * (1 + self.jitter)))
+
+
+class Faults:
+    """Decides, with probability `rate`, that a call should fail."""
+
+    def __init__(self, rate=0.0, rng=None):
+        self.rate = rate
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            return self.rate > 0 and self.rng.random() < self.rate
+
+
+def _groq_error(rng):
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    if rng.random() < 0.5:
+        response = httpx.Response(429, headers={"retry-after": "0"}, request=request)
+        return RateLimitError("Injected rate limit", response=response, body=None)
+    response = httpx.Response(500, request=request)
+    return InternalServerError("Injected server error", response=response, body=None)
+
+
+# ---------------------------------------------------------------------------
+# Groq
+# ---------------------------------------------------------------------------
+
+QUESTIONS = " // ".join(f"Can you describe your experience with topic number {index}?" for index in range(1, 11))
+
+DIGEST = {
+    "title": "Machine Learning Engineer",
+    "seniority": "2+ years",
+    "skills": ["Python", "PyTorch", "Computer Vision"],
+    "responsibilities": ["Train and deploy vision models"],
+    "qualifications": ["Bachelor's degree in Computer Science"],
+    "preferred": ["Edge deployment"],
+}
+
+SUMMARY = "## 1. **Candidate Details**\n- Benchmark Candidate\n\n## 6. **Skills**\n- Python, PyTorch, OpenCV\n" * 4
+
+
+def fake_completion_text(messages):
+    """Plausible output for each prompt the service sends, chosen by its system prompt."""
+    system = messages[0]["content"] if messages else ""
+    user = messages[-1]["content"] if messages else ""
+
+    if '"scores"' in system:
+        count = len(re.findall(r"^Pair \d+:", user, re.MULTILINE))
+        return json.dumps({"scores": [70 + index % 20 for index in range(count)]})
+    if '"score": 72' in system:
+        return '{"score": 72} The candidate answered clearly and gave relevant examples.'
+    if "interview question generator" in system:
+        return QUESTIONS
+    if "job description analyst" in system:
+        return json.dumps(DIGEST)
+    if "evaluating the compatibility" in system:
+        return json.dumps({"score": 68, "summary": "**Keyword Optimization:** Good coverage of Python and vision."})
+    return SUMMARY
+
+
+class _RawResponse:
+    """Mimics the `with_raw_response` wrapper: rate-limit headers plus a lazily parsed body."""
+
+    def __init__(self, parse):
+        self.headers = {"x-ratelimit-remaining-requests": "100000", "x-ratelimit-remaining-tokens": "100000000"}
+        self._parse = parse
+
+    def parse(self):
+        return self._parse()
+
+
+class FakeChatStream:
+    def __init__(self, text, usage, token_latency):
+        self._text = text
+        self._usage = usage
+        self._token_latency = token_latency
+        self.closed = False
+
+    def __iter__(self):
+        # Roughly four characters per token, like the real stream
+        for start in range(0, len(self._text), 4):
+            if self.closed:
+                return
+            self._token_latency()
+            delta = SimpleNamespace(content=self._text[start:start + 4])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], x_groq=None)
+        yield SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=self._usage))
+
+    def close(self):
+        self.closed = True
+
+
+class FakeGroq:
+    """
+    Enough of the Groq client for the service: chat completions (streamed and
+    JSON mode) and audio transcriptions, through `with_raw_response`.
+    """
+
+    def __init__(self, latency_ms=0.0, token_latency_ms=0.0, transcription_latency_ms=0.0, error_rate=0.0,
+                 seed=None):
+        rng = random.Random(seed)
+        self.latency = Latency(latency_ms, rng=rng)
+        self.token_latency = Latency(token_latency_ms, rng=rng)
+        self.transcription_latency = Latency(transcription_latency_ms, rng=rng)
+        self.faults = Faults(error_rate, rng=rng)
+        self.rng = rng
+        self.calls = 0
+        self._lock = threading.Lock()
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(
+            with_raw_response=SimpleNamespace(create=self._create_chat_completion)))
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(
+            with_raw_response=SimpleNamespace(create=self._create_transcription)))
+
+    def _begin_call(self, latency):
+        with self._lock:
+            self.calls += 1
+        latency()
+        if self.faults():
+            raise _groq_error(self.rng)
+
+    def _create_chat_completion(self, messages, stream=False, **params):
+        self._begin_call(self.latency)
+        text = fake_completion_text(messages)
+        usage = SimpleNamespace(
+            prompt_tokens=sum(len(message["content"]) for message in messages) // 4,
+            completion_tokens=len(text) // 4,
+        )
+
+        if stream:
+            return _RawResponse(lambda: FakeChatStream(text, usage, self.token_latency))
+        message = SimpleNamespace(content=text)
+        return _RawResponse(lambda: SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage))
+
+    def _create_transcription(self, file, **params):
+        self._begin_call(self.transcription_latency)
+        name, audio = file
+        size = len(audio.read() if hasattr(audio, "read") else audio)
+        text = f"I worked on this in my last project ({size} bytes of audio)."
+        return _RawResponse(lambda: SimpleNamespace(text=text))
+
+
+# ---------------------------------------------------------------------------
+# Google Cloud Storage and Vision
+# ---------------------------------------------------------------------------
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+
+    @property
+    def _object(self):
+        return self.bucket.objects.get(self.name)
+
+    @property
+    def md5_hash(self):
+        return base64.b64encode(hashlib.md5(self._object["data"]).digest()).decode()
+
+    @property
+    def generation(self):
+        return self._object["generation"]
+
+    @property
+    def size(self):
+        return len(self._object["data"])
+
+    def _read(self):
+        self.bucket.client.latency()
+        if self.bucket.client.faults():
+            raise ServiceUnavailable("Injected GCS error")
+        if self._object is None:
+            raise FileNotFoundError(self.name)
+        return self._object["data"]
+
+    def download_as_bytes(self):
+        return self._read()
+
+    def download_to_file(self, file):
+        file.write(self._read())
+
+    def download_to_filename(self, filename):
+        with open(filename, "wb") as file:
+            file.write(self._read())
+
+    def upload_from_string(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.bucket.put(self.name, data)
+
+    def delete(self):
+        self.bucket.objects.pop(self.name, None)
+
+
+class FakeBucket:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.objects = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def put(self, name, data):
+        with self._lock:
+            self._generation += 1
+            self.objects[name] = {"data": data, "generation": self._generation}
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def get_blob(self, name):
+        return FakeBlob(self, name) if name in self.objects else None
+
+    def list_blobs(self, prefix=""):
+        with self._lock:
+            names = [name for name in self.objects if name.startswith(prefix)]
+        return [FakeBlob(self, name) for name in names]
+
+
+class FakeStorageClient:
+    def __init__(self, latency_ms=0.0, error_rate=0.0, seed=None):
+        rng = random.Random(seed)
+        self.latency = Latency(latency_ms, rng=rng)
+        self.faults = Faults(error_rate, rng=rng)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, name):
+        with self._lock:
+            if name not in self._buckets:
+                self._buckets[name] = FakeBucket(self, name)
+            return self._buckets[name]
+
+    def put(self, gcs_uri, data):
+        bucket_name, _, object_name = gcs_uri[len("gs://"):].partition("/")
+        self.bucket(bucket_name).put(object_name, data)
+
+
+class FakeVisionClient:
+    """
+    `async_batch_annotate_files` that "OCRs" the source object by decoding its
+    bytes as text and writes the result as a Vision output shard to storage.
+    """
+
+    def __init__(self, storage_client, latency_ms=0.0, seed=None):
+        self.storage_client = storage_client
+        self.latency = Latency(latency_ms, rng=random.Random(seed))
+
+    def async_batch_annotate_files(self, requests):
+        def result(timeout=None):
+            self.latency()
+            for request in requests:
+                source = request.input_config.gcs_source.uri
+                bucket_name, _, object_name = source[len("gs://"):].partition("/")
+                text = self.storage_client.bucket(bucket_name).objects[object_name]["data"].decode("utf-8")
+
+                response = vision.AnnotateFileResponse(responses=[
+                    vision.AnnotateImageResponse(full_text_annotation=vision.TextAnnotation(text=text))
+                ])
+                destination = request.output_config.gcs_destination.uri
+                self.storage_client.put(destination + "output-1-to-1.json",
+                                        vision.AnnotateFileResponse.to_json(response).encode("utf-8"))
+
+        return SimpleNamespace(result=result)
+
+
+# ---------------------------------------------------------------------------
+# RabbitMQ
+# ---------------------------------------------------------------------------
+
+class InMemoryBroker:
+    """
+    Queues with a per-queue prefetch limit, manual acks, requeue on nack and
+    the consumer's retry / dead letter queues, standing in for RabbitMQ.
+    Records when each message was finally settled.
+    """
+
+    def __init__(self, prefetch=2):
+        self.prefetch = prefetch
+        self._queues = {}
+        self._unacked = {}    # delivery tag -> (queue, body, published_at, headers)
+        self._in_flight = {}  # queue -> unacked count
+        self._next_tag = 0
+        self._condition = threading.Condition()
+        self.published = 0
+        self.acked = 0
+        self.retried = 0
+        self.dropped = 0
+        self.dead_lettered = []  # (dead letter queue, body, headers)
+        self.settled_at = {}  # delivery tag -> (queue, latency)
+
+    def publish(self, queue, body, published_at=None, redelivered=False, headers=None):
+        with self._condition:
+            self._queues.setdefault(queue, deque()).append((body, published_at or time.time(), redelivered, headers))
+            self._in_flight.setdefault(queue, 0)
+            if not redelivered:
+                self.published += 1
+            self._condition.notify_all()
+
+    def get(self, timeout=0.05):
+        """Next deliverable message as (queue, method, properties, body), or None."""
+        with self._condition:
+            deadline = time.monotonic() + timeout
+            while True:
+                for queue, messages in self._queues.items():
+                    if messages and self._in_flight[queue] < self.prefetch:
+                        body, published_at, redelivered, headers = messages.popleft()
+                        self._next_tag += 1
+                        self._unacked[self._next_tag] = (queue, body, published_at, headers)
+                        self._in_flight[queue] += 1
+                        method = SimpleNamespace(delivery_tag=self._next_tag, routing_key=queue,
+                                                 redelivered=redelivered)
+                        properties = SimpleNamespace(timestamp=int(published_at), headers=headers)
+                        return queue, method, properties, body
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def _settle(self, delivery_tag):
+        queue, body, published_at, headers = self._unacked.pop(delivery_tag)
+        self._in_flight[queue] -= 1
+        self._condition.notify_all()
+        return queue, body, published_at, headers
+
+    def ack(self, delivery_tag):
+        with self._condition:
+            queue, _, published_at, _ = self._settle(delivery_tag)
+            self.acked += 1
+            self.settled_at[delivery_tag] = (queue, time.time() - published_at)
+
+    def nack(self, delivery_tag, requeue):
+        with self._condition:
+            queue, body, published_at, headers = self._settle(delivery_tag)
+            if requeue:
+                self._queues[queue].append((body, published_at, True, headers))
+            else:
+                self.dropped += 1
+                self.settled_at[delivery_tag] = (queue, time.time() - published_at)
+
+    def move(self, delivery_tag, destination, headers):
+        """Settle a failed message that the consumer republished to its retry or dead letter queue."""
+        with self._condition:
+            queue, body, published_at, _ = self._settle(delivery_tag)
+            if destination.endswith(".dead"):
+                self.dead_lettered.append((destination, body, headers))
+                self.dropped += 1
+                self.settled_at[delivery_tag] = (queue, time.time() - published_at)
+            else:
+                # The retry delay is not simulated: the message goes straight back onto its work queue
+                self.retried += 1
+                self._queues[queue].append((body, published_at, False, headers))
+
+    def finished(self):
+        with self._condition:
+            return self.acked + self.dropped >= self.published
+
+
+class FakeChannel:
+    """
+    The channel methods the consumer calls. It only publishes to move a failed
+    message, right before acking the original, so the two are applied together.
+    """
+    is_open = True
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._moving = None
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        self._moving = (routing_key, properties.headers)
+
+    def basic_ack(self, delivery_tag):
+        moving, self._moving = self._moving, None
+        if moving:
+            self.broker.move(delivery_tag, *moving)
+        else:
+            self.broker.ack(delivery_tag)
+
+    def basic_nack(self, delivery_tag, requeue):
+        self.broker.nack(delivery_tag, requeue)
+
+
+class FakeConnection:
+    """Runs thread-safe callbacks one at a time, like pika's connection thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def add_callback_threadsafe(self, callback):
+        with self._lock:
+            callback()
@@ -0,0 +1,122 @@
+"""
+Cold-start benchmark for a consumer worker.
+
+Starts fresh interpreters and times, for each run, importing the consumer
+module (`import`) and creating the app on top of it (`app`), which is what a
+new worker pays before it can take its first message. Also lists the modules
+with the largest cumulative import time, from `python -X importtime`.
+
+    python -m benchmarks.import_time --runs 5 --target app.rabbitmq_consumer
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Creating the app validates these; the benchmark never talks to the real services
+BENCHMARK_ENV = {
+    "SECRET_KEY": "benchmark",
+    "MONGO_URI": "mongodb://localhost:27017/nextgen-hr-benchmark",
+    "GROQ_API_KEY": "benchmark",
+    "GOOGLE_APPLICATION_CREDENTIALS": "benchmark.json",
+}
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_TIMING_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import {target}
+imported = time.perf_counter()
+from app import get_app
+get_app()
+created = time.perf_counter()
+print(json.dumps({{"import": imported - started, "app": created - started,
+                  "google_loaded": any(name.startswith("google.cloud") for name in sys.modules)}}))
+"""
+
+
+def _environment():
+    env = dict(os.environ)
+    for name, value in BENCHMARK_ENV.items():
+        env.setdefault(name, value)
+    # Time the code, not compiling it: bytecode is written on the first run and reused afterwards
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def time_startup(target="app.rabbitmq_consumer"):
+    """Time one cold start of `target` in a fresh interpreter. Returns the timings in seconds."""
+    output = subprocess.run(
+        [sys.executable, "-c", _TIMING_SCRIPT.format(target=target)],
+        cwd=PROJECT_ROOT, env=_environment(), capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(target="app.rabbitmq_consumer", limit=10):
+    """Modules with the largest cumulative import time, as (module, seconds)."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=PROJECT_ROOT, env=_environment(), capture_output=True, text=True, check=True,
+    ).stderr
+
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            modules.append((name.rstrip(), int(cumulative) / 1e6))
+        except ValueError:
+            continue  # the header line
+    return sorted(modules, key=lambda module: module[1], reverse=True)[:limit]
+
+
+def run_import_benchmark(target="app.rabbitmq_consumer", runs=5, top=10):
+    """Cold-start `target` `runs` times (after one warm-up run that writes bytecode) and report the timings."""
+    time_startup(target)
+    samples = [time_startup(target) for _ in range(runs)]
+    return {
+        "target": target,
+        "runs": runs,
+        "import_seconds": sorted(sample["import"] for sample in samples),
+        "app_seconds": sorted(sample["app"] for sample in samples),
+        "google_sdk_loaded": any(sample["google_loaded"] for sample in samples),
+        "slowest_imports": slowest_imports(target, top),
+    }
+
+
+def format_report(report):
+    def median(values):
+        return values[len(values) // 2] * 1000
+
+    lines = [
+        f"Cold start of {report['target']} over {report['runs']} runs",
+        f"  import:           median {median(report['import_seconds']):.0f} ms, "
+        f"max {report['import_seconds'][-1] * 1000:.0f} ms",
+        f"  import + app:     median {median(report['app_seconds']):.0f} ms, "
+        f"max {report['app_seconds'][-1] * 1000:.0f} ms",
+        f"  Google SDK loaded at import: {'yes' if report['google_sdk_loaded'] else 'no'}",
+        "",
+        f"{'cumulative import time (ms)':>28}  module",
+    ]
+    lines.extend(f"{seconds * 1000:>28.1f}  {module}" for module, seconds in report["slowest_imports"])
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", default="app.rabbitmq_consumer", help="Module a worker imports at startup")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_import_benchmark(args.target, args.runs, args.top)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Offline throughput benchmark for the RabbitMQ consumer.
+
+Drives a fixed workload of job application and interview completed messages
+through the real consumer code (`process_message` in threaded mode, the
+`job_application_callback` / `interview_completed_callback` callbacks in
+inline mode) against in-process fakes: Groq, Vision and Storage from
+`benchmarks.fakes`, mongomock for Mongo and an in-memory broker for RabbitMQ.
+
+Reports messages/sec, p50/p99 latency per stage and per message, error
+counts by stage and the peak RSS of the process. Needs the development
+requirements (`pip install -r requirements-dev.txt`) for mongomock.
+
+    python -m benchmarks.run_benchmark --applications 50 --interviews 50 --groq-latency-ms 300
+"""
+import os
+import json
+import math
+import time
+import argparse
+import resource
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+# Importing `app` validates these; the benchmark never talks to the real services
+for _name, _value in [("SECRET_KEY", "benchmark"), ("MONGO_URI", "mongodb://localhost:27017/nextgen-hr-benchmark"),
+                      ("GROQ_API_KEY", "benchmark"), ("GOOGLE_APPLICATION_CREDENTIALS", "benchmark.json")]:
+    os.environ.setdefault(_name, _value)
+
+import mongomock
+from types import SimpleNamespace
+from bson.objectid import ObjectId
+
+from benchmarks.fakes import FakeGroq, FakeStorageClient, FakeVisionClient, InMemoryBroker, FakeChannel, FakeConnection
+from app.utils import metrics
+
+# pymongo 4.9+ passes `sort` to bulk update builders, which mongomock does not accept yet
+_add_update = mongomock.collection.BulkOperationBuilder.add_update
+if "sort" not in _add_update.__code__.co_varnames:
+    mongomock.collection.BulkOperationBuilder.add_update = (
+        lambda self, *args, sort=None, **kwargs: _add_update(self, *args, **kwargs))
+
+RESUME_BUCKET = "gs://benchmark-resumes"
+AUDIO_BUCKET = "gs://benchmark-audio"
+
+
+class RecordingHistogram(metrics.Histogram):
+    """Histogram that also keeps every observation, for exact percentiles."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.samples = {}
+
+    def observe(self, value, **labels):
+        super().observe(value, **labels)
+        with self._lock:
+            self.samples.setdefault(tuple(labels.values()), []).append(value)
+
+
+@contextmanager
+def fake_environment(groq, storage_client, vision_client, requests_per_minute=1_000_000, response_cache=False):
+    """
+    Point the service at the fakes and a fresh mongomock database, and restore
+    the real clients, caches and metrics afterwards. The LLM response cache is
+    off unless `response_cache` is set: every fake resume gets the same fake
+    summary, so most calls of the workload would be cache hits.
+    """
+    from app import get_app
+    from app.utils import client_pool, rate_limiter, bulk_writer, llm, response_cache as response_cache_module
+    from app.service import jobCache, jobDigest, ocrCache, processingLedger, applicationPipeline
+
+    app = get_app()
+
+    saved_clients = dict(client_pool._clients)
+    saved_limiters = dict(rate_limiter._limiters)
+    saved_writers = dict(bulk_writer._writers)
+    saved_mongo = app.config['MONGO']
+    saved_metrics = metrics.STAGE_LATENCY, metrics.STAGE_ERRORS
+    saved_response_cache = llm.RESPONSE_CACHE_ENABLED
+
+    client_pool._clients.update({
+        "groq": groq,
+        ("vision", client_pool.SERVICE_ACCOUNT_JSON): vision_client,
+        ("storage", client_pool.SERVICE_ACCOUNT_JSON): storage_client,
+    })
+    # Measure the service, not the Groq quota; pass a real quota to include its throttling
+    for model in set(rate_limiter.RATE_LIMITS) | set(rate_limiter._limiters):
+        rate_limiter._limiters[model] = rate_limiter.ModelRateLimiter(
+            model, requests_per_minute, requests_per_minute * 1000)
+    bulk_writer._writers.clear()
+    app.config['MONGO'] = SimpleNamespace(db=mongomock.MongoClient().db)
+    llm.RESPONSE_CACHE_ENABLED = response_cache
+    response_cache_module._cache._indexes_created = False
+    metrics.STAGE_LATENCY = RecordingHistogram(
+        "benchmark_stage_duration_seconds", "Stage latency during the benchmark.", ["stage"])
+    metrics.STAGE_ERRORS = metrics.Counter(
+        "benchmark_stage_errors_total", "Stage errors during the benchmark.", ["stage"])
+    _reset_caches(jobCache, jobDigest, ocrCache, processingLedger, applicationPipeline)
+
+    try:
+        yield app.config['MONGO'].db
+    finally:
+        for writer in bulk_writer._writers.values():
+            writer.close()
+        bulk_writer._writers.clear()
+        bulk_writer._writers.update(saved_writers)
+        client_pool._clients.clear()
+        client_pool._clients.update(saved_clients)
+        rate_limiter._limiters.clear()
+        rate_limiter._limiters.update(saved_limiters)
+        app.config['MONGO'] = saved_mongo
+        metrics.STAGE_LATENCY, metrics.STAGE_ERRORS = saved_metrics
+        llm.RESPONSE_CACHE_ENABLED = saved_response_cache
+        response_cache_module._cache._indexes_created = False
+        _reset_caches(jobCache, jobDigest, ocrCache, processingLedger, applicationPipeline)
+
+
+def _reset_caches(jobCache, jobDigest, ocrCache, processingLedger, applicationPipeline):
+    # Module-level caches and "index already created" flags refer to the previous database
+    jobCache.job_cache.clear()
+    jobDigest._digest_cache.clear()
+    ocrCache._cache._indexes_created = False
+    processingLedger._indexes_created = False
+    applicationPipeline._interview_index_created = False
+
+
+def seed_workload(db, storage_client, applications, interviews, questions_per_interview, jobs, audio_bytes):
+    """Insert jobs, applications and interviews and upload their resumes and answers."""
+    from app.service.questionsGenerator import job_description, resume_summary
+
+    job_ids = [db.jobs.insert_one({"title": f"Job {index}", "description": job_description}).inserted_id
+               for index in range(jobs)]
+
+    application_ids = []
+    for index in range(applications):
+        resume_url = f"{RESUME_BUCKET}/resume-{index}.pdf"
+        # Distinct content per applicant, so the OCR cache does not short-circuit the workload
+        storage_client.put(resume_url, f"{resume_summary}\nApplicant number {index}".encode("utf-8"))
+        application_ids.append(db.applications.insert_one({
+            "userId": ObjectId(),
+            "jobId": job_ids[index % jobs],
+            "resumeURL": resume_url,
+        }).inserted_id)
+
+    interview_ids = []
+    for index in range(interviews):
+        questions = []
+        for number in range(questions_per_interview):
+            audio_url = f"{AUDIO_BUCKET}/interview-{index}/answer-{number}.m4a"
+            storage_client.put(audio_url, os.urandom(audio_bytes))
+            questions.append({"question": f"Question {number}?", "answerAudioUrl": audio_url})
+        interview_ids.append(db.interviews.insert_one({
+            "applicationId": ObjectId(),
+            "jobId": job_ids[index % jobs],
+            "userId": ObjectId(),
+            "questions": questions,
+        }).inserted_id)
+
+    return application_ids, interview_ids
+
+
+def drive(broker, mode, workers):
+    """Consume `broker` until every published message is acked or dead-lettered."""
+    from app.rabbitmq_consumer import QUEUE_HANDLERS, INLINE_CALLBACKS, process_message
+
+    channel = FakeChannel(broker)
+
+    if mode == "inline":
+        while not broker.finished():
+            delivery = broker.get()
+            if delivery is None:
+                continue
+            queue, method, properties, body = delivery
+            INLINE_CALLBACKS[queue](channel, method, properties, body)
+            broker.ack(method.delivery_tag)  # auto_ack; settled once the callback returns
+        return
+
+    connection = FakeConnection()
+    executors = {queue: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"benchmark-{queue}")
+                 for queue in QUEUE_HANDLERS}
+    try:
+        while not broker.finished():
+            delivery = broker.get()
+            if delivery is None:
+                continue
+            queue, method, properties, body = delivery
+            metrics.MESSAGES_IN_FLIGHT.inc(queue=queue)
+            executors[queue].submit(process_message, connection, channel, method, body,
+                                    QUEUE_HANDLERS[queue], properties)
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def latency_summary(samples):
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 1),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 1),
+    }
+
+
+def run_benchmark(applications=20, interviews=20, questions_per_interview=5, jobs=3, mode="threaded", workers=2,
+                  prefetch=None, groq_latency_ms=50.0, groq_token_latency_ms=0.0, transcription_latency_ms=50.0,
+                  groq_error_rate=0.0, gcs_latency_ms=5.0, gcs_error_rate=0.0, ocr_latency_ms=200.0,
+                  audio_bytes=64 * 1024, requests_per_minute=1_000_000, response_cache=False, seed=0):
+    """Run one fixed workload and return its report as a dict."""
+    groq = FakeGroq(groq_latency_ms, groq_token_latency_ms, transcription_latency_ms, groq_error_rate, seed=seed)
+    storage_client = FakeStorageClient(gcs_latency_ms, gcs_error_rate, seed=seed)
+    vision_client = FakeVisionClient(storage_client, ocr_latency_ms, seed=seed)
+    broker = InMemoryBroker(prefetch=prefetch or workers)
+
+    with fake_environment(groq, storage_client, vision_client, requests_per_minute, response_cache) as db:
+        from app.rabbitmq_consumer import JOB_APPLICATION_QUEUE, INTERVIEW_COMPLETED_QUEUE
+
+        application_ids, interview_ids = seed_workload(
+            db, storage_client, applications, interviews, questions_per_interview, jobs, audio_bytes)
+
+        started = time.perf_counter()
+        for application_id in application_ids:
+            broker.publish(JOB_APPLICATION_QUEUE, json.dumps(str(application_id)))
+        for interview_id in interview_ids:
+            broker.publish(INTERVIEW_COMPLETED_QUEUE, json.dumps(str(interview_id)))
+        drive(broker, mode, workers)
+        elapsed = time.perf_counter() - started
+
+        stage_samples = metrics.STAGE_LATENCY.samples
+        errors = dict(metrics.STAGE_ERRORS._values)
+
+    message_latencies = {}
+    for queue, latency in broker.settled_at.values():
+        message_latencies.setdefault(queue, []).append(latency)
+
+    return {
+        "mode": mode,
+        "workers": workers,
+        "messages": broker.published,
+        "acked": broker.acked,
+        "retried": broker.retried,
+        "dropped": broker.dropped,
+        "elapsed_seconds": round(elapsed, 3),
+        "messages_per_second": round(broker.published / elapsed, 2) if elapsed else None,
+        "groq_calls": groq.calls,
+        # ru_maxrss is in KiB on Linux; it is the peak of the whole process, not only this run
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": {stage: latency_summary(samples) for (stage,), samples in sorted(stage_samples.items())},
+        "messages_latency": {queue: latency_summary(samples) for queue, samples in sorted(message_latencies.items())},
+        "errors": {stage: count for (stage,), count in sorted(errors.items())},
+    }
+
+
+def format_report(report):
+    lines = [
+        f"mode={report['mode']} workers={report['workers']} messages={report['messages']} "
+        f"acked={report['acked']} retried={report['retried']} dropped={report['dropped']}",
+        f"elapsed={report['elapsed_seconds']}s throughput={report['messages_per_second']} msg/s "
+        f"groq_calls={report['groq_calls']} peak_rss={report['peak_rss_mb']} MiB",
+        "",
+        f"{'stage':<36}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}",
+    ]
+    for stage, summary in report["stages"].items():
+        lines.append(f"{stage:<36}{summary['count']:>8}{summary['p50_ms']:>10}{summary['p99_ms']:>10}"
+                     f"{report['errors'].get(stage, 0):>8}")
+    for queue, summary in report["messages_latency"].items():
+        lines.append(f"{'message:' + queue:<36}{summary['count']:>8}{summary['p50_ms']:>10}{summary['p99_ms']:>10}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--applications", type=int, default=20)
+    parser.add_argument("--interviews", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=5, help="Questions per interview")
+    parser.add_argument("--jobs", type=int, default=3)
+    parser.add_argument("--mode", choices=("threaded", "inline"), default="threaded")
+    parser.add_argument("--workers", type=int, default=2, help="Worker threads per queue")
+    parser.add_argument("--prefetch", type=int, default=None, help="Unacked messages per queue (default: workers)")
+    parser.add_argument("--groq-latency-ms", type=float, default=50.0)
+    parser.add_argument("--groq-token-latency-ms", type=float, default=0.0, help="Delay per streamed chunk")
+    parser.add_argument("--transcription-latency-ms", type=float, default=50.0)
+    parser.add_argument("--groq-error-rate", type=float, default=0.0)
+    parser.add_argument("--gcs-latency-ms", type=float, default=5.0)
+    parser.add_argument("--gcs-error-rate", type=float, default=0.0)
+    parser.add_argument("--ocr-latency-ms", type=float, default=200.0)
+    parser.add_argument("--audio-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--rpm", type=int, default=1_000_000, help="Groq requests per minute per model")
+    parser.add_argument("--response-cache", action="store_true", help="Enable the LLM response cache")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        applications=args.applications, interviews=args.interviews, questions_per_interview=args.questions,
+        jobs=args.jobs, mode=args.mode, workers=args.workers, prefetch=args.prefetch,
+        groq_latency_ms=args.groq_latency_ms, groq_token_latency_ms=args.groq_token_latency_ms,
+        transcription_latency_ms=args.transcription_latency_ms, groq_error_rate=args.groq_error_rate,
+        gcs_latency_ms=args.gcs_latency_ms, gcs_error_rate=args.gcs_error_rate,
+        ocr_latency_ms=args.ocr_latency_ms, audio_bytes=args.audio_bytes, requests_per_minute=args.rpm,
+        response_cache=args.response_cache, seed=args.seed,
+    )
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Consumer entry point, separate from the HTTP API:
+
+    python consumer.py --pool new_job_application_queue=2 --pool interview_completed_queue=4
+
+See app.supervisor for the options and their environment variable defaults.
+"""
+from app.supervisor import main
+
+if __name__ == '__main__':
+    main()
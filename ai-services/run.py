@@ -1,13 +1,19 @@
-from app import create_app
+import os
+from app import get_app
 from app.rabbitmq_consumer import start_consumer
 import threading
 
-app = create_app()
+# The same app instance the services use, so the process holds one Mongo client
+app = get_app()
 app.app_context().push()
 
+# Local development only: production runs wsgi.py under gunicorn and consumer.py separately
 if __name__ == '__main__':
-    # Run RabbitMQ consumer in a separate thread
-    consumer_thread = threading.Thread(target=start_consumer, daemon=True)
-    consumer_thread.start()
+    # The debug reloader runs this file in a watcher process and a serving child;
+    # start the consumer only in the child so there is a single consumer
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        # Run RabbitMQ consumer in a separate thread
+        consumer_thread = threading.Thread(target=start_consumer, daemon=True)
+        consumer_thread.start()
 
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,10 @@
+# tests/conftest.py
+import os
+
+# Importing `app` validates these variables, so provide placeholders for tests
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017/nextgen-hr-test")
+os.environ.setdefault("GROQ_API_KEY", "test-groq-key")
+os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS", "test-credentials.json")
+# There is no Mongo server in tests; the response cache tests install their own backend
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
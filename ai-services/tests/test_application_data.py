@@ -0,0 +1,73 @@
+# tests/test_application_data.py
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from app import get_app
+from app.service import applicationData, jobCache
+from app.service.applicationData import fetch_application_details, fetch_application_details_batch
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock.MongoClient().db
+    monkeypatch.setitem(get_app().config, "MONGO", SimpleNamespace(db=db))
+    monkeypatch.setattr(applicationData, "JOB_CACHE_ENABLED", False)
+    return db
+
+
+def _application(db, job_id):
+    return db.applications.insert_one({
+        "resumeURL": "gs://resumes/a.pdf", "userId": ObjectId(), "jobId": job_id,
+        "coverLetter": "A long cover letter", "status": "applied",
+    }).inserted_id
+
+
+@pytest.fixture(params=[True, False], ids=["job-cache", "lookup"])
+def job_cache_enabled(request, db, monkeypatch):
+    """Run a test against both read paths of `fetch_application_details`."""
+    monkeypatch.setattr(applicationData, "JOB_CACHE_ENABLED", request.param)
+    yield request.param
+    jobCache.job_cache.clear()
+
+
+def test_application_and_job_are_fetched_projected(db, job_cache_enabled):
+    job_id = db.jobs.insert_one({"title": "Backend engineer", "description": "Python", "salary": 1}).inserted_id
+    application_id = _application(db, job_id)
+
+    document = fetch_application_details(str(application_id))
+
+    assert set(document) == {"_id", "resumeURL", "userId", "jobId", "jobDetails"}
+    assert document["jobDetails"] == {"_id": job_id, "description": "Python"}
+
+
+def test_application_without_a_job_has_no_job_details(db, job_cache_enabled):
+    application_id = _application(db, ObjectId())
+
+    document = fetch_application_details(str(application_id))
+
+    assert set(document) == {"_id", "resumeURL", "userId", "jobId"}
+
+
+def test_missing_application_is_reported(db, job_cache_enabled):
+    assert fetch_application_details(str(ObjectId())) == "No data found for the given ID"
+
+
+def test_batch_fetch_keys_documents_by_id_and_keeps_applications_without_a_job(db):
+    job_id = db.jobs.insert_one({"description": "Python"}).inserted_id
+    with_job = _application(db, job_id)
+    missing_job = _application(db, ObjectId())
+
+    documents = fetch_application_details_batch([str(with_job), str(missing_job), str(ObjectId())])
+
+    assert set(documents) == {str(with_job), str(missing_job)}
+    assert documents[str(with_job)]["jobDetails"] == {"_id": job_id, "description": "Python"}
+    assert "jobDetails" not in documents[str(missing_job)]
+    assert "coverLetter" not in documents[str(missing_job)]
+
+
+def test_batch_fetch_raises_on_invalid_ids(db):
+    with pytest.raises(InvalidId):
+        fetch_application_details_batch(["not-an-id"])
@@ -0,0 +1,92 @@
+# tests/test_application_pipeline.py
+import logging
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+from app import get_app
+from app.service import applicationPipeline
+from app.service.applicationPipeline import (
+    compact_resume, is_application_processed, persist_interview, run_job_application_pipeline,
+)
+from app.utils.bulk_writer import BulkWriter
+
+APPLICATION_ID = ObjectId()
+
+
+def _results():
+    document = {"_id": APPLICATION_ID, "userId": ObjectId(), "resumeURL": "gs://resumes/a.pdf",
+                "jobDetails": {"_id": ObjectId(), "description": "Python engineer"}}
+    return {"document": document, "questions": [{"question": "Why Python?"}],
+            "ats": {"score": 80, "report": "Good match"}}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock.MongoClient().db
+    monkeypatch.setitem(get_app().config, "MONGO", SimpleNamespace(db=db))
+    monkeypatch.setattr(applicationPipeline, "_interview_index_created", False)
+    return db
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_redelivery_returns_the_stored_interview_id(db, monkeypatch, bulk):
+    monkeypatch.setattr(applicationPipeline, "BULK_WRITES_ENABLED", bulk)
+    writer = BulkWriter(db.interviews, max_batch_size=1)
+    monkeypatch.setattr(applicationPipeline, "get_bulk_writer", lambda collection: writer)
+
+    persisted = []
+    for _ in range(2):
+        persisted.append(persist_interview(_results()))
+        if bulk:
+            persisted[-1]["pending"].result(timeout=5)
+    writer.close(timeout=5)
+
+    stored = list(db.interviews.find())
+    assert len(stored) == 1
+    assert [result["interviewId"] for result in persisted] == [stored[0]["_id"]] * 2
+
+
+def test_ledger_completion_is_queued_once_the_interview_is_written(monkeypatch):
+    pending = Future()
+    results = dict(_results(), persist={"interviewId": APPLICATION_ID, "pending": pending})
+    monkeypatch.setattr(applicationPipeline, "LEDGER_ENABLED", True)
+    monkeypatch.setattr(applicationPipeline, "run_pipeline", lambda *args, **kwargs: (results, {}))
+    monkeypatch.setattr(applicationPipeline, "mark_completed", lambda *args: pytest.fail("written on the flush thread"))
+    queued = []
+    monkeypatch.setattr(applicationPipeline, "submit_completed", lambda *args: queued.append(args))
+
+    run_job_application_pipeline(results["document"])
+    assert queued == []
+
+    pending.set_result(None)
+    assert queued == [("job_application", str(APPLICATION_ID), {"interviewId": APPLICATION_ID})]
+
+
+def test_stages_in_the_ledger_entry_are_not_run_again(monkeypatch):
+    monkeypatch.setattr(applicationPipeline, "LEDGER_ENABLED", True)
+    monkeypatch.setattr(applicationPipeline, "mark_completed", lambda *args: None)
+    calls = []
+
+    def run_pipeline(stages, context, completed=None, on_stage_complete=None):
+        calls.append(completed)
+        return dict(_results(), persist={"interviewId": APPLICATION_ID, "pending": None}), {}
+
+    monkeypatch.setattr(applicationPipeline, "run_pipeline", run_pipeline)
+    entry = {"status": "in_progress", "stages": {"ocr": {"text": "Jane Doe"}}}
+
+    run_job_application_pipeline(_results()["document"], entry)
+    assert calls == [entry["stages"]]
+    assert not is_application_processed(entry)
+    assert is_application_processed({"status": "completed", "stages": entry["stages"]})
+    assert not is_application_processed(None)
+
+
+def test_compaction_is_logged(caplog):
+    with caplog.at_level(logging.INFO):
+        compacted = compact_resume({"ocr": {"text": "Jane Doe\nJane Doe\nPython developer", "backend": "text_layer"}})
+
+    assert compacted["text"]
+    assert f"to {compacted['tokens']} tokens ({compacted['tokens_saved']} saved)" in caplog.text
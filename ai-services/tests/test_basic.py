@@ -19,4 +19,4 @@ def test_index(client):
     response = client.get('/')
     assert response.status_code == 200
     data = response.get_json()
-    assert data['message'] == 'Hello, World!'
+    assert data['message'] == 'Welcome to the AI Services API!'
@@ -0,0 +1,15 @@
+# tests/test_benchmark.py
+import pytest
+from benchmarks.run_benchmark import run_benchmark
+
+
+@pytest.mark.parametrize("mode", ["threaded", "inline"])
+def test_benchmark_processes_the_whole_workload(mode):
+    report = run_benchmark(applications=2, interviews=2, questions_per_interview=2, jobs=1, mode=mode,
+                           groq_latency_ms=0, transcription_latency_ms=0, gcs_latency_ms=0, ocr_latency_ms=0)
+
+    assert report["messages"] == 4
+    assert report["acked"] == 4
+    assert report["messages_per_second"] > 0
+    assert {"ocr", "summary", "ats", "questions", "transcription", "evaluation"} <= set(report["stages"])
+    assert report["errors"] == {}
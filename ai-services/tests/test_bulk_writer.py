@@ -0,0 +1,57 @@
+# tests/test_bulk_writer.py
+import pytest
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+from app.utils.bulk_writer import BulkWriter
+
+
+class FakeCollection:
+    name = "interviews"
+    full_name = "test.interviews"
+
+    def __init__(self, fail_indexes=()):
+        self.batches = []
+        self.fail_indexes = set(fail_indexes)
+
+    def with_options(self, write_concern=None):
+        return self
+
+    def bulk_write(self, operations, ordered=True):
+        self.batches.append(operations)
+        if self.fail_indexes:
+            errors = [{"index": index, "code": 11000, "errmsg": "duplicate key"} for index in sorted(self.fail_indexes)]
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": []})
+
+
+def test_flushes_full_batches_together():
+    collection = FakeCollection()
+    writer = BulkWriter(collection, max_batch_size=3, max_delay=60)
+
+    futures = [writer.submit(InsertOne({"n": n})) for n in range(3)]
+    for future in futures:
+        assert future.result(timeout=5) is None
+
+    assert [len(batch) for batch in collection.batches] == [3]
+    writer.close(timeout=5)
+
+
+def test_flushes_partial_batch_after_delay():
+    collection = FakeCollection()
+    writer = BulkWriter(collection, max_batch_size=100, max_delay=0.05)
+
+    assert writer.submit(InsertOne({"n": 1})).result(timeout=5) is None
+    assert len(collection.batches) == 1
+    writer.close(timeout=5)
+
+
+def test_only_failed_operations_are_rejected():
+    collection = FakeCollection(fail_indexes=[1])
+    writer = BulkWriter(collection, max_batch_size=2, max_delay=60)
+
+    ok = writer.submit(InsertOne({"n": 0}))
+    failed = writer.submit(InsertOne({"n": 1}))
+
+    assert ok.result(timeout=5) is None
+    with pytest.raises(BulkWriteError):
+        failed.result(timeout=5)
+    writer.close(timeout=5)
@@ -0,0 +1,61 @@
+# tests/test_client_pool.py
+import threading
+import time
+
+import pytest
+from app.utils import client_pool
+
+
+@pytest.fixture(autouse=True)
+def clients(monkeypatch):
+    clients = {}
+    monkeypatch.setattr(client_pool, "_clients", clients)
+    return clients
+
+
+def test_concurrent_callers_share_one_client():
+    created = []
+
+    def factory():
+        time.sleep(0.01)  # widen the window for a second thread to race in
+        created.append(object())
+        return created[-1]
+
+    barrier = threading.Barrier(8, timeout=5)
+    results = []
+
+    def get():
+        barrier.wait()
+        results.append(client_pool._get_or_create("service", factory))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
+
+
+def test_groq_client_is_reused_with_a_bounded_pool(clients):
+    client = client_pool.get_groq_client()
+
+    assert client_pool.get_groq_client() is client
+    assert client.max_retries == client_pool.GROQ_SDK_MAX_RETRIES
+    pool = client._client._transport._pool
+    assert pool._max_connections == client_pool.GROQ_MAX_CONNECTIONS
+    assert list(clients) == ["groq"]
+
+
+def test_google_clients_are_kept_per_service_account(clients, monkeypatch):
+    from google.cloud import vision
+
+    monkeypatch.setattr(vision.ImageAnnotatorClient, "from_service_account_json",
+                        classmethod(lambda cls, path: ("vision client", path)))
+
+    first = client_pool.get_vision_client("first.json")
+
+    assert client_pool.get_vision_client("first.json") is first
+    assert client_pool.get_vision_client("second.json") == ("vision client", "second.json")
+    assert set(clients) == {("vision", "first.json"), ("vision", "second.json")}
@@ -0,0 +1,118 @@
+# tests/test_consumer.py
+import json
+import logging
+from concurrent.futures import Future
+
+import pytest
+from app import rabbitmq_consumer
+from app.rabbitmq_consumer import RETRY_COUNT_HEADER, default_prefetch, failure_destination, process_message
+from app.utils.metrics import MESSAGES_IN_FLIGHT
+from benchmarks.fakes import InMemoryBroker, FakeChannel, FakeConnection
+
+QUEUE = "consumer_test_queue"
+
+
+@pytest.fixture
+def broker():
+    broker = InMemoryBroker(prefetch=1)
+    broker.publish(QUEUE, json.dumps("message-id"))
+    return broker
+
+
+def deliver(broker, handler):
+    """Hand the next message of `broker` to `process_message`, as the threaded consumer does."""
+    queue, method, properties, body = broker.get()
+    MESSAGES_IN_FLIGHT.inc(queue=queue)
+    process_message(FakeConnection(), FakeChannel(broker), method, body, handler, properties)
+    return properties
+
+
+def fail(message):
+    raise RuntimeError("Groq is down")
+
+
+def test_processed_message_is_acked(broker):
+    received = []
+    deliver(broker, received.append)
+
+    assert received == ["message-id"]
+    assert broker.acked == 1 and broker.finished()
+
+
+def test_message_is_acked_once_its_bulk_write_lands(broker):
+    pending = Future()
+    deliver(broker, lambda message: pending)
+    assert broker.acked == 0
+
+    pending.set_result(None)
+    assert broker.acked == 1
+
+
+def test_failed_message_is_retried_with_its_attempt_count(broker, caplog):
+    with caplog.at_level(logging.ERROR):
+        deliver(broker, fail)
+
+    assert broker.retried == 1 and broker.acked == 0 and not broker.finished()
+    assert "attempt 1 of" in caplog.text
+
+    properties = deliver(broker, lambda message: None)
+    assert properties.headers == {RETRY_COUNT_HEADER: 1}
+    assert broker.acked == 1 and broker.finished()
+
+
+def test_message_is_dead_lettered_after_the_last_attempt(broker, caplog, monkeypatch):
+    monkeypatch.setattr(rabbitmq_consumer, "CONSUMER_MAX_ATTEMPTS", 3)
+
+    with caplog.at_level(logging.ERROR):
+        for _ in range(3):
+            deliver(broker, fail)
+
+    assert broker.retried == 2
+    assert broker.dead_lettered == [(f"{QUEUE}.dead", json.dumps("message-id"), {RETRY_COUNT_HEADER: 3})]
+    assert broker.finished()
+    assert "Giving up on message" in caplog.text
+
+
+def test_failed_bulk_write_is_retried(broker):
+    pending = Future()
+    deliver(broker, lambda message: pending)
+
+    pending.set_exception(RuntimeError("write failed"))
+    assert broker.retried == 1 and broker.acked == 0
+
+
+def test_failure_destination_keeps_other_headers(monkeypatch):
+    monkeypatch.setattr(rabbitmq_consumer, "CONSUMER_MAX_ATTEMPTS", 2)
+
+    assert failure_destination(QUEUE, {"traceId": "abc"}) == (
+        f"{QUEUE}.retry", {"traceId": "abc", RETRY_COUNT_HEADER: 1}, rabbitmq_consumer.CONSUMER_RETRY_DELAY_SECONDS)
+    assert failure_destination(QUEUE, {RETRY_COUNT_HEADER: 1}) == (f"{QUEUE}.dead", {RETRY_COUNT_HEADER: 2}, None)
+
+
+def test_bulk_writes_get_room_for_messages_waiting_on_a_batch():
+    assert default_prefetch(2, bulk_writes=False) == 2
+    assert default_prefetch(2, bulk_writes=True) == 2 * rabbitmq_consumer.BULK_WRITE_PREFETCH_PER_WORKER
+
+
+def test_application_ledger_entry_is_loaded_once(monkeypatch):
+    entry = {"status": "in_progress", "stages": {"ocr": {"text": "Jane Doe"}}}
+    loads = []
+    monkeypatch.setattr(rabbitmq_consumer, "load_application_entry", lambda id: loads.append(id) or entry)
+    monkeypatch.setattr(rabbitmq_consumer, "fetch_application_details",
+                        lambda id: {"_id": id, "resumeURL": "gs://resumes/a.pdf"})
+    received = []
+
+    def run_pipeline(document, ledger_entry):
+        received.append(ledger_entry)
+        return {"ats": {"score": 80, "report": ""}, "questions": [],
+                "persist": {"interviewId": "interview-1", "pending": None}}, {}
+
+    monkeypatch.setattr(rabbitmq_consumer, "run_job_application_pipeline", run_pipeline)
+
+    rabbitmq_consumer.handle_job_application("application-1")
+    assert loads == ["application-1"]
+    assert received == [entry]
+
+    entry["status"] = "completed"
+    rabbitmq_consumer.handle_job_application("application-1")
+    assert received == [entry]
@@ -0,0 +1,158 @@
+# tests/test_evaluation_engine.py
+import io
+import asyncio
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from app.service import evaluationEngine
+from app.service.evaluationEngine import EvaluationError, evaluate_interview_questions
+from app.utils.structured_output import StructuredOutputError
+
+QUESTIONS = [{"question": f"Question {index}", "answerAudioUrl": f"gs://bucket/{index}.webm"} for index in range(3)]
+
+
+def _result(question):
+    return {"answer": f"Answer to {question['question']}", "evaluation": int(question['question'][-1])}
+
+
+def test_questions_are_evaluated_concurrently_in_question_order(monkeypatch):
+    # Every question waits for the others, so this only finishes if they overlap
+    barrier = threading.Barrier(len(QUESTIONS), timeout=5)
+
+    def evaluate_question(question):
+        barrier.wait()
+        # Finish in reverse order to check the results are put back in question order
+        time.sleep(0.01 * (len(QUESTIONS) - int(question['question'][-1])))
+        return _result(question)
+
+    monkeypatch.setattr(evaluationEngine, "evaluate_question", evaluate_question)
+
+    results = evaluate_interview_questions(QUESTIONS, max_workers=len(QUESTIONS), mode="per_question")
+
+    assert [result["evaluation"] for result in results] == [0, 1, 2]
+
+
+def test_failed_question_keeps_the_other_results(monkeypatch):
+    def evaluate_question(question):
+        if question is QUESTIONS[0]:
+            raise RuntimeError("transcription failed")
+        time.sleep(0.01)
+        return _result(question)
+
+    monkeypatch.setattr(evaluationEngine, "evaluate_question", evaluate_question)
+
+    with pytest.raises(EvaluationError) as excinfo:
+        evaluate_interview_questions(QUESTIONS, max_workers=2, mode="per_question")
+
+    assert excinfo.value.results == [None, _result(QUESTIONS[1]), _result(QUESTIONS[2])]
+    assert isinstance(excinfo.value.__cause__, RuntimeError)
+
+
+def test_async_failed_question_keeps_the_other_results(monkeypatch):
+    async def evaluate_question_async(question):
+        if question is QUESTIONS[1]:
+            raise RuntimeError("grading failed")
+        return _result(question)
+
+    monkeypatch.setattr(evaluationEngine, "evaluate_question_async", evaluate_question_async)
+
+    with pytest.raises(EvaluationError) as excinfo:
+        asyncio.run(evaluationEngine.evaluate_interview_questions_async(QUESTIONS, mode="per_question"))
+
+    assert excinfo.value.results == [_result(QUESTIONS[0]), None, _result(QUESTIONS[2])]
+
+
+def _audio(monkeypatch, generation):
+    """Serve an audio object of `generation` and record the transcriptions made from it."""
+    transcribed = []
+    monkeypatch.setattr(evaluationEngine, "get_audio_blob", lambda url: SimpleNamespace(generation=generation))
+    monkeypatch.setattr(evaluationEngine, "download_audio_to_buffer", lambda url, blob: io.BytesIO(b"audio"))
+    monkeypatch.setattr(evaluationEngine, "speech_to_text",
+                        lambda audio, file_name: transcribed.append(file_name) or "fresh transcript")
+    return transcribed
+
+
+def test_stored_transcript_of_the_same_audio_is_reused(monkeypatch):
+    transcribed = _audio(monkeypatch, generation=7)
+    question = dict(QUESTIONS[0], answer="stored transcript")
+    question["answerTranscript"] = evaluationEngine.transcript_source(question["answerAudioUrl"],
+                                                                      SimpleNamespace(generation=7))
+
+    assert evaluationEngine.transcribe_answer(question) == ("stored transcript", question["answerTranscript"])
+    assert transcribed == []
+
+
+def test_answer_is_transcribed_again_when_the_audio_changed(monkeypatch):
+    transcribed = _audio(monkeypatch, generation=8)
+    question = dict(QUESTIONS[0], answer="stored transcript")
+    question["answerTranscript"] = evaluationEngine.transcript_source(question["answerAudioUrl"],
+                                                                      SimpleNamespace(generation=7))
+
+    answer, source = evaluationEngine.transcribe_answer(question)
+
+    assert answer == "fresh transcript" and source["generation"] == "8"
+    assert transcribed == [question["answerAudioUrl"]]
+
+
+def _transcribed(monkeypatch):
+    monkeypatch.setattr(evaluationEngine, "transcribe_answer",
+                        lambda question: (f"Answer to {question['question']}", {"audioUrl": question["answerAudioUrl"]}))
+
+
+def test_batch_mode_grades_every_answer_in_one_call(monkeypatch):
+    _transcribed(monkeypatch)
+    batches = []
+    monkeypatch.setattr(evaluationEngine, "evaluate_interview_batch",
+                        lambda qa_pairs: batches.append(qa_pairs) or [7, 8, 9])
+    monkeypatch.setattr(evaluationEngine, "evaluate_question_answer", lambda *pair: pytest.fail("graded alone"))
+
+    results = evaluate_interview_questions(QUESTIONS, mode="batch")
+
+    assert batches == [[(question["question"], f"Answer to {question['question']}") for question in QUESTIONS]]
+    assert [result["evaluation"] for result in results] == [7, 8, 9]
+    assert results[0]["answerTranscript"] == {"audioUrl": QUESTIONS[0]["answerAudioUrl"]}
+
+
+def test_malformed_batch_output_falls_back_to_per_question_grading(monkeypatch, caplog):
+    _transcribed(monkeypatch)
+
+    def malformed(qa_pairs):
+        raise StructuredOutputError("expected 3 scores, got 2")
+
+    monkeypatch.setattr(evaluationEngine, "evaluate_interview_batch", malformed)
+    monkeypatch.setattr(evaluationEngine, "evaluate_question_answer", lambda question, answer: int(question[-1]))
+
+    with caplog.at_level(logging.WARNING):
+        results = evaluate_interview_questions(QUESTIONS, mode="batch")
+
+    assert [result["evaluation"] for result in results] == [0, 1, 2]
+    assert "evaluating questions one by one" in caplog.text
+
+
+def test_async_malformed_batch_output_falls_back_to_per_question_grading(monkeypatch, caplog):
+    async def transcribe_answer_async(question):
+        return f"Answer to {question['question']}", {"audioUrl": question["answerAudioUrl"]}
+
+    async def malformed(qa_pairs):
+        raise StructuredOutputError("expected 3 scores, got 2")
+
+    async def evaluate_question_answer_async(question, answer):
+        return int(question[-1])
+
+    monkeypatch.setattr(evaluationEngine, "transcribe_answer_async", transcribe_answer_async)
+    monkeypatch.setattr(evaluationEngine, "evaluate_interview_batch_async", malformed)
+    monkeypatch.setattr(evaluationEngine, "evaluate_question_answer_async", evaluate_question_answer_async)
+
+    with caplog.at_level(logging.WARNING):
+        results = asyncio.run(evaluationEngine.evaluate_interview_questions_async(QUESTIONS, mode="batch"))
+
+    assert [result["evaluation"] for result in results] == [0, 1, 2]
+    assert "evaluating questions one by one" in caplog.text
+
+
+def test_unknown_evaluation_mode_is_rejected():
+    with pytest.raises(ValueError):
+        evaluate_interview_questions(QUESTIONS, mode="bulk")
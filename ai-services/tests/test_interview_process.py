@@ -0,0 +1,58 @@
+# tests/test_interview_process.py
+import pytest
+from app.service import interviewProcess
+from app.service.interviewProcess import download_audio_to_buffer, speech_to_text
+from app.utils import client_pool
+from benchmarks.fakes import FakeGroq, FakeStorageClient
+
+AUDIO_URI = "gs://answers/question-1.webm"
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage_client = FakeStorageClient()
+    monkeypatch.setattr(interviewProcess, "get_storage_client", lambda path=None: storage_client)
+    return storage_client
+
+
+def test_small_answer_is_downloaded_into_memory(storage):
+    storage.put(AUDIO_URI, b"audio" * 10)
+
+    with download_audio_to_buffer(AUDIO_URI, max_size=1024) as buffer:
+        assert not buffer._rolled
+        assert buffer.read() == b"audio" * 10
+
+
+def test_large_answer_spills_to_an_anonymous_file(storage):
+    storage.put(AUDIO_URI, b"a" * 4096)
+
+    with download_audio_to_buffer(AUDIO_URI, max_size=1024) as buffer:
+        assert buffer._rolled
+        assert buffer.read() == b"a" * 4096
+
+
+def test_failed_download_closes_the_buffer(storage, monkeypatch):
+    buffers = []
+    spooled = interviewProcess.tempfile.SpooledTemporaryFile
+
+    def track(**kwargs):
+        buffers.append(spooled(**kwargs))
+        return buffers[-1]
+
+    monkeypatch.setattr(interviewProcess.tempfile, "SpooledTemporaryFile", track)
+
+    with pytest.raises(FileNotFoundError):
+        download_audio_to_buffer("gs://answers/missing.webm")
+    assert buffers[0].closed
+
+
+def test_buffer_is_transcribed_without_a_local_file(storage, monkeypatch):
+    monkeypatch.setitem(client_pool._clients, "groq", FakeGroq())
+    storage.put(AUDIO_URI, b"spoken answer")
+
+    with download_audio_to_buffer(AUDIO_URI) as buffer:
+        buffer.read()  # a retried upload must still send the whole recording
+        text = speech_to_text(buffer, file_name=AUDIO_URI)
+
+    # The fake transcription reports how much audio it received
+    assert f"({len(b'spoken answer')} bytes of audio)" in text
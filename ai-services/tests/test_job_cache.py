@@ -0,0 +1,103 @@
+# tests/test_job_cache.py
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+from pymongo.errors import OperationFailure
+from app import get_app
+from app.service import jobCache
+
+
+class FakeStream:
+    def __init__(self, changes):
+        self.changes = changes
+        self.resume_token = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __iter__(self):
+        for index, change in enumerate(self.changes):
+            self.resume_token = {"_data": f"token-{index}"}
+            yield change
+
+
+class FakeJobs:
+    """A jobs collection whose change streams replay `streams`, then fail as on a standalone server."""
+
+    def __init__(self, streams):
+        self.streams = list(streams)
+        self.resumed_after = []
+        self.cached = []  # what the cache held for jobs "1" and "2" each time a stream was opened
+
+    def watch(self, pipeline, resume_after=None):
+        self.resumed_after.append(resume_after)
+        self.cached.append((jobCache.job_cache.get("1"), jobCache.job_cache.get("2")))
+        if not self.streams:
+            raise OperationFailure("The $changeStream stage is only supported on replica sets")
+        return FakeStream(self.streams.pop(0))
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    def install(*streams):
+        collection = FakeJobs(streams)
+        monkeypatch.setitem(get_app().config, "MONGO", SimpleNamespace(db=SimpleNamespace(jobs=collection)))
+        return collection
+
+    yield install
+    jobCache.job_cache.clear()
+
+
+def test_changed_jobs_are_invalidated(jobs):
+    jobCache.job_cache.set("1", {"description": "old"})
+    jobCache.job_cache.set("2", {"description": "unchanged"})
+
+    collection = jobs([{"operationType": "update", "documentKey": {"_id": "1"}}])
+    jobCache._watch_jobs()
+
+    assert collection.cached[1] == (None, {"description": "unchanged"})
+
+
+def test_invalidate_clears_the_cache_and_reopens_without_the_old_token(jobs):
+    jobCache.job_cache.set("2", {"description": "cached"})
+    collection = jobs(
+        [{"operationType": "update", "documentKey": {"_id": "1"}}, {"operationType": "invalidate"}],
+        [],
+    )
+
+    jobCache._watch_jobs()
+
+    assert collection.cached[1] == (None, None)
+    # The first stream ends on the invalidate, the second is opened fresh
+    assert collection.resumed_after[:2] == [None, None]
+
+
+def test_stream_is_resumed_after_it_ends(jobs):
+    collection = jobs([{"operationType": "delete", "documentKey": {"_id": "1"}}], [])
+
+    jobCache._watch_jobs()
+
+    assert collection.resumed_after[:2] == [None, {"_data": "token-0"}]
+
+
+def test_cached_job_document_is_not_shared_with_callers(monkeypatch):
+    db = mongomock.MongoClient().db
+    job_id = db.jobs.insert_one({"description": "Python engineer", "skills": ["Python"]}).inserted_id
+    monkeypatch.setitem(get_app().config, "MONGO", SimpleNamespace(db=db))
+
+    try:
+        first = jobCache.get_job_document(job_id)
+        first["skills"].append("Go")
+        first["description"] = "changed by a caller"
+
+        db.jobs.delete_many({})  # served from the cache from here on
+        assert jobCache.get_job_document(job_id) == {"_id": job_id, "description": "Python engineer",
+                                                     "skills": ["Python"]}
+        assert jobCache.get_job_document(ObjectId()) is None
+    finally:
+        jobCache.job_cache.clear()
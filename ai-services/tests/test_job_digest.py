@@ -0,0 +1,93 @@
+# tests/test_job_digest.py
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from app import get_app
+from app.service import jobDigest
+from app.service.jobDigest import get_job_digest
+from app.utils.structured_output import StructuredOutputError
+from app.utils.ttl_cache import TTLCache
+
+DIGEST = {"title": "Backend Engineer", "seniority": "Senior", "skills": ["Python"],
+          "responsibilities": ["Build APIs"], "qualifications": [], "preferred": []}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock.MongoClient().db
+    monkeypatch.setitem(get_app().config, "MONGO", SimpleNamespace(db=db))
+    monkeypatch.setattr(jobDigest, "_digest_cache", TTLCache(10, 60))
+    return db
+
+
+@pytest.fixture
+def condensed(monkeypatch):
+    calls = []
+
+    def condense(description):
+        calls.append(description)
+        time.sleep(0.01)  # widen the window for a second application to race in
+        return DIGEST
+
+    monkeypatch.setattr(jobDigest, "condense_job_description", condense)
+    return calls
+
+
+def test_digest_is_built_once_and_stored(db, condensed):
+    text = get_job_digest("job-1", "We need a Python engineer")
+
+    assert text.startswith("Job Title: Backend Engineer")
+    assert get_job_digest("job-1", "We need a Python engineer") == text
+    assert condensed == ["We need a Python engineer"]
+    assert db[jobDigest.JOB_DIGEST_COLLECTION].find_one()["jobId"] == "job-1"
+
+
+def test_edited_description_gets_a_fresh_digest(db, condensed):
+    get_job_digest("job-1", "We need a Python engineer")
+    get_job_digest("job-1", "We need a senior Python engineer")
+
+    assert len(condensed) == 2
+
+
+def test_job_without_a_description_is_not_digested(db, condensed):
+    assert get_job_digest("job-1", None) is None
+    assert get_job_digest("job-1", "") == ""
+    assert condensed == []
+
+
+def test_failed_digest_falls_back_to_the_description_without_caching_it(db, monkeypatch, caplog):
+    def malformed(description):
+        raise StructuredOutputError("Digest has neither skills nor responsibilities")
+
+    monkeypatch.setattr(jobDigest, "condense_job_description", malformed)
+
+    with caplog.at_level(logging.WARNING):
+        assert get_job_digest("job-1", "We need a Python engineer") == "We need a Python engineer"
+    assert "Could not digest the description of job job-1" in caplog.text
+    assert db[jobDigest.JOB_DIGEST_COLLECTION].count_documents({}) == 0
+
+    monkeypatch.setattr(jobDigest, "condense_job_description", lambda description: DIGEST)
+    assert get_job_digest("job-1", "We need a Python engineer").startswith("Job Title: Backend Engineer")
+
+
+def test_concurrent_applications_share_one_digest(db, condensed):
+    barrier = threading.Barrier(8, timeout=5)
+    results = []
+
+    def apply():
+        barrier.wait()
+        results.append(get_job_digest("job-1", "We need a Python engineer"))
+
+    threads = [threading.Thread(target=apply) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(condensed) == 1
+    assert len(set(results)) == 1 and len(results) == 8
+    assert jobDigest._digest_locks == {}
@@ -0,0 +1,31 @@
+# tests/test_log.py
+import logging
+
+from app.utils.log import get_logger, log_sampled, preview
+
+
+class Payload:
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "x" * 50
+
+
+def test_preview_shortens_long_payloads():
+    assert str(preview("short", limit=10)) == "short"
+    assert str(preview("x" * 50, limit=10)) == "xxxxxxxxxx... (40 more characters)"
+
+
+def test_dropped_sample_never_formats_the_payload(caplog):
+    logger = get_logger("tests.log")
+    payload = Payload()
+
+    with caplog.at_level(logging.DEBUG):
+        log_sampled(logger, logging.DEBUG, "Document: %s", preview(payload, limit=10), rate=0)
+        assert payload.formatted == 0
+
+        log_sampled(logger, logging.DEBUG, "Document: %s", preview(payload, limit=10), rate=1)
+    assert payload.formatted > 0
+    assert "Document: xxxxxxxxxx... (40 more characters)" in caplog.text
@@ -0,0 +1,63 @@
+# tests/test_metrics.py
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from app import create_app
+from app.utils.metrics import (
+    Counter, Histogram, STAGE_ERRORS, STAGE_LATENCY, current_trace_id, propagate_trace, span, trace,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test latency.", ["stage"], buckets=(0.1, 1))
+    histogram.observe(0.05, stage="ocr")
+    histogram.observe(0.5, stage="ocr")
+    histogram.observe(5, stage="ocr")
+
+    lines = histogram.render()
+    assert 'test_latency_seconds_bucket{stage="ocr",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="ocr",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="ocr",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{stage="ocr"} 3' in lines
+
+
+def test_counter_requires_declared_labels():
+    counter = Counter("test_total", "Test counter.", ["stage"])
+    with pytest.raises(ValueError):
+        counter.inc(queue="jobs")
+
+
+def test_span_records_latency_and_errors():
+    latency_before = STAGE_LATENCY.count(stage="test_stage")
+    errors_before = STAGE_ERRORS.value(stage="test_stage")
+
+    with span("test_stage"):
+        pass
+    with pytest.raises(RuntimeError):
+        with span("test_stage"):
+            raise RuntimeError("boom")
+
+    assert STAGE_LATENCY.count(stage="test_stage") == latency_before + 2
+    assert STAGE_ERRORS.value(stage="test_stage") == errors_before + 1
+
+
+def test_propagate_trace_carries_trace_id_into_worker_threads():
+    with trace("abc123"), ThreadPoolExecutor(max_workers=2) as executor:
+        trace_ids = list(executor.map(propagate_trace(lambda _: current_trace_id()), range(4)))
+
+    assert trace_ids == ["abc123"] * 4
+    assert current_trace_id() is None
+
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    app = create_app()
+    app.config['TESTING'] = True
+    with span("endpoint_test"):
+        pass
+
+    with app.test_client() as client:
+        response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert 'ai_services_stage_duration_seconds_count{stage="endpoint_test"} 1' in response.get_data(as_text=True)
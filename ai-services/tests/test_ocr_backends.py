@@ -0,0 +1,67 @@
+# tests/test_ocr_backends.py
+import logging
+
+import pytest
+from app.service import ocrBackends
+from app.service.ocrBackends import OcrResult, extract_pdf_text, text_layer_is_usable
+
+RESUME_PAGE = "Experienced Python developer with Flask, MongoDB and RabbitMQ. " * 10
+
+
+def test_text_layer_is_usable_for_digital_pdfs():
+    assert text_layer_is_usable([RESUME_PAGE, RESUME_PAGE])
+
+
+@pytest.mark.parametrize("pages", [
+    [],
+    ["", " \n "],                      # image-only scan
+    [RESUME_PAGE, "", "", ""],         # one typed cover page, scanned rest
+    ["�$#@!%^&*()" * 40],         # broken font mapping
+])
+def test_text_layer_is_rejected_for_scans_and_garbage(pages):
+    assert not text_layer_is_usable(pages)
+
+
+def _backends(monkeypatch, **backends):
+    monkeypatch.setattr(ocrBackends, "OCR_BACKENDS", backends)
+
+
+def test_extract_pdf_text_uses_first_backend_with_text(monkeypatch):
+    calls = []
+
+    def text_layer(source):
+        calls.append("text_layer")
+        return None
+
+    def vision(source):
+        calls.append("vision")
+        return "scanned text"
+
+    _backends(monkeypatch, text_layer=text_layer, vision=vision)
+
+    assert extract_pdf_text("creds.json", "gs://b/r.pdf", "gs://b/out/", ["text_layer", "vision"]) == \
+        OcrResult("scanned text", "vision")
+    assert calls == ["text_layer", "vision"]
+
+
+def test_extract_pdf_text_skips_vision_when_text_layer_is_usable(monkeypatch):
+    def vision(source):
+        raise AssertionError("Vision should not be called")
+
+    _backends(monkeypatch, text_layer=lambda source: "typed text", vision=vision)
+
+    assert extract_pdf_text("creds.json", "gs://b/r.pdf", "gs://b/out/", ["text_layer", "vision"]).backend == "text_layer"
+
+
+def test_extract_pdf_text_falls_through_a_failing_fast_path(monkeypatch, caplog):
+    def text_layer(source):
+        raise IOError("download failed")
+
+    _backends(monkeypatch, text_layer=text_layer, vision=lambda source: "ocr text")
+
+    with caplog.at_level(logging.INFO):
+        assert extract_pdf_text("creds.json", "gs://b/r.pdf", "gs://b/out/", ["text_layer", "vision"]).backend == "vision"
+
+    levels = {record.getMessage(): record.levelno for record in caplog.records}
+    assert levels["OCR backend 'text_layer' failed for gs://b/r.pdf: download failed"] == logging.WARNING
+    assert levels["Extracted text from gs://b/r.pdf with the 'vision' backend"] == logging.INFO
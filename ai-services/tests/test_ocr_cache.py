@@ -0,0 +1,79 @@
+# tests/test_ocr_cache.py
+import logging
+from datetime import datetime
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from app.service import ocrCache, resume
+from app.service.ocrCache import get_cached_text, ocr_cache_key, store_text
+from benchmarks.fakes import FakeStorageClient, FakeVisionClient
+
+SOURCE_URI = "gs://resumes/candidate.pdf"
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = mongomock.MongoClient().db[ocrCache.OCR_CACHE_COLLECTION]
+    monkeypatch.setattr(ocrCache._cache, "collection", lambda: collection)
+    return collection
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage_client = FakeStorageClient()
+    storage_client.put(SOURCE_URI, b"Jane Doe, Python developer")
+    monkeypatch.setattr(resume, "get_storage_client", lambda path: storage_client)
+    monkeypatch.setattr(resume, "OCR_CACHE_ENABLED", True)
+    return storage_client
+
+
+def test_cache_key_is_the_content_hash():
+    blob = SimpleNamespace(md5_hash="abc==", bucket=SimpleNamespace(name="resumes"), name="a.pdf", generation=7)
+    assert ocr_cache_key(blob) == "md5:abc=="
+
+    # Composite objects have no MD5
+    blob.md5_hash = None
+    assert ocr_cache_key(blob) == "generation:resumes/a.pdf#7"
+
+
+def test_same_pdf_is_only_ocrd_once(collection, storage, monkeypatch):
+    vision_client = FakeVisionClient(storage)
+    jobs = []
+    monkeypatch.setattr(resume, "get_vision_client", lambda path: jobs.append(path) or vision_client)
+
+    first = resume.async_detect_text_in_pdf("creds.json", SOURCE_URI, "gs://resumes/vision_output/")
+    # The same file uploaded under another name shares the entry
+    storage.put("gs://resumes/renamed.pdf", b"Jane Doe, Python developer")
+    second = resume.async_detect_text_in_pdf("creds.json", "gs://resumes/renamed.pdf", "gs://resumes/vision_output/")
+
+    assert first == second == "Jane Doe, Python developer"
+    assert len(jobs) == 1
+    assert collection.find_one()["hits"] == 1
+
+
+def test_cache_failure_falls_back_to_ocr(storage, monkeypatch, caplog):
+    def unavailable(key):
+        raise ConnectionError("Mongo is down")
+
+    monkeypatch.setattr(resume, "get_cached_text", unavailable)
+    monkeypatch.setattr(resume, "store_text", lambda *args: None)
+    monkeypatch.setattr(resume, "get_vision_client", lambda path: FakeVisionClient(storage))
+
+    with caplog.at_level(logging.WARNING):
+        assert resume.async_detect_text_in_pdf("creds.json", SOURCE_URI, "gs://resumes/vision_output/") == \
+            "Jane Doe, Python developer"
+    assert f"OCR cache lookup failed for {SOURCE_URI}: Mongo is down" in caplog.text
+
+
+def test_least_recently_used_entries_are_evicted(collection):
+    for key in ("a", "b", "c"):
+        store_text(key, f"text {key}", SOURCE_URI, max_entries=5)
+    # "b" is the least recently used
+    for hour, key in enumerate(("b", "c", "a")):
+        collection.update_one({"_id": key}, {"$set": {"lastAccessedAt": datetime(2020, 1, 1, hour)}})
+
+    store_text("d", "text d", SOURCE_URI, max_entries=3)
+
+    assert get_cached_text("b") is None
+    assert {document["_id"] for document in collection.find()} == {"a", "c", "d"}
@@ -0,0 +1,109 @@
+# tests/test_ocr_output.py
+import logging
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from google.cloud import vision
+from app.service import ocrCache, resume
+from app.service.resume import PAGE_SEPARATOR, ocr_output_uri, ocr_shard_start_page
+from benchmarks.fakes import FakeStorageClient
+
+SOURCE_URI = "gs://resumes/candidate.pdf"
+OUTPUT_URI = "gs://resumes/vision_output/"
+
+
+class ShardingVisionClient:
+    """Writes one output shard per page, named like Vision does, in a shuffled order."""
+
+    def __init__(self, storage_client, pages):
+        self.storage_client = storage_client
+        self.pages = pages
+        self.destinations = []
+
+    def async_batch_annotate_files(self, requests):
+        destination = requests[0].output_config.gcs_destination.uri
+        self.destinations.append(destination)
+
+        def result(timeout=None):
+            for number in sorted(range(1, len(self.pages) + 1), key=str):
+                response = vision.AnnotateFileResponse(responses=[vision.AnnotateImageResponse(
+                    full_text_annotation=vision.TextAnnotation(text=self.pages[number - 1]))])
+                self.storage_client.put(f"{destination}output-{number}-to-{number}.json",
+                                        vision.AnnotateFileResponse.to_json(response).encode("utf-8"))
+
+        return SimpleNamespace(result=result)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage_client = FakeStorageClient()
+    storage_client.put(SOURCE_URI, b"%PDF")
+    monkeypatch.setattr(resume, "get_storage_client", lambda path: storage_client)
+    monkeypatch.setattr(resume, "OCR_CACHE_ENABLED", False)
+    return storage_client
+
+
+def _vision(monkeypatch, storage, pages):
+    client = ShardingVisionClient(storage, pages)
+    monkeypatch.setattr(resume, "get_vision_client", lambda path: client)
+    return client
+
+
+def test_each_job_gets_its_own_output_prefix():
+    first, second = ocr_output_uri(OUTPUT_URI), ocr_output_uri(OUTPUT_URI.rstrip("/"))
+    assert first != second
+    assert first.startswith(OUTPUT_URI) and second.startswith(OUTPUT_URI) and first.endswith("/")
+
+
+def test_shards_sort_by_page_number():
+    names = ["p/output-10-to-10.json", "p/output-2-to-2.json", "p/output-1-to-1.json"]
+    blobs = sorted((SimpleNamespace(name=name) for name in names), key=ocr_shard_start_page)
+    assert [blob.name for blob in blobs] == ["p/output-1-to-1.json", "p/output-2-to-2.json", "p/output-10-to-10.json"]
+
+
+def test_every_page_is_read_in_order_and_the_output_removed(storage, monkeypatch):
+    pages = [f"page {number}" for number in range(1, 12)]
+    client = _vision(monkeypatch, storage, pages)
+    # Output left behind by another job under the shared prefix
+    storage.put(f"{OUTPUT_URI}stale/output-1-to-1.json", b"{}")
+
+    text = resume.async_detect_text_in_pdf("creds.json", SOURCE_URI, OUTPUT_URI)
+
+    assert text == PAGE_SEPARATOR.join(pages)
+    _, prefix = resume.parse_gcs_path(client.destinations[0])
+    assert list(storage.bucket("resumes").list_blobs(prefix=prefix)) == []
+    assert storage.bucket("resumes").get_blob("vision_output/stale/output-1-to-1.json") is not None
+
+
+def test_output_is_kept_when_cleanup_is_off(storage, monkeypatch):
+    client = _vision(monkeypatch, storage, ["only page"])
+
+    assert resume.async_detect_text_in_pdf("creds.json", SOURCE_URI, OUTPUT_URI, cleanup=False) == "only page"
+    _, prefix = resume.parse_gcs_path(client.destinations[0])
+    assert len(storage.bucket("resumes").list_blobs(prefix=prefix)) == 1
+
+
+def test_text_with_an_unreadable_shard_is_not_cached(storage, monkeypatch, caplog):
+    collection = mongomock.MongoClient().db[ocrCache.OCR_CACHE_COLLECTION]
+    monkeypatch.setattr(ocrCache._cache, "collection", lambda: collection)
+    monkeypatch.setattr(resume, "OCR_CACHE_ENABLED", True)
+    client = _vision(monkeypatch, storage, ["page 1", "page 2"])
+    result = client.async_batch_annotate_files
+
+    def corrupt_second_shard(requests):
+        operation = result(requests)
+
+        def finish(timeout=None):
+            operation.result(timeout)
+            storage.put(f"{client.destinations[-1]}output-2-to-2.json", b"not json")
+
+        return SimpleNamespace(result=finish)
+
+    monkeypatch.setattr(client, "async_batch_annotate_files", corrupt_second_shard)
+
+    with caplog.at_level(logging.ERROR):
+        assert resume.async_detect_text_in_pdf("creds.json", SOURCE_URI, OUTPUT_URI) == "page 1"
+
+    assert "Error processing OCR output" in caplog.text
+    assert collection.count_documents({}) == 0
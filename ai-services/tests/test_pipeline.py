@@ -0,0 +1,104 @@
+# tests/test_pipeline.py
+import asyncio
+import threading
+
+import pytest
+from app.utils.pipeline import Stage, run_pipeline, run_pipeline_async, validate_stages
+
+
+def test_run_pipeline_passes_results_between_stages():
+    stages = [
+        Stage("a", lambda r: r["seed"] + 1, ()),
+        Stage("b", lambda r: r["a"] * 2, ("a",)),
+    ]
+    results, timings = run_pipeline(stages, {"seed": 1})
+    assert results["b"] == 4
+    assert set(timings) == {"a", "b"}
+
+
+def test_independent_stages_run_concurrently():
+    # Both branches wait on the barrier, so this only finishes if they overlap
+    barrier = threading.Barrier(2, timeout=5)
+    stages = [
+        Stage("root", lambda r: None, ()),
+        Stage("left", lambda r: barrier.wait(), ("root",)),
+        Stage("right", lambda r: barrier.wait(), ("root",)),
+    ]
+    results, _ = run_pipeline(stages)
+    assert {results["left"], results["right"]} == {0, 1}
+
+
+def test_stage_failure_is_raised():
+    def fail(results):
+        raise RuntimeError("boom")
+
+    stages = [Stage("a", fail, ()), Stage("b", lambda r: r["a"], ("a",))]
+    with pytest.raises(RuntimeError, match="boom"):
+        run_pipeline(stages)
+
+
+def test_validate_stages_rejects_unknown_dependency():
+    with pytest.raises(ValueError):
+        validate_stages([Stage("a", lambda r: None, ("missing",))])
+
+
+def test_completed_stages_are_skipped():
+    def fail(results):
+        raise AssertionError("completed stage should not run")
+
+    recorded = []
+    stages = [
+        Stage("a", fail, ()),
+        Stage("b", lambda r: r["a"] + 1, ("a",)),
+    ]
+    results, timings = run_pipeline(
+        stages, completed={"a": 1}, on_stage_complete=lambda name, output: recorded.append((name, output))
+    )
+    assert results["b"] == 2
+    assert set(timings) == {"b"}
+    assert recorded == [("b", 2)]
+
+
+def _async_stage(func):
+    async def run(results):
+        await asyncio.sleep(0)
+        return func(results)
+    return run
+
+
+def test_run_pipeline_async_skips_completed_stages_and_awaits_callback():
+    recorded = []
+
+    async def on_stage_complete(name, output):
+        recorded.append((name, output))
+
+    stages = [
+        Stage("a", _async_stage(lambda r: 1 / 0), ()),
+        Stage("b", _async_stage(lambda r: r["a"] + 1), ("a",)),
+        Stage("c", _async_stage(lambda r: r["b"] * 2), ("b",)),
+    ]
+    results, timings = asyncio.run(run_pipeline_async(stages, completed={"a": 1}, on_stage_complete=on_stage_complete))
+
+    assert results["c"] == 4
+    assert set(timings) == {"b", "c"}
+    assert recorded == [("b", 2), ("c", 4)]
+
+
+def test_run_pipeline_async_runs_independent_stages_concurrently():
+    async def main():
+        # Both branches wait on the same event, so this only finishes if they overlap
+        both_started = asyncio.Event()
+        started = []
+
+        async def branch(results):
+            started.append(True)
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=5)
+            return len(started)
+
+        stages = [Stage("left", branch, ()), Stage("right", branch, ())]
+        return await run_pipeline_async(stages)
+
+    results, _ = asyncio.run(main())
+    assert results["left"] == results["right"] == 2
@@ -0,0 +1,13 @@
+# tests/test_questions_generator.py
+import pytest
+from app.utils.structured_output import StructuredOutputError
+from app.service.questionsGenerator import process_questions, validate_questions
+
+
+def test_process_questions_adds_question_marks():
+    assert process_questions(" First // Second? //") == [{"question": "First?"}, {"question": "Second?"}]
+
+
+def test_validate_questions_rejects_short_lists():
+    with pytest.raises(StructuredOutputError):
+        validate_questions("Only one?")
@@ -0,0 +1,158 @@
+# tests/test_rate_limiter.py
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from groq import RateLimitError
+from app.utils.rate_limiter import ModelRateLimiter, TokenBucket, parse_duration
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _rate_limit_error(retry_after="2"):
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+def _raw_response(result, headers=None):
+    return SimpleNamespace(headers=headers or {}, parse=lambda: result)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("7.66s", 7.66), ("2m59.56s", 179.56), ("120ms", 0.12), ("3", 3.0),
+])
+def test_parse_duration(value, expected):
+    assert parse_duration(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value", [None, "", "soon"])
+def test_parse_duration_rejects_missing_values(value):
+    assert parse_duration(value) is None
+
+
+def test_token_bucket_makes_callers_queue_once_empty():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock)  # one token per second
+
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+    clock.now = 10
+    assert bucket.reserve(1) == 0
+
+
+def test_concurrency_limit_is_additive_increase_multiplicative_decrease():
+    limiter = ModelRateLimiter("model", 1000, initial_concurrency=4, max_concurrency=8)
+
+    limiter.acquire()
+    limiter.release(throttled=True)
+    assert limiter.concurrency_limit == 2
+
+    limiter.acquire()
+    limiter.release()
+    assert limiter.concurrency_limit == 2.5
+
+
+def test_acquire_async_wakes_when_another_thread_releases_a_slot():
+    limiter = ModelRateLimiter("model", 1000, initial_concurrency=1, max_concurrency=1)
+    limiter.acquire()
+
+    async def main():
+        waiting = asyncio.create_task(limiter.acquire_async())
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        await asyncio.get_running_loop().run_in_executor(None, limiter.release)
+        await asyncio.wait_for(waiting, timeout=5)
+
+    asyncio.run(main())
+    assert limiter.in_flight == 1
+    assert limiter._async_waiters == []
+
+
+def test_cancelled_acquire_async_stops_waiting():
+    limiter = ModelRateLimiter("model", 1000, initial_concurrency=1, max_concurrency=1)
+    limiter.acquire()
+
+    async def main():
+        waiting = asyncio.create_task(limiter.acquire_async())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(main())
+    assert limiter._async_waiters == []
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+def test_remaining_headers_throttle_following_calls():
+    clock = FakeClock()
+    limiter = ModelRateLimiter("model", 60, clock=clock, sleep=clock.sleep)
+
+    limiter.update_from_headers({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "5s"})
+    limiter.acquire()
+    limiter.release()
+    assert clock.now >= 5
+
+
+def test_call_retries_rate_limited_requests_with_backoff(caplog):
+    clock = FakeClock()
+    limiter = ModelRateLimiter("model", 1000, clock=clock, sleep=clock.sleep)
+    attempts = []
+
+    def request():
+        attempts.append(clock.now)
+        if len(attempts) == 1:
+            raise _rate_limit_error(retry_after="2")
+        return _raw_response("ok")
+
+    with caplog.at_level(logging.WARNING):
+        assert limiter.call(request) == "ok"
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 2
+    assert limiter.in_flight == 0
+    assert "model request failed (RateLimitError), retrying" in caplog.text
+
+
+def test_call_gives_up_after_max_retries():
+    clock = FakeClock()
+    limiter = ModelRateLimiter("model", 1000, clock=clock, sleep=clock.sleep)
+
+    def request():
+        raise _rate_limit_error(retry_after="0")
+
+    with pytest.raises(RateLimitError):
+        limiter.call(request, max_retries=2)
+    assert limiter.in_flight == 0
+
+
+def test_call_async_retries_rate_limited_requests():
+    limiter = ModelRateLimiter("model", 1000)
+    limiter.backoff = lambda attempt, retry_after=None: 0
+    attempts = []
+
+    async def parse():
+        return "ok"
+
+    async def request():
+        attempts.append(True)
+        if len(attempts) == 1:
+            raise _rate_limit_error(retry_after="0")
+        return SimpleNamespace(headers={}, parse=parse)
+
+    assert asyncio.run(limiter.call_async(request)) == "ok"
+    assert len(attempts) == 2
+    assert limiter.in_flight == 0
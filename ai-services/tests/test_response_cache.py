@@ -0,0 +1,126 @@
+# tests/test_response_cache.py
+import logging
+from datetime import datetime
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from app.utils import llm, response_cache, structured_output
+from app.utils.llm import DEFAULT_MODEL, chat_completion_text, completion_cache_key
+from app.utils.structured_output import json_fields, require_score, structured_chat_completion
+from app.service.interviewProcess import evaluate_question_answer
+from app.service.resume import summarize_resume
+
+MESSAGES = [{"role": "system", "content": "Grade it."}, {"role": "user", "content": "An answer"}]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Enable the response cache on an in-memory dict."""
+    entries = {}
+    monkeypatch.setattr(llm, "RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm, "get_cached_response", entries.get)
+    monkeypatch.setattr(llm, "store_response", lambda key, text, model: entries.__setitem__(key, text))
+    return entries
+
+
+def _response(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def test_cache_key_covers_model_and_sampling_params():
+    key = completion_cache_key(MESSAGES)
+
+    assert completion_cache_key(MESSAGES, model=DEFAULT_MODEL, temperature=0.5) == key
+    assert completion_cache_key(MESSAGES, stream=True) == key
+    assert completion_cache_key(MESSAGES, temperature=0.9) != key
+    assert completion_cache_key(MESSAGES, model="other-model") != key
+    assert completion_cache_key(MESSAGES[:1] + [{"role": "user", "content": "Another"}]) != key
+
+
+def test_identical_request_is_served_from_cache(cache, monkeypatch):
+    calls = []
+
+    def fake_stream(messages, **params):
+        calls.append(params)
+        yield "A summary"
+
+    monkeypatch.setattr(llm, "stream_chat_completion", fake_stream)
+
+    assert chat_completion_text(MESSAGES, cache=True, max_completion_tokens=100) == "A summary"
+    assert chat_completion_text(MESSAGES, cache=True, max_completion_tokens=100) == "A summary"
+    assert len(calls) == 1
+
+    # Calls that do not opt in always get a fresh sample
+    chat_completion_text(MESSAGES, max_completion_tokens=100)
+    assert len(calls) == 2
+
+
+def test_only_validated_structured_responses_are_cached(cache, monkeypatch):
+    responses = iter(['The score is eighty', '{"score": 80}'])
+    calls = []
+
+    def fake_create(messages, **params):
+        calls.append(params)
+        return _response(next(responses))
+
+    monkeypatch.setattr(structured_output, "create_chat_completion", fake_create)
+    parse = json_fields(lambda fields: require_score(fields.get("score")))
+
+    assert structured_chat_completion(MESSAGES, parse, cache=True) == 80
+    assert list(cache.values()) == ['{"score": 80}']
+
+    assert structured_chat_completion(MESSAGES, parse, cache=True) == 80
+    assert len(calls) == 2
+
+
+def test_cached_response_rejected_by_parse_is_requested_again(cache, monkeypatch):
+    key = completion_cache_key(MESSAGES, response_format={"type": "json_object"})
+    cache[key] = '{"score": 180}'
+    monkeypatch.setattr(structured_output, "create_chat_completion", lambda messages, **params: _response('{"score": 70}'))
+    parse = json_fields(lambda fields: require_score(fields.get("score")))
+
+    assert structured_chat_completion(MESSAGES, parse, cache=True) == 70
+    assert cache[key] == '{"score": 70}'
+
+
+def test_summaries_opt_in_and_scores_do_not(cache, monkeypatch):
+    def fake_stream(messages, **params):
+        yield '{"score": 80}'
+
+    monkeypatch.setattr(llm, "stream_chat_completion", fake_stream)
+
+    summarize_resume("Jane Doe, Python developer")
+    assert len(cache) == 1
+
+    evaluate_question_answer("Why Python?", "It is readable.")
+    assert len(cache) == 1
+
+
+def test_unreachable_cache_is_logged_and_skipped(monkeypatch, caplog):
+    def unavailable(key):
+        raise ConnectionError("Mongo is down")
+
+    monkeypatch.setattr(llm, "RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm, "get_cached_response", unavailable)
+
+    with caplog.at_level(logging.WARNING):
+        assert llm.load_cached_completion(MESSAGES) is None
+    assert "LLM response cache lookup failed: Mongo is down" in caplog.text
+
+
+def test_mongo_backend_evicts_least_recently_used_entries(monkeypatch):
+    collection = mongomock.MongoClient().db[response_cache.RESPONSE_CACHE_COLLECTION]
+    monkeypatch.setattr(response_cache._cache, "collection", lambda: collection)
+
+    for key in ("a", "b", "c"):
+        response_cache.store_response(key, f"text {key}", DEFAULT_MODEL, max_entries=5)
+    # Spread the access times out: "b" is the least recently used
+    for hour, key in enumerate(("b", "c", "a")):
+        collection.update_one({"_id": key}, {"$set": {"lastAccessedAt": datetime(2020, 1, 1, hour)}})
+
+    assert response_cache.get_cached_response("a") == "text a"
+    response_cache.store_response("d", "text d", DEFAULT_MODEL, max_entries=3)
+
+    assert response_cache.get_cached_response("b") is None
+    assert {document["_id"] for document in collection.find()} == {"a", "c", "d"}
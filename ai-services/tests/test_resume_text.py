@@ -0,0 +1,58 @@
+# tests/test_resume_text.py
+from app.service.resume import PAGE_SEPARATOR
+from app.service.resumeText import (
+    compact_resume_text, count_tokens, dedupe_lines, drop_page_furniture, fit_token_budget, normalize_text,
+)
+
+
+def test_normalize_text_cleans_up_ocr_artifacts():
+    text = "Experienced engi-\nneer\u200b with  ﬁve\tyears\r\n●\nBuilt APIs\n\n\n\n▪ Led a team"
+    assert normalize_text(text) == "Experienced engineer with five years\n- Built APIs\n\n- Led a team"
+
+
+def test_page_numbers_and_running_headers_are_dropped():
+    pages = [
+        "Jane Doe - Resume\nSkills\nPython\nPage 1 of 2",
+        "Jane Doe - Resume\nEducation\nBSc Physics\nPage 2 of 2",
+    ]
+    text = drop_page_furniture(PAGE_SEPARATOR.join(pages))
+    assert text == "Skills\nPython\nEducation\nBSc Physics"
+
+
+def test_numeric_values_in_the_body_are_kept():
+    pages = [
+        "1\nJane Doe\nYears of experience\n7\nCGPA\n9/10\nTeam size\n120",
+        "Education\nBSc Physics\n2",
+    ]
+    text = drop_page_furniture(PAGE_SEPARATOR.join(pages))
+    assert text == "Jane Doe\nYears of experience\n7\nCGPA\n9/10\nTeam size\n120\nEducation\nBSc Physics"
+
+    single_page = "Jane Doe\nYears of experience\n7\nCGPA\n9/10\nTeam size\n120"
+    assert compact_resume_text(single_page, budget=100).text == single_page
+
+
+def test_dedupe_lines_keeps_short_lines_repeated_in_other_sections():
+    text = "Python\nPython\nLed migration of the payments platform\nSQL\nPython\nLed migration of the payments platform"
+    assert dedupe_lines(text) == "Python\nLed migration of the payments platform\nSQL\nPython"
+
+
+def test_over_budget_text_keeps_higher_priority_sections():
+    experience = "\n".join(f"Shipped feature number {index} for the billing team" for index in range(20))
+    text = f"Jane Doe\nHobbies\nChess and hiking\nExperience\n{experience}\nSkills\nPython, SQL"
+    budget = 60
+
+    fitted, truncated = fit_token_budget(text, budget)
+
+    assert truncated and count_tokens(fitted) <= budget
+    assert fitted.startswith("Jane Doe\nExperience\nShipped feature number 0")
+    assert "Hobbies" not in fitted and "Chess" not in fitted
+    assert fit_token_budget("Jane Doe\nSkills\nPython", budget) == ("Jane Doe\nSkills\nPython", False)
+
+
+def test_compact_resume_text_reports_tokens_saved():
+    text = "Jane Doe\n\n\n\nSkills\nPython\nPython\nPage 1"
+    compacted = compact_resume_text(text, budget=100)
+
+    assert compacted.text == "Jane Doe\n\nSkills\nPython"
+    assert compacted.tokens == count_tokens(compacted.text) < compacted.original_tokens
+    assert not compacted.truncated
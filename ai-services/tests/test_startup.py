@@ -0,0 +1,33 @@
+# tests/test_startup.py
+import subprocess
+import sys
+
+from benchmarks.import_time import PROJECT_ROOT, _environment, time_startup
+
+
+def test_importing_services_loads_no_clients_or_credentials():
+    # A fresh interpreter, so modules imported by other tests do not count
+    script = (
+        "import sys, app\n"
+        "import app.rabbitmq_consumer, app.service.interviewProcess\n"
+        "from app.utils import client_pool\n"
+        "assert app._app is None, 'app created at import'\n"
+        "assert not client_pool._clients, 'clients created at import'\n"
+        "assert not any(name.startswith('google.cloud') for name in sys.modules), 'Google SDK imported'\n"
+    )
+    env = _environment()
+    env["GOOGLE_APPLICATION_CREDENTIALS"] = "/nonexistent/credentials.json"
+    result = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_get_app_returns_one_instance():
+    from app import get_app
+
+    assert get_app() is get_app()
+
+
+def test_time_startup_reports_import_and_app_timings():
+    timings = time_startup("app.service.interviewProcess")
+    assert 0 < timings["import"] <= timings["app"]
+    assert timings["google_loaded"] is False
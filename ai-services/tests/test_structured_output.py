@@ -0,0 +1,114 @@
+# tests/test_structured_output.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from app.utils import llm, structured_output
+from app.utils.structured_output import (
+    StructuredOutputError, parse_json_object, require_score, structured_chat_completion, json_fields,
+    json_object_closed, structured_chat_completion_async,
+)
+
+
+def _response(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def test_parse_json_object_ignores_code_fences():
+    assert parse_json_object('```json\n{"score": 80}\n```') == {"score": 80}
+
+
+def test_parse_json_object_rejects_plain_text():
+    with pytest.raises(StructuredOutputError):
+        parse_json_object("Score: 80%")
+
+
+@pytest.mark.parametrize("value, expected", [(80, 80), ("75%", 75), (99.6, 100)])
+def test_require_score_accepts_numbers(value, expected):
+    assert require_score(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, 101, -1, True, "great"])
+def test_require_score_rejects_invalid_values(value):
+    with pytest.raises(StructuredOutputError):
+        require_score(value)
+
+
+def test_structured_chat_completion_retries_only_malformed_responses(monkeypatch):
+    responses = iter(['The score is eighty', '{"score": 80}'])
+    calls = []
+
+    def fake_create(messages, **params):
+        calls.append(params)
+        return _response(next(responses))
+
+    monkeypatch.setattr(structured_output, "create_chat_completion", fake_create)
+    parse = json_fields(lambda fields: require_score(fields.get("score")))
+
+    assert structured_chat_completion([], parse) == 80
+    assert len(calls) == 2
+    assert calls[0]["response_format"] == {"type": "json_object"}
+
+
+def test_structured_chat_completion_gives_up_after_retries(monkeypatch):
+    monkeypatch.setattr(structured_output, "create_chat_completion", lambda messages, **params: _response("nope"))
+
+    with pytest.raises(StructuredOutputError):
+        structured_chat_completion([], json_fields(dict), retries=1)
+
+
+class FakeStream:
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for delta in self.deltas:
+            self.read += 1
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"score": 7', False), ('{"score": 72}', True), ('Sure! {"note": "a } b", "score": 1', False),
+    ('{"scores": [1, {"x": 2}]}', True), ('no json yet', False),
+])
+def test_json_object_closed(text, expected):
+    assert json_object_closed(text) is expected
+
+
+def test_streamed_score_stops_reading_once_object_is_complete(monkeypatch):
+    stream = FakeStream(['{"sco', 're": 7', '2}', ' Because the answer', ' was thorough...'])
+    monkeypatch.setattr(llm, "create_chat_completion", lambda messages, **params: stream)
+    parse = json_fields(lambda fields: require_score(fields.get("score")))
+
+    assert structured_chat_completion([], parse, json_mode=False, stop_when=json_object_closed) == 72
+    assert stream.read == 3
+    assert stream.closed
+
+
+class FakeAsyncStream(FakeStream):
+    async def __aiter__(self):
+        for chunk in FakeStream.__iter__(self):
+            yield chunk
+
+    async def close(self):
+        self.closed = True
+
+
+def test_async_streamed_score_stops_reading_once_object_is_complete(monkeypatch):
+    stream = FakeAsyncStream(['{"score": 6', '4}', ' Because...'])
+
+    async def fake_create(messages, **params):
+        return stream
+
+    monkeypatch.setattr(llm, "create_chat_completion_async", fake_create)
+    parse = json_fields(lambda fields: require_score(fields.get("score")))
+
+    result = asyncio.run(structured_chat_completion_async([], parse, json_mode=False, stop_when=json_object_closed))
+    assert result == 64
+    assert stream.read == 2
+    assert stream.closed
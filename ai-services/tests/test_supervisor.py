@@ -0,0 +1,140 @@
+# tests/test_supervisor.py
+import os
+import time
+import signal
+import socket
+import threading
+import multiprocessing
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+from app import rabbitmq_consumer
+from app.rabbitmq_consumer import JOB_APPLICATION_QUEUE, INTERVIEW_COMPLETED_QUEUE, QUEUE_HANDLERS, drain
+from app.supervisor import Pool, Supervisor, parse_pools
+from app.utils.metrics import MESSAGES_IN_FLIGHT, MESSAGES_PROCESSED
+
+# Fork so the test targets need not be importable by a fresh interpreter
+FORK = multiprocessing.get_context("fork")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_pools_pins_queues_to_pools():
+    pools = parse_pools(f"{JOB_APPLICATION_QUEUE}=2; {INTERVIEW_COMPLETED_QUEUE}", default_processes=3)
+    assert pools == [Pool((JOB_APPLICATION_QUEUE,), 2), Pool((INTERVIEW_COMPLETED_QUEUE,), 3)]
+    assert parse_pools("", default_processes=1) == [Pool(tuple(QUEUE_HANDLERS), 1)]
+
+
+@pytest.mark.parametrize("spec", ["missing_queue=1", f"{JOB_APPLICATION_QUEUE}=0", f"{JOB_APPLICATION_QUEUE}=two"])
+def test_parse_pools_rejects_invalid_entries(spec):
+    with pytest.raises(ValueError):
+        parse_pools(spec)
+
+
+def _crash(queues, *args):
+    os._exit(3)
+
+
+def test_crashed_worker_is_restarted_with_backoff():
+    clock = FakeClock()
+    supervisor = Supervisor([Pool(("queue",), 1)], target=_crash, mp_context=FORK, clock=clock)
+    slot = supervisor.slots[0]
+
+    supervisor.check()
+    slot.process.join()
+    clock.now = 1
+    supervisor.check()  # crashed right after starting: restart is delayed
+    assert slot.process is None and slot.failures == 1
+
+    clock.now = 2
+    supervisor.check()
+    assert slot.process is not None
+    slot.process.join()
+
+
+def test_stop_lets_workers_drain():
+    ready = FORK.Semaphore(0)
+
+    def drain_on_sigterm(queues, *args):
+        stopped = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+        ready.release()
+        stopped.wait(10)
+        os._exit(0 if stopped.is_set() else 1)
+
+    supervisor = Supervisor([Pool(("queue",), 2)], drain_timeout=5, target=drain_on_sigterm, mp_context=FORK)
+    supervisor.check()
+    assert ready.acquire(timeout=5) and ready.acquire(timeout=5)
+
+    processes = [slot.process for slot in supervisor.slots]
+    supervisor.stop()
+    assert [process.exitcode for process in processes] == [0, 0]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _scrape_until(port, expected, timeout=5):
+    """Read the worker's /metrics until it reports `expected` (it may still be starting up)."""
+    deadline = time.monotonic() + timeout
+    body = ""
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1) as response:
+                body = response.read().decode("utf-8")
+        except OSError:
+            pass
+        if expected in body:
+            break
+        time.sleep(0.05)
+    return body
+
+
+def test_each_worker_serves_its_own_metrics(monkeypatch):
+    def start_consumer(mode, workers, prefetch, queues, stop_event, drain_timeout):
+        MESSAGES_PROCESSED.inc(queue=queues[0], outcome="ack")
+        stop_event.wait(10)
+
+    # Forked workers inherit the patched consumer, so no broker is needed
+    monkeypatch.setattr(rabbitmq_consumer, "start_consumer", start_consumer)
+    port = _free_port()
+    supervisor = Supervisor([Pool(("metrics_test_queue",), 1)], drain_timeout=5, metrics_port=port, mp_context=FORK)
+    supervisor.check()
+
+    sample = 'ai_services_messages_total{queue="metrics_test_queue",outcome="ack"} 1'
+    try:
+        body = _scrape_until(port, sample)
+    finally:
+        supervisor.stop()
+
+    assert sample in body
+    # The supervising process never consumed anything itself
+    assert MESSAGES_PROCESSED.value(queue="metrics_test_queue", outcome="ack") == 0
+    assert supervisor.slots[0].process.exitcode == 0
+
+
+def test_drain_cancels_consumers_and_waits_for_in_flight_messages():
+    queue = "drain_test_queue"
+    MESSAGES_IN_FLIGHT.inc(queue=queue)
+    cancelled = []
+    channel = SimpleNamespace(consumer_tags=["ctag"], basic_cancel=lambda tag: cancelled.append(tag) or [])
+
+    def process_data_events(time_limit):
+        # The worker finishes while the connection is being serviced
+        if MESSAGES_IN_FLIGHT.value(queue=queue):
+            MESSAGES_IN_FLIGHT.dec(queue=queue)
+
+    connection = SimpleNamespace(process_data_events=process_data_events)
+
+    assert drain(connection, [channel], [queue], timeout=5) == 0
+    assert cancelled == ["ctag"]
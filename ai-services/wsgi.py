@@ -0,0 +1,12 @@
+"""
+WSGI entry point for the HTTP API under a production server:
+
+    gunicorn --bind 0.0.0.0:5000 wsgi:app
+
+The consumers run in their own processes, see consumer.py. This app's
+/metrics only covers the web process; each consumer worker serves its own
+metrics when METRICS_PORT is set, see app.supervisor.
+"""
+from app import get_app
+
+app = get_app()